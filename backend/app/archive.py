@@ -0,0 +1,253 @@
+"""
+Task Archive Module
+
+This module moves old completed tasks out of the hot tasks collection
+into tasks_archive, keeping its indexes and working set small:
+- A task is archived once it has been completed and left unchanged for
+  settings.archive_after_days (its updated_at is older than the cutoff)
+- Tasks are moved in throttled batches: one insert_many into the
+  archive, then one bulk delete from tasks. Originals changed since they
+  were read are not deleted, and their copies are dropped
+- Copies are written with a pending flag that is cleared once their
+  originals are deleted; readers ignore pending copies. A run that was
+  interrupted in between is resolved by the next one: copies whose task
+  still exists are dropped, the others are committed
+- Only the holder of the archiver lease runs batches
+- Archived tasks leave the change log, counters and search index as
+  deletes
+
+Usage (from backend/):
+    python -m app.archive --after-days 30    # Run one archival pass now
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import DeleteOne
+from pymongo.errors import BulkWriteError
+from .config import settings
+from .database import Database
+from .leases import Lease
+from .metrics import archive_batches, archive_batch_duration, tasks_archived, archive_lag
+from .repository import TaskRepository, ARCHIVE_PENDING_FIELD
+
+logger = logging.getLogger(__name__)
+
+
+def archivable_filter(cutoff: datetime) -> dict:
+    """Filter matching tasks completed and unchanged since before cutoff."""
+    return {"completed": True, "updated_at": {"$lt": cutoff}}
+
+
+class TaskArchiver:
+    archive_task: Optional[asyncio.Task] = None
+    lease: Optional[Lease] = None
+
+    @classmethod
+    def _lease(cls) -> Lease:
+        if cls.lease is None:
+            cls.lease = Lease("task_archiver", settings.archive_lease_seconds)
+        return cls.lease
+
+    @classmethod
+    async def _commit(cls, copies: list[dict]):
+        """Clear the pending flag of copies whose originals are gone and propagate the deletes."""
+        if not copies:
+            return
+        await TaskRepository.archive_collection().update_many(
+            {"_id": {"$in": [copy["_id"] for copy in copies]}},
+            {"$unset": {ARCHIVE_PENDING_FIELD: ""}}
+        )
+        per_user: dict[str, list] = {}
+        for copy in copies:
+            per_user.setdefault(str(copy["user_id"]), []).append(copy["_id"])
+        for user_id, task_ids in per_user.items():
+            # Only completed tasks are archived
+            await TaskRepository._after_delete(user_id, task_ids, completed=len(task_ids), op="archive")
+        tasks_archived.inc(amount=len(copies))
+
+    @classmethod
+    async def _resolve(cls, copies: list[dict]) -> int:
+        """Commit copies whose original was deleted and drop the others."""
+        cursor = TaskRepository.collection().find({"_id": {"$in": [copy["_id"] for copy in copies]}}, {"_id": 1})
+        remaining = {doc["_id"] async for doc in cursor}
+        if remaining:
+            await TaskRepository.archive_collection().delete_many({"_id": {"$in": list(remaining)}})
+        await cls._commit([copy for copy in copies if copy["_id"] not in remaining])
+        return len(copies) - len(remaining)
+
+    @classmethod
+    async def recover(cls) -> int:
+        """
+        Resolve copies left pending by an interrupted run.
+
+        Returns:
+            int: Number of tasks whose archival was completed
+        """
+        cursor = TaskRepository.archive_collection().find({ARCHIVE_PENDING_FIELD: True}, {"user_id": 1})
+        copies = [copy async for copy in cursor]
+        if not copies:
+            return 0
+        committed = await cls._resolve(copies)
+        logger.warning(
+            "Resolved an interrupted archival batch: %s archived, %s rolled back",
+            committed, len(copies) - committed
+        )
+        return committed
+
+    @classmethod
+    async def archive_batch(cls, cutoff: datetime) -> tuple[int, int]:
+        """
+        Move one batch of archivable tasks, oldest first.
+
+        Args:
+            cutoff: Tasks unchanged since before this time are archived
+
+        Returns:
+            tuple: Number of tasks read and number archived
+        """
+        cursor = TaskRepository.collection().find(archivable_filter(cutoff)).sort("updated_at", 1)
+        docs = [doc async for doc in cursor.limit(settings.archive_batch_size)]
+        if not docs:
+            return 0, 0
+
+        now = datetime.utcnow()
+        try:
+            await TaskRepository.archive_collection().insert_many(
+                [{**doc, "archived_at": now, ARCHIVE_PENDING_FIELD: True} for doc in docs],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Copies left by an earlier run are resolved below like the new ones
+            if any(error.get("code") != 11000 for error in e.details["writeErrors"]):
+                raise
+
+        # A task changed after it was read no longer matches its delete
+        details, _ = await TaskRepository._bulk_write([
+            DeleteOne({"_id": doc["_id"], "completed": True, "updated_at": doc["updated_at"]})
+            for doc in docs
+        ])
+        if details["nRemoved"] == len(docs):
+            await cls._commit(docs)
+            return len(docs), len(docs)
+        return len(docs), await cls._resolve(docs)
+
+    @classmethod
+    async def _update_lag(cls, cutoff: datetime):
+        oldest = await TaskRepository.collection().find_one(
+            archivable_filter(cutoff), {"updated_at": 1}, sort=[("updated_at", 1)]
+        )
+        archive_lag.set(value=(cutoff - oldest["updated_at"]).total_seconds() if oldest else 0.0)
+
+    @classmethod
+    async def run_once(cls) -> int:
+        """
+        Archive every task past the cutoff, in throttled batches.
+
+        Returns:
+            int: Number of tasks archived; 0 when archival is disabled or
+                another worker holds the lease
+        """
+        if settings.archive_after_days is None:
+            return 0
+        lease = cls._lease()
+        if not await lease.acquire():
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=settings.archive_after_days)
+        archived = await cls.recover()
+        while True:
+            started = time.perf_counter()
+            try:
+                found, moved = await cls.archive_batch(cutoff)
+            except Exception:
+                archive_batches.inc("failed")
+                raise
+            if not found:
+                break
+            archive_batch_duration.observe(time.perf_counter() - started)
+            archive_batches.inc("succeeded")
+            archived += moved
+            # A batch that archived nothing would be read again as is
+            if found < settings.archive_batch_size or not moved:
+                break
+            await asyncio.sleep(settings.archive_batch_pause_seconds)
+            if not await lease.acquire():
+                break
+
+        await cls._update_lag(cutoff)
+        if archived:
+            logger.info("✅ Archived %s completed tasks", archived)
+        return archived
+
+    @classmethod
+    async def _archive_loop(cls):
+        while True:
+            await asyncio.sleep(settings.archive_interval_seconds)
+            try:
+                await cls.run_once()
+            except Exception as e:
+                logger.error("❌ Error archiving tasks: %s", e)
+
+    @classmethod
+    def start(cls):
+        """Start the periodic archival job, unless disabled."""
+        if (
+            cls.archive_task is None
+            and settings.archive_after_days is not None
+            and settings.archive_interval_seconds > 0
+        ):
+            cls.archive_task = asyncio.create_task(cls._archive_loop())
+
+    @classmethod
+    async def stop(cls):
+        """
+        Stop the periodic archival job and release the lease.
+
+        A batch interrupted here is resolved by the next run.
+        """
+        if cls.archive_task is not None:
+            cls.archive_task.cancel()
+            try:
+                await cls.archive_task
+            except asyncio.CancelledError:
+                pass
+            cls.archive_task = None
+        if cls.lease is not None:
+            try:
+                await cls.lease.release()
+            except Exception as e:
+                logger.warning("⚠️ Could not release the archiver lease: %s", e)
+
+
+async def _run(after_days: int) -> int:
+    settings.archive_after_days = after_days
+    await Database.connect_to_database(check_indexes=False)
+    try:
+        archived = await TaskArchiver.run_once()
+        print(f"archived: {archived}")
+        return 0
+    finally:
+        await TaskArchiver.stop()
+        await Database.close_database_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old completed tasks")
+    parser.add_argument(
+        "--after-days", type=int, default=settings.archive_after_days,
+        help="Archive tasks completed this many days ago (default: ARCHIVE_AFTER_DAYS)"
+    )
+    args = parser.parse_args()
+    if args.after_days is None:
+        parser.error("--after-days is required when ARCHIVE_AFTER_DAYS is not set")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(asyncio.run(_run(args.after_days)))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,26 +10,41 @@ The module uses bcrypt for password hashing and JWT for token-based authenticati
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
+import uuid
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
 from .schemas import TokenData
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from .database import Database
+from .users import UserRepository
+from .hashing import PasswordHasher, HashingSaturatedError
+from .revocation import RevocationList
 import logging
 
 # Configuramos el logger para este módulo
 logger = logging.getLogger(__name__)
 
-# Configure password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    Get the password hashing context.
+    
+    passlib is imported on first use rather than at startup, since no
+    request needs it until the first signup or login.
+    
+    Returns:
+        CryptContext: The bcrypt hashing context
+    """
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Configure OAuth2 password bearer for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -42,7 +57,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if passwords match, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
@@ -54,7 +69,54 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: The hashed password
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def _hashing_unavailable() -> HTTPException:
+    """Build the 503 returned when the hashing pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": str(settings.password_hash_retry_after_seconds)},
+    )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        plain_password (str): The plain text password to verify
+        hashed_password (str): The hashed password to compare against
+        
+    Returns:
+        bool: True if passwords match, False otherwise
+        
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    try:
+        return await PasswordHasher.run(verify_password, plain_password, hashed_password)
+    except HashingSaturatedError:
+        logger.warning("Password hashing pool saturated during verification")
+        raise _hashing_unavailable()
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        password (str): The plain text password to hash
+        
+    Returns:
+        str: The hashed password
+        
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    try:
+        return await PasswordHasher.run(get_password_hash, password)
+    except HashingSaturatedError:
+        logger.warning("Password hashing pool saturated during hashing")
+        raise _hashing_unavailable()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -73,8 +135,56 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
+def user_claims(user: dict) -> dict:
+    """
+    Build the identity claims embedded in access and refresh tokens.
+    
+    Args:
+        user (dict): The user document
+        
+    Returns:
+        dict: Claims carrying the user's email, id and name
+    """
+    return {"sub": user["email"], "uid": str(user["_id"]), "name": user.get("name")}
+
+def create_refresh_token(user: dict) -> str:
+    """
+    Create a long-lived refresh token for a user.
+    
+    Args:
+        user (dict): The user document
+        
+    Returns:
+        str: The encoded JWT refresh token
+    """
+    data = user_claims(user)
+    data["type"] = "refresh"
+    return create_access_token(
+        data, expires_delta=timedelta(minutes=settings.refresh_token_expire_minutes)
+    )
+
+def decode_token(token: str) -> dict:
+    """
+    Decode a JWT and reject it if it has been revoked.
+    
+    Args:
+        token (str): The encoded JWT
+        
+    Returns:
+        dict: The token payload
+        
+    Raises:
+        JWTError: If the token is invalid, expired or revoked
+    """
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    jti = payload.get("jti")
+    if jti is not None and RevocationList.is_revoked(jti):
+        raise JWTError("Token has been revoked")
+    return payload
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme)
 ) -> dict:
@@ -88,27 +198,61 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
         
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = decode_token(token)
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("type") == "refresh":
             raise credentials_exception
             
-        db = Database.get_db()
-        user = await db.users.find_one({"email": email})
+        # In stateless mode the identity claims are trusted as-is
+        if settings.stateless_auth and payload.get("uid"):
+            return {
+                "_id": payload["uid"],
+                "email": email,
+                "name": payload.get("name"),
+                "jti": payload.get("jti"),
+                "exp": payload.get("exp")
+            }
+            
+        user = await UserRepository.get_by_email(email)
         
         if user is None:
             raise credentials_exception
             
         # Convert ObjectId to string for proper serialization
         user["_id"] = str(user["_id"])
+        user.setdefault("tasks_version", 0)
+        user["jti"] = payload.get("jti")
+        user["exp"] = payload.get("exp")
         return user
         
+    except HTTPException:
+        raise
     except JWTError as e:
-        logger.error(f"JWT validation error: {str(e)}")
+        logger.warning("JWT validation error: %s", e)
         raise credentials_exception
     except Exception as e:
-        logger.error(f"Error in get_current_user: {str(e)}")
+        logger.error("Error in get_current_user: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during authentication"
         )
+
+async def get_stream_user(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers")
+) -> dict:
+    """
+    Dependency to authenticate streaming connections.
+    
+    Browsers' EventSource cannot send an Authorization header, so the
+    token may also be passed as a query parameter. Validation is the same
+    as get_current_user.
+    """
+    access_token = header_token or token
+    if not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_user(access_token)
@@ -0,0 +1,191 @@
+"""
+Change Log Module
+
+This module records task mutations so clients can sync incrementally:
+- Every write bumps the user's task version and logs one entry per
+  changed task with that version as its sequence number
+- Deletes are logged as tombstones, and tasks moved to the archive as
+  "archive" entries so clients can keep them as archived
+- Old entries are compacted by a TTL index; tokens older than the
+  retained log get a "resync required" answer
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from bson import ObjectId
+from .config import settings
+from .database import Database
+from .versions import TaskVersion
+from .pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidSyncTokenError(ValueError):
+    """Raised when a sync token cannot be parsed."""
+
+
+class ResyncRequiredError(LookupError):
+    """Raised when the change log no longer covers a sync token."""
+
+
+def parse_sync_token(token: str) -> tuple[int, Optional[ObjectId]]:
+    """
+    Parse a sync token returned by the changes endpoint.
+
+    Tokens are a task version, optionally followed by "-" and the _id of
+    the last entry returned from the next version, when a single write
+    logged more entries than fit in one response.
+
+    Args:
+        token: The sync token
+
+    Returns:
+        tuple: The task version the token refers to, and the entry to
+            resume after within the next version, if any
+
+    Raises:
+        InvalidSyncTokenError: If the token is malformed
+    """
+    version, _, resume = (token or "").partition("-")
+    try:
+        value = int(version)
+    except (TypeError, ValueError):
+        raise InvalidSyncTokenError("Invalid sync token")
+    if value < 0 or (resume and not ObjectId.is_valid(resume)):
+        raise InvalidSyncTokenError("Invalid sync token")
+    return value, ObjectId(resume) if resume else None
+
+
+def format_sync_token(version: int, resume: Optional[ObjectId] = None) -> str:
+    """Build the sync token parse_sync_token reads back."""
+    return str(version) if resume is None else f"{version}-{resume}"
+
+
+class ChangeLog:
+
+    @classmethod
+    def collection(cls):
+        return Database.get_db().task_changes
+
+    @classmethod
+    async def record(
+        cls,
+        user_id: str,
+        task_ids: Iterable[ObjectId],
+        op: str,
+        counts: Optional[dict[str, int]] = None
+    ):
+        """
+        Bump the user's task version, log the changed tasks and notify
+        the user's stream subscribers.
+
+        Args:
+            user_id: The owner of the changed tasks
+            task_ids: The changed tasks
+            op: "upsert", "delete" or "archive"
+            counts: Task counter deltas to apply with the version bump
+        """
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        seq = await TaskVersion.bump(user_id, counts)
+        if seq is None:
+            return
+        now = datetime.utcnow()
+        owner = ObjectId(user_id)
+        await cls.collection().insert_many(
+            [{"user_id": owner, "seq": seq, "task_id": task_id, "op": op, "at": now} for task_id in task_ids],
+            ordered=False
+        )
+        await get_broker().publish(user_id, {
+            "type": "change",
+            "seq": seq,
+            "op": op,
+            "task_ids": [str(task_id) for task_id in task_ids]
+        })
+
+    @classmethod
+    async def since(
+        cls,
+        user_id: str,
+        since: int,
+        current: int,
+        resume: Optional[ObjectId] = None
+    ) -> tuple[dict[ObjectId, str], int, Optional[ObjectId], bool]:
+        """
+        Collect the latest operation per task after a version.
+
+        Entries are read in sequence order and stop at the first missing
+        sequence number that is younger than the gap grace period, since a
+        concurrent writer may still be logging it. A response never ends
+        part way through a write, unless that single write logged more than
+        change_sync_max_entries entries: it is then returned in pages
+        ordered by _id, resuming after the last entry returned.
+
+        Args:
+            user_id: The owner of the tasks
+            since: The version the client has already seen
+            current: The user's current task version
+            resume: The last entry already returned from version since + 1
+
+        Returns:
+            tuple: Latest op keyed by task id, the version covered, the
+                entry to resume after within the next version, and whether
+                more entries remain
+
+        Raises:
+            ResyncRequiredError: If entries after since are no longer retained
+        """
+        owner = ObjectId(user_id)
+        if since > current or (since == current and resume is not None):
+            raise ResyncRequiredError("Sync token is ahead of the current version")
+        if since == current:
+            return {}, since, None, False
+
+        grace = timedelta(seconds=settings.change_log_gap_grace_seconds)
+        now = datetime.utcnow()
+
+        first = await cls.collection().find_one(
+            {"user_id": owner, "seq": {"$gt": since}},
+            {"seq": 1, "at": 1},
+            sort=[("seq", 1)]
+        )
+        if first is None:
+            raise ResyncRequiredError("Change log no longer covers this token")
+        if first["seq"] != since + 1:
+            if resume is not None or now - first["at"] >= grace:
+                raise ResyncRequiredError("Change log no longer covers this token")
+            return {}, since, None, True
+
+        query = {"user_id": owner, "seq": {"$gt": since}}
+        if resume is not None:
+            query["$or"] = [{"seq": {"$gt": since + 1}}, {"seq": since + 1, "_id": {"$gt": resume}}]
+        max_entries = settings.change_sync_max_entries
+        cursor = cls.collection().find(
+            query,
+            {"seq": 1, "task_id": 1, "op": 1, "at": 1}
+        ).sort([("seq", 1), ("_id", 1)]).limit(max_entries + 1)
+        entries = [entry async for entry in cursor]
+
+        has_more = len(entries) > max_entries
+        if has_more:
+            entries = entries[:max_entries]
+            # Never split the entries of one write across two responses,
+            # unless they do not fit in one
+            last_seq = entries[-1]["seq"]
+            trimmed = [entry for entry in entries if entry["seq"] != last_seq]
+            if not trimmed:
+                return {entry["task_id"]: entry["op"] for entry in entries}, since, entries[-1]["_id"], True
+            entries = trimmed
+
+        latest: dict[ObjectId, str] = {}
+        covered = since
+        for entry in entries:
+            if entry["seq"] > covered + 1 and now - entry["at"] < grace:
+                has_more = True
+                break
+            latest[entry["task_id"]] = entry["op"]
+            covered = entry["seq"]
+        return latest, covered, None, has_more
@@ -0,0 +1,221 @@
+"""
+Write Coalescing Module
+
+This module groups task updates into bulk writes (group commit):
+- Updates are queued and flushed after a short window, or as soon as
+  a batch is full
+- Repeated updates to the same task in a batch are merged into one
+  write; each caller still gets the task as of its own update
+- A batch costs one read of the current documents, one bulk write and
+  one change log entry per user, instead of a write and a change log
+  entry per request
+- Batches are flushed one at a time, so updates to a task are applied
+  in arrival order; updates arriving during a flush form the next batch
+
+Enabled with settings.write_coalescing_enabled.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from .config import settings
+from .repository import (
+    TaskRepository, TaskNotFoundError, TaskForbiddenError,
+    parse_task_id, serialize_task, utcnow_ms, completed_delta
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingUpdate:
+    task_id: ObjectId
+    user_id: str
+    data: dict
+    future: asyncio.Future
+
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None):
+    # The caller may have gone away (e.g. client disconnected)
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class WriteCoalescer:
+    pending: list[_PendingUpdate] = []
+    wakeup: Optional[asyncio.Event] = None
+    batch_full: Optional[asyncio.Event] = None
+    flush_task: Optional[asyncio.Task] = None
+    stopping: bool = False
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls.flush_task is None or cls.flush_task.done():
+            cls.stopping = False
+            cls.wakeup = asyncio.Event()
+            cls.batch_full = asyncio.Event()
+            cls.flush_task = asyncio.create_task(cls._flush_loop())
+
+    @classmethod
+    async def update(cls, task_id: str, user_id: str, data: dict) -> dict:
+        """
+        Queue an update of a task owned by the user and wait for it to be written.
+
+        Args:
+            task_id: The task to update
+            user_id: The user making the change
+            data: The fields to set
+
+        Returns:
+            dict: The serialized task as of this update
+
+        Raises:
+            TaskNotFoundError: If the task does not exist
+            TaskForbiddenError: If the task belongs to another user
+        """
+        oid = parse_task_id(task_id)
+        if oid is None:
+            raise TaskNotFoundError("Task not found")
+
+        try:
+            return await cls._enqueue(oid, user_id, data)
+        except TaskNotFoundError:
+            # Archived tasks are moved back before they are changed
+            await TaskRepository._restore(await TaskRepository._find_archived(oid, user_id), user_id)
+        return await cls._enqueue(oid, user_id, data)
+
+    @classmethod
+    async def _enqueue(cls, oid: ObjectId, user_id: str, data: dict) -> dict:
+        cls._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        cls.pending.append(_PendingUpdate(oid, user_id, data, future))
+        cls.wakeup.set()
+        if len(cls.pending) >= settings.write_coalescing_max_ops:
+            cls.batch_full.set()
+        return await future
+
+    @classmethod
+    async def _flush_loop(cls):
+        while True:
+            await cls.wakeup.wait()
+            if not cls.batch_full.is_set() and not cls.stopping:
+                try:
+                    await asyncio.wait_for(cls.batch_full.wait(), settings.write_coalescing_window_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            await cls._flush_pending()
+            if cls.stopping and not cls.pending:
+                return
+
+    @classmethod
+    async def _flush_pending(cls):
+        max_ops = settings.write_coalescing_max_ops
+        batch, cls.pending = cls.pending[:max_ops], cls.pending[max_ops:]
+        cls.batch_full.clear()
+        if len(cls.pending) >= max_ops:
+            cls.batch_full.set()
+        if not cls.pending:
+            cls.wakeup.clear()
+        if not batch:
+            return
+        try:
+            await cls._flush(batch)
+        except Exception as e:
+            logger.error("❌ Error flushing coalesced task updates: %s", e)
+            for item in batch:
+                _resolve(item.future, error=e)
+
+    @classmethod
+    async def _flush(cls, batch: list[_PendingUpdate]):
+        """Write one batch of updates and resolve each caller's future."""
+        collection = TaskRepository.collection()
+
+        # Updates grouped per task and owner, in arrival order
+        groups: dict[tuple[ObjectId, str], list[_PendingUpdate]] = {}
+        for item in batch:
+            groups.setdefault((item.task_id, item.user_id), []).append(item)
+
+        task_ids = list({task_id for task_id, _ in groups})
+        cursor = collection.find({"_id": {"$in": task_ids}})
+        current = {doc["_id"]: doc async for doc in cursor}
+
+        now = utcnow_ms()
+        operations = []
+        applied = []
+        for (task_id, user_id), items in groups.items():
+            doc = current.get(task_id)
+            if doc is None or str(doc["user_id"]) != user_id:
+                if doc is None:
+                    error = TaskNotFoundError("Task not found")
+                else:
+                    error = TaskForbiddenError("Task belongs to another user")
+                for item in items:
+                    _resolve(item.future, error=error)
+                continue
+            merged = {}
+            for item in items:
+                merged.update(item.data)
+            operations.append(UpdateOne(
+                {"_id": task_id, "user_id": ObjectId(user_id)},
+                {"$set": {**merged, "updated_at": now}}
+            ))
+            applied.append((task_id, user_id, items, doc, merged))
+
+        if not operations:
+            return
+        details, errors = await TaskRepository._bulk_write(operations)
+
+        # Tasks deleted between the read and the write matched nothing
+        existing = None
+        if details["nMatched"] + len(errors) < len(operations):
+            cursor = collection.find({"_id": {"$in": [entry[0] for entry in applied]}}, {"_id": 1})
+            existing = {doc["_id"] async for doc in cursor}
+
+        per_user: dict[str, tuple[dict, int, list]] = {}
+        for op_index, (task_id, user_id, items, doc, merged) in enumerate(applied):
+            if op_index in errors:
+                for item in items:
+                    _resolve(item.future, error=RuntimeError(errors[op_index]))
+                continue
+            if existing is not None and task_id not in existing:
+                for item in items:
+                    _resolve(item.future, error=TaskNotFoundError("Task not found"))
+                continue
+
+            changes, completed, results = per_user.setdefault(user_id, ({}, 0, []))
+            changes[task_id] = merged
+            completed += completed_delta(doc, {**doc, **merged})
+            per_user[user_id] = (changes, completed, results)
+
+            state = dict(doc)
+            for item in items:
+                state.update(item.data)
+                state["updated_at"] = now
+                results.append((item, serialize_task(dict(state))))
+
+        for user_id, (changes, completed, results) in per_user.items():
+            try:
+                await TaskRepository._after_upsert(user_id, changes, {"completed": completed})
+            except Exception as e:
+                for item, _ in results:
+                    _resolve(item.future, error=e)
+                continue
+            for item, result in results:
+                _resolve(item.future, result)
+
+    @classmethod
+    async def stop(cls):
+        """Flush queued updates and stop the flush loop."""
+        if cls.flush_task is None:
+            return
+        cls.stopping = True
+        cls.wakeup.set()
+        await cls.flush_task
+        cls.flush_task = None
@@ -0,0 +1,240 @@
+"""
+Compression Module
+
+This module compresses responses as ASGI middleware:
+- Encoding negotiated from Accept-Encoding: zstd and brotli when their
+  libraries are installed, gzip always
+- Per-route rules (Settings.compression_routes) to disable compression
+  or change the minimum body size
+- Only compressible media types; event streams are never compressed
+- Streaming responses are compressed chunk by chunk, flushing after
+  each chunk so clients receive data as it is produced
+"""
+
+import gzip
+import importlib.util
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+from .config import settings, CompressionRule
+
+
+class _Encoder(ABC):
+    """One-shot and streaming compression for a content coding."""
+    name = ""
+
+    def __init__(self, level: int):
+        self.level = level
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress a whole body."""
+
+    @abstractmethod
+    def stream(self) -> "_Stream":
+        """Start compressing a body chunk by chunk."""
+
+
+class _Stream:
+    def __init__(self, process, finish):
+        self.process = process
+        self.finish = finish
+
+
+class GzipEncoder(_Encoder):
+    name = "gzip"
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self) -> _Stream:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return _Stream(
+            lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush
+        )
+
+
+class BrotliEncoder(_Encoder):
+    name = "br"
+
+    def compress(self, data: bytes) -> bytes:
+        import brotli
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self) -> _Stream:
+        import brotli
+        compressor = brotli.Compressor(quality=self.level)
+        return _Stream(lambda data: compressor.process(data) + compressor.flush(), compressor.finish)
+
+
+class ZstdEncoder(_Encoder):
+    name = "zstd"
+
+    def compress(self, data: bytes) -> bytes:
+        import zstandard
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self) -> _Stream:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return _Stream(
+            lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush
+        )
+
+
+# Content codings and the module each one needs
+ENCODERS = {
+    "zstd": (ZstdEncoder, "zstandard"),
+    "br": (BrotliEncoder, "brotli"),
+    "gzip": (GzipEncoder, None),
+}
+
+
+def available_encoders() -> dict[str, _Encoder]:
+    """
+    Configured encoders whose libraries are installed, in server preference order.
+
+    Returns:
+        dict: Content coding to encoder
+    """
+    encoders = {}
+    for name in settings.compression_encodings:
+        if name not in ENCODERS:
+            continue
+        encoder_class, module = ENCODERS[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            encoders[name] = encoder_class(settings.compression_levels.get(name, 6))
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    Parse an Accept-Encoding header into codings and their q-values.
+
+    Args:
+        header: The header value
+
+    Returns:
+        dict: Lower-cased coding to q-value
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def route_rule(path: str) -> CompressionRule:
+    """The compression rule of the longest configured path prefix matching path."""
+    best, best_length = None, -1
+    for prefix, rule in settings.compression_routes.items():
+        if (path == prefix or path.startswith(prefix.rstrip("/") + "/")) and len(prefix) > best_length:
+            best, best_length = rule, len(prefix)
+    return best or CompressionRule(min_size=settings.compression_min_size)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the negotiated encoding."""
+
+    def __init__(self, app):
+        self.app = app
+        self.encoders = available_encoders()
+
+    def _negotiate(self, scope) -> Optional[_Encoder]:
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accepted = parse_accept_encoding(value.decode("latin-1"))
+                wildcard = accepted.get("*", 0.0)
+                # Highest client q-value wins; ties go to server preference
+                best, best_q = None, 0.0
+                for coding, encoder in self.encoders.items():
+                    q = accepted.get(coding, wildcard)
+                    if q > best_q:
+                        best, best_q = encoder, q
+                return best
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        rule = route_rule(scope["path"])
+        encoder = self._negotiate(scope) if rule.enabled else None
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                media_type = headers.get(b"content-type", b"").split(b";")[0].strip().decode("latin-1")
+                if (
+                    message["status"] in (204, 304)
+                    or b"content-encoding" in headers
+                    or media_type not in settings.compression_media_types
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether to compress
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is None and start_message is not None:
+                start, start_message = start_message, None
+                headers = [
+                    (name, value) for name, value in start.get("headers", [])
+                    if name.lower() != b"content-length"
+                ]
+                headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body:
+                    if len(body) < rule.min_size:
+                        passthrough = True
+                        headers.append((b"content-length", str(len(body)).encode()))
+                        await send({**start, "headers": headers})
+                        await send(message)
+                        return
+                    compressed = encoder.compress(body)
+                    headers.append((b"content-encoding", encoder.name.encode()))
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                stream = encoder.stream()
+                headers.append((b"content-encoding", encoder.name.encode()))
+                await send({**start, "headers": headers})
+
+            chunk = stream.process(body) if body else b""
+            if not more_body:
+                chunk += stream.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
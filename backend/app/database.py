@@ -4,82 +4,262 @@ Database Module
 This module handles all database-related operations including:
 - Database connection management
 - Collection initialization
-- Index creation
+- Index creation, and the index key patterns found at startup, so
+  queries only hint indexes that exist
+- Pluggable storage backends: MongoDB through Motor, or the in-memory
+  engine of app.memory_store, selected by Settings.storage_backend
 """
 
+from abc import ABC, abstractmethod
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .memory_store import MemoryClient
+import asyncio
+import importlib.util
 import logging
+from typing import Any, Optional
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from bson.objectid import ObjectId
+from .metrics import mongo_event_listeners
 
 logger = logging.getLogger(__name__)
 
+# Collections whose listings are hinted (see app.repository)
+HINTED_COLLECTIONS = ("tasks", "tasks_archive")
+
+# Modules wire compressors need beyond the standard library
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def available_compressors() -> list[str]:
+    """
+    Configured wire compressors whose libraries are installed.
+
+    Returns:
+        list: Compressor names in preference order
+    """
+    compressors = []
+    for name in (c.strip() for c in settings.mongo_compressors.split(",")):
+        if name not in _COMPRESSOR_MODULES:
+            if name:
+                logger.warning("⚠️ Unknown MongoDB compressor %r ignored", name)
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            compressors.append(name)
+    return compressors
+
+
+def client_options() -> dict:
+    """
+    Connection pool, compression, timeout and retry options for the client.
+
+    Returns:
+        dict: Keyword arguments for AsyncIOMotorClient
+    """
+    pool_size = settings.worker_pool_size()
+    options = {
+        "maxPoolSize": pool_size,
+        "minPoolSize": min(settings.mongo_min_pool_size, pool_size),
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "retryWrites": settings.mongo_retry_writes,
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+        if "zlib" in compressors:
+            options["zlibCompressionLevel"] = settings.mongo_zlib_compression_level
+    return options
+
+class StorageBackend(ABC):
+    """Interface for the storage engines behind Database."""
+    # Whether the store starts empty on every connect, so there is nothing
+    # to migrate and its indexes are created right away
+    ephemeral = False
+
+    @abstractmethod
+    def create_client(self) -> Any:
+        """Create a client whose databases are looked up by name, like AsyncIOMotorClient."""
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Short description for the connection log line."""
+
+
+class MongoStorage(StorageBackend):
+    """MongoDB through Motor, with the options of client_options."""
+
+    def __init__(self):
+        self.options = client_options()
+
+    def create_client(self) -> AsyncIOMotorClient:
+        return AsyncIOMotorClient(
+            settings.mongodb_url,
+            event_listeners=mongo_event_listeners(),
+            **self.options
+        )
+
+    def describe(self) -> str:
+        return (
+            f"MongoDB (pool {self.options['minPoolSize']}-{self.options['maxPoolSize']}, "
+            f"compressors: {self.options.get('compressors', 'none')})"
+        )
+
+
+class MemoryStorage(StorageBackend):
+    """Process-local in-memory engine; every worker has its own data."""
+    ephemeral = True
+
+    def create_client(self) -> MemoryClient:
+        return MemoryClient(event_listeners=mongo_event_listeners())
+
+    def describe(self) -> str:
+        return "in-memory storage"
+
+
+# Available storage backends, selected by Settings.storage_backend
+STORAGE_BACKENDS = {
+    "mongo": MongoStorage,
+    "memory": MemoryStorage,
+}
+
+
+def get_storage_backend() -> StorageBackend:
+    """
+    Create the configured storage backend.
+
+    Returns:
+        StorageBackend: The backend named by Settings.storage_backend
+
+    Raises:
+        ValueError: If Settings.storage_backend names an unknown backend
+    """
+    try:
+        return STORAGE_BACKENDS[settings.storage_backend]()
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+
 class Database:
-    client: AsyncIOMotorClient = None
+    client: Any = None
     db = None
+    index_check_task: Optional[asyncio.Task] = None
+    # Collection -> key patterns of its indexes, read once after connecting
+    index_keys: dict[str, set[tuple]] = {}
     
     @classmethod
-    async def connect_to_database(cls):
+    async def connect_to_database(cls, check_indexes: bool = True):
         """
         Create database connection and verify it.
         
+        Index creation is left to `python -m app.migrate`, so a worker
+        only reads and checks its indexes in the background once it is
+        serving; until then, queries are not hinted. An ephemeral backend
+        starts empty and gets its indexes right away.
+        
+        Args:
+            check_indexes: Whether to start the background index check
+            
         Raises:
+            ValueError: If the configured storage backend is unknown
             ConnectionFailure: If connection to MongoDB fails
             ServerSelectionTimeoutError: If MongoDB server is unreachable
         """
         try:
-            cls.client = AsyncIOMotorClient(settings.mongodb_url)
+            cls.index_keys = {}
+            backend = get_storage_backend()
+            cls.client = backend.create_client()
             cls.db = cls.client[settings.database_name]
             await cls.db.command("ping")
-            logger.info("✅ Connected to MongoDB")
+            logger.info("✅ Connected to %s", backend.describe())
             
-            # Create indexes
-            await cls.create_indexes()
+            if settings.auto_create_indexes or backend.ephemeral:
+                await cls.create_indexes()
+            elif check_indexes:
+                cls.index_check_task = asyncio.create_task(cls._check_indexes())
             
         except Exception as e:
-            logger.error(f"❌ Failed to connect to MongoDB: {str(e)}")
+            logger.error("❌ Failed to connect to the database: %s", e)
             raise e
 
     @classmethod
     async def close_database_connection(cls):
         """Close database connection safely."""
         try:
+            if cls.index_check_task is not None:
+                cls.index_check_task.cancel()
+                cls.index_check_task = None
             if cls.client:
                 cls.client.close()
-                logger.info("✅ Successfully closed MongoDB connection")
+                logger.info("✅ Successfully closed the database connection")
         except Exception as e:
-            logger.error(f"❌ Error closing MongoDB connection: {str(e)}")
+            logger.error("❌ Error closing MongoDB connection: %s", e)
             raise
 
     @classmethod
     async def create_indexes(cls):
         """
-        Create database indexes for optimization.
+        Create the declared database indexes (see app.migrate).
         
-        Creates:
-            - Unique index on users.email
-            - Index on tasks.user_id
-            - Compound index on tasks for filtering
+        Normally run by `python -m app.migrate` at deploy time; workers only
+        call this when settings.auto_create_indexes is enabled.
         """
+        from .migrate import apply_indexes
         try:
-            # Create unique index for email in users collection
-            await cls.db.users.create_index("email", unique=True)
-            
-            # Create index for user_id in tasks collection
-            await cls.db.tasks.create_index("user_id")
-            
-            # Create compound index for task filtering
-            await cls.db.tasks.create_index([
-                ("user_id", 1),
-                ("completed", 1),
-                ("due_date", 1)
-            ])
-            
-            logger.info("✅ Database indexes created successfully")
+            await apply_indexes()
         except Exception as e:
-            logger.error(f"❌ Failed to create database indexes: {str(e)}")
+            logger.error("❌ Failed to create database indexes: %s", e)
             raise
+        await cls.load_index_keys()
+
+    @classmethod
+    async def load_index_keys(cls):
+        """Record the key patterns of the hinted collections' indexes."""
+        index_keys = {}
+        for collection in HINTED_COLLECTIONS:
+            info = await cls.db[collection].index_information()
+            index_keys[collection] = {
+                tuple((field, direction) for field, direction in index["key"]) for index in info.values()
+            }
+        cls.index_keys = index_keys
+
+    @classmethod
+    def has_index(cls, collection: str, keys: list[tuple[str, Any]]) -> bool:
+        """
+        Tell whether an index with this key pattern was found after connecting.
+
+        Args:
+            collection: The collection name
+            keys: The index key pattern
+
+        Returns:
+            bool: False until the indexes have been read, or if it is missing
+        """
+        return tuple(keys) in cls.index_keys.get(collection, ())
+
+    @classmethod
+    async def _check_indexes(cls):
+        """Read the index keys, then warn about drift and pending migrations without affecting the worker."""
+        from .migrate import pending_migrations, verify_indexes
+        try:
+            await cls.load_index_keys()
+        except Exception as e:
+            logger.warning("⚠️ Could not read database indexes, queries will not be hinted: %s", e)
+        if not settings.verify_indexes_on_startup:
+            return
+        try:
+            drift = await verify_indexes()
+            pending = await pending_migrations()
+        except Exception as e:
+            logger.warning("⚠️ Could not verify database indexes: %s", e)
+            return
+        for message in drift:
+            logger.warning("⚠️ Index drift: %s", message)
+        for migration in pending:
+            logger.warning("⚠️ Pending migration %s: %s", migration.version, migration.description)
+        if drift or pending:
+            logger.warning("⚠️ Run `python -m app.migrate` to apply the declared indexes and migrations")
 
     @classmethod
     def get_db(cls):
@@ -87,7 +267,7 @@ class Database:
         Get database client instance.
         
         Returns:
-            AsyncIOMotorClient: MongoDB database instance
+            The database of the configured storage backend
             
         Raises:
             ConnectionError: If database client is not initialized
@@ -96,29 +276,3 @@ class Database:
             logger.error("❌ Database client not initialized")
             raise ConnectionError("Database client not initialized")
         return cls.db
-
-    @classmethod
-    async def verify_task_ownership(cls, task_id: str, user_id: str) -> bool:
-        """
-        Verify if a task belongs to a specific user.
-        
-        Args:
-            task_id: The ID of the task to verify
-            user_id: The ID of the user to check against
-            
-        Returns:
-            bool: True if the task belongs to the user, False otherwise
-            
-        Raises:
-            ValueError: If task_id is invalid
-        """
-        try:
-            db = cls.get_db()
-            task = await db.tasks.find_one({
-                "_id": ObjectId(task_id),
-                "user_id": ObjectId(user_id)
-            })
-            return task is not None
-        except Exception as e:
-            logger.error(f"❌ Error verifying task ownership: {str(e)}")
-            return False 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Drain Module
+
+This module tracks whether the process is shutting down:
+- /health reports 503 while draining so load balancers stop routing here
+- Open event streams are closed so in-flight requests can finish within
+  the graceful shutdown timeout
+- New event streams are refused
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from .pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+
+class Drain:
+    draining: bool = False
+    task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def begin(cls):
+        """
+        Start draining. Must be called from the event loop thread.
+
+        Safe to call more than once; only the first call has an effect.
+        """
+        if cls.draining:
+            return
+        cls.draining = True
+        logger.info("⏳ Draining: closing event streams and finishing in-flight requests")
+        # Streams never finish on their own, so they would otherwise hold
+        # the shutdown until the graceful timeout expires
+        cls.task = asyncio.get_running_loop().create_task(get_broker().stop())
@@ -0,0 +1,112 @@
+"""
+Export Module
+
+This module serializes task streams for the export endpoint:
+- NDJSON, one JSON object per line
+- CSV with a header row
+
+Each task is serialized as soon as it arrives from the database cursor,
+so memory use does not depend on how many tasks are exported. Rows are
+sent in chunks of about EXPORT_CHUNK_BYTES: the compression middleware
+flushes its encoder once per chunk, which per row would cost both
+compression ratio and CPU.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+# Exported fields, in output order
+EXPORT_FIELDS = (
+    "_id", "user_id", "title", "description", "due_date",
+    "created_at", "updated_at", "completed", "archived_at"
+)
+
+# Serialized rows are sent once this many characters are buffered
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _export_row(task: dict) -> dict:
+    row = {field: _export_value(task.get(field)) for field in EXPORT_FIELDS}
+    row["_id"] = str(row["_id"])
+    row["user_id"] = str(row["user_id"])
+    return row
+
+
+async def _chunks(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Join serialized rows into chunks of about EXPORT_CHUNK_BYTES."""
+    chunk = []
+    size = 0
+    async for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+async def _ndjson_rows(tasks: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for task in tasks:
+        yield json.dumps(_export_row(task), separators=(",", ":")) + "\n"
+
+
+def ndjson_lines(tasks: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Serialize tasks as newline-delimited JSON.
+
+    Args:
+        tasks: Raw task documents
+
+    Returns:
+        AsyncIterator: Chunks of whole JSON lines, one line per task
+    """
+    return _chunks(_ndjson_rows(tasks))
+
+
+async def _csv_rows(tasks: AsyncIterator[dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    async for task in tasks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(_export_row(task))
+        yield buffer.getvalue()
+
+
+def csv_lines(tasks: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Serialize tasks as CSV, starting with a header row.
+
+    Args:
+        tasks: Raw task documents
+
+    Returns:
+        AsyncIterator: Chunks of whole CSV rows, the header first
+    """
+    return _chunks(_csv_rows(tasks))
+
+
+SERIALIZERS = {
+    "ndjson": ndjson_lines,
+    "csv": csv_lines
+}
@@ -0,0 +1,133 @@
+"""
+Task Filters Module
+
+This module turns task listing filters into MongoDB queries and picks
+the index each listing runs on:
+- Completion status, due-date ranges, overdue, no due date, and
+  created/updated ranges
+- Ranges are applied while walking the (user_id, [completed,] <sort
+  field>, _id) index in sort order, so no filter combination needs a
+  collection scan or an in-memory sort (see benchmarks/explain.py)
+"""
+
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Optional
+
+
+class InvalidFilterError(ValueError):
+    """Raised when task filters contradict each other."""
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored times are naive UTC
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _range(after: Optional[datetime], before: Optional[datetime]) -> dict:
+    bounds = {}
+    if after is not None:
+        bounds["$gte"] = after
+    if before is not None:
+        bounds["$lt"] = before
+    return bounds
+
+
+@dataclass
+class TaskFilters:
+    """Filters of a task listing; None means not filtered."""
+    completed: Optional[bool] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+    overdue: bool = False
+    no_due_date: bool = False
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+
+    def __post_init__(self):
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, datetime):
+                setattr(self, field.name, _naive_utc(value))
+
+    def validate(self):
+        """
+        Reject contradictory filters.
+
+        Raises:
+            InvalidFilterError: If the filters cannot match anything by construction
+        """
+        if self.no_due_date and (self.overdue or self.due_after or self.due_before):
+            raise InvalidFilterError("no_due_date cannot be combined with due-date filters")
+        if self.overdue and self.completed:
+            raise InvalidFilterError("overdue cannot be combined with completed=true")
+        for name, after, before in (
+            ("due", self.due_after, self.due_before),
+            ("created", self.created_after, self.created_before),
+            ("updated", self.updated_after, self.updated_before),
+        ):
+            if after is not None and before is not None and after >= before:
+                raise InvalidFilterError(f"{name}_after must be earlier than {name}_before")
+
+    @property
+    def time_dependent(self) -> bool:
+        """Whether results change with time alone, so they cannot be cached by version."""
+        return self.overdue
+
+    def is_set(self) -> bool:
+        return any(getattr(self, field.name) not in (None, False) for field in fields(self))
+
+    def query(self, now: Optional[datetime] = None) -> dict:
+        """
+        Build the MongoDB filter, without the owner.
+
+        Args:
+            now: Reference time for overdue, defaults to the current UTC time
+
+        Returns:
+            dict: Query conditions
+        """
+        query = {}
+        if self.completed is not None:
+            query["completed"] = self.completed
+
+        due = _range(self.due_after, self.due_before)
+        if self.overdue:
+            query["completed"] = False
+            now = now or datetime.utcnow()
+            due["$lt"] = min(due.get("$lt", now), now)
+        if due:
+            query["due_date"] = due
+        elif self.no_due_date:
+            # Matches both null and missing
+            query["due_date"] = None
+
+        created = _range(self.created_after, self.created_before)
+        if created:
+            query["created_at"] = created
+        updated = _range(self.updated_after, self.updated_before)
+        if updated:
+            query["updated_at"] = updated
+        return query
+
+
+def listing_index(sort: str, by_completed: bool, archive: bool = False) -> list[tuple[str, int]]:
+    """
+    Key pattern of the index a listing walks.
+
+    Args:
+        sort: The sort field
+        by_completed: Whether the query filters on completed
+        archive: Whether the listing reads the archive, whose tasks are
+            all completed and which has no completed indexes
+
+    Returns:
+        list: Index key pattern, usable as a hint
+    """
+    if by_completed and not archive:
+        return [("user_id", 1), ("completed", 1), (sort, 1), ("_id", 1)]
+    return [("user_id", 1), (sort, 1), ("_id", 1)]
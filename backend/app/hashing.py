@@ -0,0 +1,97 @@
+"""
+Password Hashing Module
+
+This module runs bcrypt hashing and verification off the event loop:
+- Bounded thread pool for the CPU-heavy bcrypt work
+- Admission limit so bursts fail fast instead of queueing indefinitely
+- Queue depth reporting
+
+bcrypt releases the GIL while hashing, so a thread pool gives real
+parallelism without the pickling overhead of a process pool.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from .config import settings
+from .metrics import password_hash_duration
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Any:
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, func.__name__)
+
+
+class HashingSaturatedError(RuntimeError):
+    """Raised when the password hashing pool cannot accept more work."""
+
+
+class PasswordHasher:
+    executor: Optional[ThreadPoolExecutor] = None
+    # Jobs submitted and not yet finished. Only touched from the event loop
+    # thread, so no lock is needed.
+    pending: int = 0
+
+    @classmethod
+    def start(cls):
+        """Create the worker pool if it does not exist yet."""
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=settings.password_hash_workers,
+                thread_name_prefix="pwd-hash"
+            )
+            logger.info("✅ Password hashing pool started with %s workers", settings.password_hash_workers)
+
+    @classmethod
+    def shutdown(cls):
+        """Shut down the worker pool, waiting for running jobs to finish."""
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=True)
+            cls.executor = None
+            logger.info("✅ Password hashing pool stopped")
+
+    @classmethod
+    def queue_depth(cls) -> int:
+        """
+        Number of jobs waiting for a free worker.
+
+        Returns:
+            int: Jobs submitted beyond the number of workers
+        """
+        return max(0, cls.pending - settings.password_hash_workers)
+
+    @classmethod
+    async def run(cls, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a hashing function on the worker pool.
+
+        Args:
+            func: The blocking function to run
+            *args: Positional arguments for func
+
+        Returns:
+            Any: The result of func
+
+        Raises:
+            HashingSaturatedError: If the pool and its queue are full
+        """
+        if cls.executor is None:
+            cls.start()
+
+        capacity = settings.password_hash_workers + settings.password_hash_queue_limit
+        if cls.pending >= capacity:
+            raise HashingSaturatedError("Password hashing pool is saturated")
+
+        cls.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(cls.executor, _timed, func, *args)
+        finally:
+            cls.pending -= 1
@@ -0,0 +1,262 @@
+"""
+Idempotency Module
+
+This module makes retried task writes safe with the Idempotency-Key
+request header:
+- The first request with a key runs and its response is stored in the
+  idempotency_keys collection, expired by a TTL index
+- Repeats with the same key get the stored response back, marked with
+  Idempotent-Replayed, without running the endpoint again; recent
+  responses are served from an in-process LRU cache
+- Concurrent duplicates in the same worker wait for the first request,
+  and one of them runs instead if it is cancelled; in other workers they
+  get 409 until it finishes
+- Keys are scoped per user, and reusing a key for a different request
+  is rejected with 422
+- Failed requests are not stored, so they can be retried with the same key
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+from bson import Binary
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
+from .config import settings
+from .database import Database
+from .metrics import idempotent_requests
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when a key's first request is still running in another worker."""
+
+
+def request_fingerprint(operation: str, body: Any = None) -> str:
+    """
+    Hash of what a request does, to detect a key reused for another request.
+
+    Args:
+        operation: Method and path, e.g. "PUT /tasks/<id>"
+        body: The validated request body, if any
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps([operation, jsonable_encoder(body)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(record: dict) -> Response:
+    return Response(
+        content=bytes(record["body"]),
+        status_code=record["status"],
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+class Idempotency:
+    cache: "OrderedDict[str, dict]" = OrderedDict()
+    in_flight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def collection(cls):
+        return Database.get_db().idempotency_keys
+
+    @classmethod
+    def _cached(cls, record_id: str) -> Optional[dict]:
+        record = cls.cache.get(record_id)
+        if record is None:
+            return None
+        if record["expires_at"] <= datetime.utcnow():
+            del cls.cache[record_id]
+            return None
+        cls.cache.move_to_end(record_id)
+        return record
+
+    @classmethod
+    def _remember(cls, record_id: str, record: dict):
+        cls.cache[record_id] = record
+        cls.cache.move_to_end(record_id)
+        while len(cls.cache) > settings.idempotency_cache_size:
+            cls.cache.popitem(last=False)
+
+    @classmethod
+    async def _claim(cls, record_id: str, fingerprint: str) -> Optional[dict]:
+        """
+        Reserve a key for this request.
+
+        Returns:
+            Optional[dict]: None when the key was reserved, otherwise the
+                completed record stored under it
+
+        Raises:
+            IdempotencyConflictError: If the key's request is still running elsewhere
+        """
+        now = datetime.utcnow()
+        pending = {
+            "fingerprint": fingerprint,
+            "state": "pending",
+            "locked_until": now + timedelta(seconds=settings.idempotency_lock_seconds),
+            "expires_at": now + timedelta(seconds=settings.idempotency_ttl_seconds),
+        }
+        try:
+            await cls.collection().insert_one({"_id": record_id, **pending})
+            return None
+        except DuplicateKeyError:
+            pass
+
+        # A pending record whose lock expired was left by a crashed worker
+        taken = await cls.collection().update_one(
+            {"_id": record_id, "state": "pending", "locked_until": {"$lt": now}},
+            {"$set": pending}
+        )
+        if taken.modified_count:
+            return None
+        record = await cls.collection().find_one({"_id": record_id})
+        if record is None:
+            # Released or expired in the meantime
+            return await cls._claim(record_id, fingerprint)
+        if record["state"] != "done":
+            raise IdempotencyConflictError(record_id)
+        return record
+
+    @classmethod
+    async def _execute(
+        cls,
+        record_id: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+        model: Optional[type[BaseModel]],
+        status_code: int
+    ) -> tuple[dict, bool]:
+        """Run the request once for a key, or fetch its stored outcome."""
+        record = await cls._claim(record_id, fingerprint)
+        if record is not None:
+            return record, True
+
+        try:
+            result = await handler()
+        except BaseException:
+            await cls.collection().delete_one({"_id": record_id, "state": "pending"})
+            raise
+
+        if model is not None:
+            body = model.model_validate(result).model_dump_json(by_alias=True).encode()
+        else:
+            body = json.dumps(jsonable_encoder(result), separators=(",", ":"), ensure_ascii=False).encode()
+        record = {
+            "fingerprint": fingerprint,
+            "state": "done",
+            "status": status_code,
+            "body": Binary(body),
+            "expires_at": datetime.utcnow() + timedelta(seconds=settings.idempotency_ttl_seconds),
+        }
+        await cls.collection().update_one(
+            {"_id": record_id},
+            {"$set": record, "$unset": {"locked_until": ""}}
+        )
+        return record, False
+
+    @classmethod
+    async def run(
+        cls,
+        user_id: str,
+        key: Optional[str],
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+        model: Optional[type[BaseModel]] = None,
+        status_code: int = status.HTTP_200_OK
+    ) -> Any:
+        """
+        Run a write endpoint at most once per Idempotency-Key.
+
+        Args:
+            user_id: The user making the request
+            key: The Idempotency-Key header; without one the handler just runs
+            fingerprint: request_fingerprint of the request
+            handler: Runs the endpoint and returns its result
+            model: Response model used to encode the result
+            status_code: Status code of a successful response
+
+        Returns:
+            The handler's result without a key, otherwise a JSON Response
+            with the stored or new outcome
+
+        Raises:
+            HTTPException: 400 for a malformed key, 409 while the key's
+                request runs in another worker, 422 when the key was used
+                for a different request, or whatever the handler raises
+        """
+        if key is None:
+            return await handler()
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} printable characters"
+            )
+
+        record_id = f"{user_id}:{key}"
+        record = cls._cached(record_id)
+        replayed = record is not None
+        while record is None:
+            future = cls.in_flight.get(record_id)
+            if future is not None:
+                # Same worker: wait for the first request's outcome
+                try:
+                    record = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    # The first request was cancelled and released the key;
+                    # the first waiter to get here runs it instead
+                    continue
+                replayed = True
+            else:
+                future = cls.in_flight[record_id] = asyncio.get_running_loop().create_future()
+                try:
+                    record, replayed = await cls._execute(record_id, fingerprint, handler, model, status_code)
+                    future.set_result(record)
+                except IdempotencyConflictError as e:
+                    idempotent_requests.inc("conflict")
+                    error = HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress",
+                        headers={"Retry-After": "1"}
+                    )
+                    future.set_exception(error)
+                    future.exception()
+                    raise error from e
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                    # Marks the exception retrieved when nobody is waiting
+                    future.exception()
+                    raise
+                finally:
+                    del cls.in_flight[record_id]
+            cls._remember(record_id, record)
+
+        if record["fingerprint"] != fingerprint:
+            idempotent_requests.inc("mismatch")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if replayed:
+            idempotent_requests.inc("replayed")
+            return _replay(record)
+        idempotent_requests.inc("executed")
+        return Response(content=bytes(record["body"]), status_code=record["status"], media_type="application/json")
@@ -0,0 +1,58 @@
+"""
+Lease Module
+
+This module provides named leases for background jobs that must run in
+one worker at a time:
+- A lease is a document in the leases collection holding its owner and
+  expiry; acquiring it is a single conditional upsert
+- The holder renews it by acquiring it again before it expires
+- A crashed holder's lease expires, so another worker takes over
+"""
+
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    """A named, expiring lock shared by all workers."""
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def collection():
+        return Database.get_db().leases
+
+    async def acquire(self) -> bool:
+        """
+        Take or renew the lease.
+
+        Returns:
+            bool: Whether this process holds the lease
+        """
+        now = datetime.utcnow()
+        try:
+            await self.collection().find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + self.ttl}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another process: the filter missed and the upsert collided
+            return False
+
+    async def release(self):
+        """Give the lease up, if this process holds it."""
+        await self.collection().delete_one({"_id": self.name, "owner": self.owner})
@@ -0,0 +1,240 @@
+"""
+Logging Module
+
+This module configures non-blocking, structured logging:
+- Records are put on a bounded queue and written by a QueueListener
+  thread, so formatting and I/O never run on the event loop
+- JSON output (or plain text) carrying the request id of the request
+  that logged the record
+- Per-message-key sampling of repeated warnings and errors, with a
+  count of suppressed records attached to the next one let through
+- Request id middleware that accepts or generates X-Request-ID
+
+Loggers should use lazy %-style arguments (logger.info("x: %s", x)):
+messages are only formatted on the listener thread, and the unformatted
+message is the sampling key.
+"""
+
+import json
+import logging
+import queue
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from .config import settings
+from .metrics import log_records_dropped, log_records_suppressed
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to records, in the logging thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through at most `burst` records per message key and window.
+
+    The key is the logger name, level and unformatted message, so calls
+    that differ only in their arguments share a budget. Records below
+    min_level (including access logs) are never sampled.
+    """
+
+    def __init__(self, burst: int, window_seconds: float, min_level: int = logging.WARNING, max_keys: int = 10_000):
+        super().__init__()
+        self.burst = burst
+        self.window = window_seconds
+        self.min_level = min_level
+        self.max_keys = max_keys
+        # key -> [window start, records in window, suppressed since last emitted]
+        self.windows: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno < self.min_level or record.levelno >= logging.CRITICAL:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        state = self.windows.get(key)
+        if state is None:
+            if len(self.windows) >= self.max_keys:
+                self.windows.clear()
+            state = self.windows[key] = [now, 0, 0]
+        elif now - state[0] >= self.window:
+            state[0] = now
+            state[1] = 0
+
+        if state[1] >= self.burst:
+            state[2] += 1
+            log_records_suppressed.inc(record.name)
+            return False
+
+        state[1] += 1
+        if state[2]:
+            record.suppressed = state[2]
+            state[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands records over unformatted and never blocks.
+
+    The stock prepare() formats the message and traceback in the calling
+    thread; the queue is in-process, so records can be passed as they are
+    and formatted by the listener. When the queue is full, records are
+    dropped and counted instead of blocking the event loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "request_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text format, with the request id and suppressed count when set."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line += f" [request_id={request_id}]"
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            line += f" [{suppressed} similar suppressed]"
+        return line
+
+
+_listener: Optional[QueueListener] = None
+
+
+def _add_filters(handler: logging.Handler) -> logging.Handler:
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(settings.log_sample_burst, settings.log_sample_window_seconds))
+    return handler
+
+
+def _install(handler: logging.Handler):
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+
+def _output_handler() -> logging.Handler:
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+    return output
+
+
+def setup_logging():
+    """
+    Route the root logger through the queue pipeline. Safe to call again.
+
+    With settings.log_async disabled, records are written synchronously
+    by the calling thread instead; filters and formats are the same.
+    """
+    global _listener
+    stop_logging()
+
+    output = _output_handler()
+    if settings.log_async:
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+        _install(_add_filters(handler))
+    else:
+        _install(_add_filters(output))
+    logging.getLogger().setLevel(settings.log_level.upper())
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread.
+
+    Records logged afterwards, e.g. by the server after application
+    shutdown, are written synchronously.
+    """
+    global _listener
+    if _listener is not None:
+        _install(_add_filters(_output_handler()))
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """ASGI middleware that sets the request id for the request's logs."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_PATTERN.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        encoded = request_id.encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", encoded)]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
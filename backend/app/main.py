@@ -1,27 +1,53 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import timedelta, datetime
 from bson import ObjectId
 from .config import settings
-from .schemas import UserCreate, User, Task, TaskCreate, Token
-from .auth import get_password_hash, verify_password, create_access_token, get_current_user
+from .schemas import (
+    UserCreate, User, Task, TaskCreate, TaskUpdate, Token, RefreshRequest,
+    TaskBulkCreate, TaskBulkUpdate, TaskBulkDelete, BulkResult, TaskChanges,
+    TaskStatistics, TASK_SELECTABLE_FIELDS, parse_task_fields
+)
+from .auth import (
+    get_password_hash_async, verify_password_async, create_access_token,
+    create_refresh_token, decode_token, user_claims, get_current_user, get_stream_user
+)
+from .revocation import RevocationList
+from .pagination import TASK_SORT_FIELDS, InvalidCursorError
+from .filters import TaskFilters
+from .repository import TaskRepository, TaskNotFoundError, TaskForbiddenError
+from .users import UserRepository
+from .export import SERIALIZERS, MEDIA_TYPES
+from .responses import TaskListResponse
+from .versions import TaskVersion, task_list_etag, etag_matches
+from .pubsub import CLOSE, get_broker
+from .stats import TaskStats
+from .ratelimit import RateLimitMiddleware
+from .metrics import MetricsMiddleware, render_metrics
+from .changes import ChangeLog, InvalidSyncTokenError, ResyncRequiredError, format_sync_token, parse_sync_token
+from jose import JWTError
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Literal
 from .database import Database
+from .hashing import PasswordHasher
+from .drain import Drain
+from .coalesce import WriteCoalescer
+from .archive import TaskArchiver
+from .idempotency import Idempotency, request_fingerprint
+from .reminders import ReminderScheduler
+from .compression import CompressionMiddleware
+from .logs import RequestIdMiddleware, setup_logging, stop_logging
 from pymongo.errors import DuplicateKeyError, OperationFailure
-import traceback
+import json
 from fastapi.exceptions import RequestValidationError
 from fastapi.encoders import jsonable_encoder
 
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI application with metadata
@@ -44,6 +70,14 @@ app = FastAPI(
     ]
 )
 
+# Compress responses; innermost, so the other middleware see the
+# uncompressed response and the metrics include compression time
+app.add_middleware(CompressionMiddleware)
+
+# Configure admission control; added before CORS so rejections still
+# carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -51,23 +85,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Request-ID", "Idempotent-Replayed"],
 )
 
+# Record request metrics; added after admission control so it also
+# counts rejected requests
+app.add_middleware(MetricsMiddleware)
+
+# Tag every request's log records with its id; outermost so logs from
+# all other middleware carry it
+app.add_middleware(RequestIdMiddleware)
+
 
 @app.get("/health", include_in_schema=False)
 async def health():
-    return {"status": "OK"}
+    if Drain.draining:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "DRAINING"})
+    return {
+        "status": "OK",
+        "password_hash_queue_depth": PasswordHasher.queue_depth()
+    }
+
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def metrics():
+    """Expose metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 @app.on_event("startup")
 async def startup_db_client():
     """Initialize database connection."""
     await Database.connect_to_database()
+    PasswordHasher.start()
+    RevocationList.start()
+    await get_broker().start()
+    TaskStats.start()
+    TaskArchiver.start()
+    ReminderScheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection."""
+    await TaskStats.stop()
+    await TaskArchiver.stop()
+    await ReminderScheduler.stop()
+    await WriteCoalescer.stop()
+    await get_broker().stop()
+    await RevocationList.stop()
     await Database.close_database_connection()
+    PasswordHasher.shutdown()
+    stop_logging()
 
 @app.get("/", include_in_schema=False)
 async def root():
@@ -88,19 +156,20 @@ async def root():
 async def signup(user: UserCreate):
     """Register a new user."""
     try:
-        logger.info(f"Attempting to register new user: {user.email}")
-        db = Database.get_db()
+        logger.info("Attempting to register new user: %s", user.email)
         
         # Create new user with hashed password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         user_dict = user.model_dump(exclude={"password"})
         user_dict.update({
             "password": hashed_password,
             "_id": str(ObjectId()),  # Convert to string inmediately
-            "created_at": datetime.utcnow()
+            "created_at": datetime.utcnow(),
+            "tasks_version": 0,
+            "task_counts": {"total": 0, "completed": 0}
         })
         
-        await db.users.insert_one(user_dict)
+        await UserRepository.create(user_dict)
         
         # Return user without password
         created_user = {
@@ -109,18 +178,19 @@ async def signup(user: UserCreate):
             "email": user_dict["email"]
         }
             
-        logger.info(f"✅ Successfully registered user: {user.email}")
+        logger.info("✅ Successfully registered user: %s", user.email)
         return created_user
 
+    except HTTPException:
+        raise
     except DuplicateKeyError:
-        logger.warning(f"❌ Registration failed: Email already exists: {user.email}")
+        logger.warning("❌ Registration failed: Email already exists: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     except Exception as e:
-        logger.error(f"❌ Unexpected error during registration: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.error("❌ Unexpected error during registration: %s", e, exc_info=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error during registration"
@@ -142,8 +212,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     Raises:
         HTTPException: If credentials are invalid
     """
-    user = await Database.get_db().users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["password"]):
+    user = await UserRepository.get_by_email(form_data.username)
+    if not user or not await verify_password_async(form_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -152,45 +222,417 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(user)
+    }
+
+@app.post("/auth/refresh", response_model=Token,
+          tags=["Authentication"],
+          summary="Exchange a refresh token for a new access token")
+async def refresh(body: RefreshRequest):
+    """
+    Issue a new access token from a valid refresh token.
+    
+    The user is reloaded so deleted accounts cannot keep refreshing.
+    
+    Args:
+        body (RefreshRequest): The refresh token
+        
+    Returns:
+        Token: New JWT access token
+        
+    Raises:
+        HTTPException: If the refresh token is invalid or revoked
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(body.refresh_token)
+    except JWTError:
+        raise credentials_exception
+    if payload.get("type") != "refresh":
+        raise credentials_exception
+    
+    user = await UserRepository.get_by_email(payload.get("sub"))
+    if not user:
+        raise credentials_exception
+    
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token = create_access_token(
+        data=user_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.post("/auth/logout",
+          tags=["Authentication"],
+          summary="Revoke the current access token and optional refresh token")
+async def logout(
+    body: Optional[RefreshRequest] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Revoke the caller's access token and, when given, their refresh token.
+    
+    Args:
+        body (Optional[RefreshRequest]): Refresh token to revoke as well
+        
+    Returns:
+        dict: Confirmation message
+    """
+    if current_user.get("jti"):
+        await RevocationList.revoke(
+            current_user["jti"], datetime.utcfromtimestamp(current_user["exp"])
+        )
+    if body is not None:
+        try:
+            payload = decode_token(body.refresh_token)
+        except JWTError:
+            payload = None
+        if payload and payload.get("jti") and payload.get("sub") == current_user["email"]:
+            await RevocationList.revoke(
+                payload["jti"], datetime.utcfromtimestamp(payload["exp"])
+            )
+    return {"message": "Logged out successfully"}
+
+async def list_tasks(
+    request: Request,
+    response: Response,
+    current_user: dict,
+    scope: str,
+    skip: int,
+    limit: int,
+    filters: TaskFilters,
+    sort: str,
+    order: str,
+    cursor: Optional[str],
+    fields: Optional[str],
+    if_none_match: Optional[str]
+):
+    """List tasks from the given scope, with the ETag, cursor and fieldset handling of GET /tasks."""
+    try:
+        selected_fields = parse_task_fields(fields)
+        filters.validate()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        headers = {}
+        # Overdue results change with the clock, not only with the task list version
+        if not filters.time_dependent:
+            version = await TaskVersion.get(current_user)
+            etag = task_list_etag(current_user["_id"], version, f"{request.url.path}?{request.url.query}")
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            headers["ETag"] = etag
+        
+        tasks, next_cursor = await TaskRepository.list_for_user(
+            current_user["_id"],
+            filters=filters,
+            sort=sort,
+            order=order,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=selected_fields,
+            scope=scope
+        )
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        # Sparse tasks would fail response_model validation
+        if settings.fast_task_serialization or selected_fields is not None:
+            return TaskListResponse(tasks, fields=selected_fields, headers=headers)
+        response.headers.update(headers)
+        return tasks
+        
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("❌ Error fetching tasks: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error fetching tasks"
+        )
+
+def task_filters(
+    completed: Optional[bool] = None,
+    due_after: Optional[datetime] = Query(None, description="Due at or after this time"),
+    due_before: Optional[datetime] = Query(None, description="Due before this time"),
+    overdue: bool = Query(False, description="Only incomplete tasks whose due date has passed"),
+    no_due_date: bool = Query(False, description="Only tasks without a due date"),
+    created_after: Optional[datetime] = Query(None, description="Created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Created before this time"),
+    updated_after: Optional[datetime] = Query(None, description="Updated at or after this time"),
+    updated_before: Optional[datetime] = Query(None, description="Updated before this time")
+) -> TaskFilters:
+    """Task listing filters from the query string."""
+    return TaskFilters(
+        completed=completed,
+        due_after=due_after,
+        due_before=due_before,
+        overdue=overdue,
+        no_due_date=no_due_date,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before
+    )
+
+FIELDS_DESCRIPTION = f"Comma-separated fields to return (_id is always included): {', '.join(TASK_SELECTABLE_FIELDS)}"
+
+IDEMPOTENCY_KEY_DESCRIPTION = "Unique key per logical request; retries with the same key replay the first response"
+
 @app.get("/tasks", 
     response_model=list[Task],
     tags=["Tasks"],
     summary="Get all user tasks"
 )
 async def get_tasks(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     skip: int = 0,
     limit: int = 10,
-    completed: Optional[bool] = None
+    filters: TaskFilters = Depends(task_filters),
+    sort: Literal[TASK_SORT_FIELDS] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = Query(None, description="Opaque token from X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_archived: bool = Query(False, description="Also list archived tasks"),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get all tasks for the current user."""
+    """
+    Get tasks for the current user.
+    
+    With fields, only those fields are read from the database and
+    returned, e.g. fields=title,completed,due_date for a list view.
+    
+    Tasks can be filtered by completion, due-date, created and updated
+    ranges (after is inclusive, before exclusive), overdue, and no due
+    date. Contradictory filters are rejected with 400.
+    
+    Results are sorted by the selected field with _id as tiebreaker. When a
+    page is full, the X-Next-Cursor response header carries the token for
+    the next page. Passing a cursor takes precedence over skip.
+    
+    Completed tasks are archived after a while when archival is enabled;
+    include_archived merges them into the listing, marked by archived_at.
+    
+    The ETag changes whenever any of the user's tasks change; sending it
+    back in If-None-Match returns 304 without querying the tasks. Overdue
+    listings change with time alone and carry no ETag.
+    """
+    return await list_tasks(
+        request, response, current_user, "all" if include_archived else "active",
+        skip, limit, filters, sort, order, cursor, fields, if_none_match
+    )
+
+@app.get("/tasks/archive",
+    response_model=list[Task],
+    tags=["Tasks"],
+    summary="Get archived user tasks"
+)
+async def get_archived_tasks(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    skip: int = 0,
+    limit: int = 10,
+    filters: TaskFilters = Depends(task_filters),
+    sort: Literal[TASK_SORT_FIELDS] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = Query(None, description="Opaque token from X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get the current user's archived tasks.
+    
+    Filters, paging, sorting, fields and ETags work as for GET /tasks.
+    """
+    return await list_tasks(
+        request, response, current_user, "archived",
+        skip, limit, filters, sort, order, cursor, fields, if_none_match
+    )
+
+@app.get("/tasks/changes",
+    response_model=TaskChanges,
+    tags=["Tasks"],
+    summary="Get task changes since a sync token"
+)
+async def get_task_changes(
+    current_user: dict = Depends(get_current_user),
+    since: Optional[str] = Query(None, description="next_token from a previous call")
+):
+    """
+    Get the tasks created, updated, deleted or archived after a sync token.
+    
+    Without a token, or when the token is older than the retained change
+    log, resync_required is set: the client should reload its full list
+    and continue from the returned next_token. When has_more is set, the
+    client should call again with next_token right away.
+    """
     try:
-        db = Database.get_db()
-        query = {"user_id": ObjectId(current_user["_id"])}
-        if completed is not None:
-            query["completed"] = completed
-            
-        cursor = db.tasks.find(query).skip(skip).limit(limit)
-        tasks = []
+        current = await TaskVersion.get(current_user)
+        if since is None:
+            return {"next_token": str(current), "resync_required": True}
         
-        async for task in cursor:
-            task["_id"] = str(task["_id"])
-            task["user_id"] = str(task["user_id"])
-            tasks.append(task)
-            
-        return tasks
+        version, resume = parse_sync_token(since)
+        try:
+            latest, covered, resume, has_more = await ChangeLog.since(
+                current_user["_id"], version, current, resume
+            )
+        except ResyncRequiredError:
+            return {"next_token": str(current), "resync_required": True}
         
+        upserts = [task_id for task_id, op in latest.items() if op == "upsert"]
+        tasks = await TaskRepository.get_many(current_user["_id"], upserts)
+        found = {task["_id"] for task in tasks}
+        # Tasks deleted after their last logged upsert are reported as deletes
+        deletes = [
+            str(task_id) for task_id, op in latest.items()
+            if op == "delete" or (op == "upsert" and str(task_id) not in found)
+        ]
+        archived = [str(task_id) for task_id, op in latest.items() if op == "archive"]
+        return {
+            "upserts": tasks,
+            "deletes": deletes,
+            "archived": archived,
+            "next_token": format_sync_token(covered, resume),
+            "has_more": has_more
+        }
+        
+    except InvalidSyncTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"❌ Error fetching tasks: {str(e)}")
+        logger.error("❌ Error fetching task changes: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching tasks"
+            detail="Error fetching task changes"
         )
 
+@app.get("/tasks/stream",
+    response_class=StreamingResponse,
+    tags=["Tasks"],
+    summary="Stream task change notifications"
+)
+async def stream_tasks(current_user: dict = Depends(get_stream_user)):
+    """
+    Push task change notifications as Server-Sent Events.
+    
+    Each change event carries the new sync token (seq), the operation and
+    the affected task ids; clients fetch the data through /tasks/changes.
+    Heartbeat events keep idle connections alive. Clients that fall too
+    far behind are disconnected and should reconnect and resync.
+    """
+    if Drain.draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down, please reconnect",
+            headers={"Retry-After": "1"}
+        )
+    broker = get_broker()
+    subscription = broker.subscribe(current_user["_id"])
+    
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.get()
+                if event is CLOSE:
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/tasks/search",
+    response_model=list[Task],
+    tags=["Tasks"],
+    summary="Search user tasks"
+)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Search the current user's tasks by title and description, best match first."""
+    try:
+        return await TaskRepository.search(current_user["_id"], q, skip=skip, limit=limit)
+        
+    except Exception as e:
+        logger.error("❌ Error searching tasks: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching tasks"
+        )
+
+@app.get("/tasks/stats",
+    response_model=TaskStatistics,
+    tags=["Tasks"],
+    summary="Get user task statistics"
+)
+async def get_task_stats(
+    tz_offset_minutes: int = Query(0, ge=-14 * 60, le=14 * 60, description="Client UTC offset for 'today'"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get total, completed, pending, overdue and due-today task counts."""
+    try:
+        return await TaskStats.get(current_user, tz_offset_minutes)
+        
+    except Exception as e:
+        logger.error("❌ Error fetching task stats: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error fetching task stats"
+        )
+
+@app.get("/tasks/export",
+    response_class=StreamingResponse,
+    tags=["Tasks"],
+    summary="Export all user tasks"
+)
+async def export_tasks(
+    current_user: dict = Depends(get_current_user),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000)
+):
+    """
+    Stream every task of the current user as NDJSON or CSV.
+    
+    Tasks are serialized as they are read from the database cursor, so
+    memory use stays constant regardless of the number of tasks.
+    """
+    tasks = TaskRepository.iter_for_user(
+        current_user["_id"], batch_size or settings.export_batch_size
+    )
+    return StreamingResponse(
+        SERIALIZERS[export_format](tasks),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'}
+    )
+
 @app.post("/tasks", 
     response_model=Task,
     status_code=status.HTTP_201_CREATED,
@@ -199,33 +641,131 @@ async def get_tasks(
 )
 async def create_task(
     task: TaskCreate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
 ):
     """Create a new task."""
-    try:
-        db = Database.get_db()
-        task_dict = task.model_dump()
-        task_dict.update({
-            "user_id": ObjectId(current_user["_id"]),
-            "created_at": datetime.utcnow(),
-            "completed": False
-        })
-        
-        result = await db.tasks.insert_one(task_dict)
-        created_task = await db.tasks.find_one({"_id": result.inserted_id})
-        
-        created_task["_id"] = str(created_task["_id"])
-        created_task["user_id"] = str(created_task["user_id"])
-        
-        return created_task
-        
-    except Exception as e:
-        logger.error(f"Error creating task: {str(e)}")
+    async def create():
+        try:
+            return await TaskRepository.create(current_user["_id"], task.model_dump())
+            
+        except Exception as e:
+            logger.error("Error creating task: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error creating task"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key, request_fingerprint("POST /tasks", task),
+        create, Task, status.HTTP_201_CREATED
+    )
+
+def check_batch_size(size: int):
+    """Reject bulk requests larger than the configured maximum."""
+    if size > settings.bulk_max_items:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error creating task"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds the maximum of {settings.bulk_max_items} items"
         )
 
+@app.post("/tasks/bulk",
+    response_model=BulkResult,
+    tags=["Tasks"],
+    summary="Create several tasks"
+)
+async def bulk_create_tasks(
+    body: TaskBulkCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
+):
+    """Create several tasks with a single unordered bulk write."""
+    check_batch_size(len(body.tasks))
+    
+    async def bulk_create():
+        try:
+            results = await TaskRepository.bulk_create(
+                current_user["_id"], [task.model_dump() for task in body.tasks]
+            )
+            return {"results": results}
+            
+        except Exception as e:
+            logger.error("❌ Error bulk creating tasks: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error creating tasks"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key, request_fingerprint("POST /tasks/bulk", body),
+        bulk_create, BulkResult
+    )
+
+@app.patch("/tasks/bulk",
+    response_model=BulkResult,
+    tags=["Tasks"],
+    summary="Partially update several tasks"
+)
+async def bulk_update_tasks(
+    body: TaskBulkUpdate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
+):
+    """Apply partial updates to several tasks with a single unordered bulk write."""
+    check_batch_size(len(body.updates))
+    
+    async def bulk_update():
+        try:
+            updates = [
+                (item.id, item.model_dump(exclude_unset=True, exclude={"id"}))
+                for item in body.updates
+            ]
+            results = await TaskRepository.bulk_update(current_user["_id"], updates)
+            return {"results": results}
+            
+        except Exception as e:
+            logger.error("❌ Error bulk updating tasks: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error updating tasks"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key,
+        request_fingerprint("PATCH /tasks/bulk", body.model_dump(exclude_unset=True)),
+        bulk_update, BulkResult
+    )
+
+@app.delete("/tasks/bulk",
+    response_model=BulkResult,
+    tags=["Tasks"],
+    summary="Delete several tasks"
+)
+async def bulk_delete_tasks(
+    body: TaskBulkDelete,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
+):
+    """Delete several tasks with a single unordered bulk write."""
+    check_batch_size(len(body.ids))
+    
+    async def bulk_delete():
+        try:
+            results = await TaskRepository.bulk_delete(current_user["_id"], body.ids)
+            return {"results": results}
+            
+        except Exception as e:
+            logger.error("❌ Error bulk deleting tasks: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error deleting tasks"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key, request_fingerprint("DELETE /tasks/bulk", body),
+        bulk_delete, BulkResult
+    )
+
 @app.put("/tasks/{task_id}", 
     response_model=Task,
     tags=["Tasks"],
@@ -233,47 +773,45 @@ async def create_task(
 )
 async def update_task(
     task_id: str,
-    task_update: TaskCreate,
-    current_user: dict = Depends(get_current_user)
+    task_update: TaskUpdate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
 ):
-    """Update a task."""
-    try:
-        db = Database.get_db()
-        
-        if not await Database.verify_task_ownership(task_id, current_user["_id"]):
+    """
+    Update a task.
+    
+    With write coalescing enabled, updates arriving within a few
+    milliseconds are merged per task and written in one bulk write.
+    """
+    async def update():
+        try:
+            if settings.write_coalescing_enabled:
+                return await WriteCoalescer.update(task_id, current_user["_id"], task_update.changes())
+            return await TaskRepository.update(
+                task_id, current_user["_id"], task_update.changes()
+            )
+            
+        except TaskForbiddenError:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to modify this task"
             )
-        
-        update_data = task_update.model_dump()
-        update_data["updated_at"] = datetime.utcnow()
-        
-        result = await db.tasks.find_one_and_update(
-            {"_id": ObjectId(task_id)},
-            {"$set": update_data},
-            return_document=True
-        )
-        
-        if not result:
+        except TaskNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
-            
-        result["_id"] = str(result["_id"])
-        result["user_id"] = str(result["user_id"])
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"❌ Error updating task: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error updating task"
-        )
+        except Exception as e:
+            logger.error("❌ Error updating task: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error updating task"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key, request_fingerprint(f"PUT /tasks/{task_id}", task_update),
+        update, Task
+    )
 
 @app.delete("/tasks/{task_id}",
     tags=["Tasks"],
@@ -281,55 +819,63 @@ async def update_task(
 )
 async def delete_task(
     task_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description=IDEMPOTENCY_KEY_DESCRIPTION)
 ):
-    """Delete a task."""
-    try:
-        db = Database.get_db()
-        
-        if not await Database.verify_task_ownership(task_id, current_user["_id"]):
+    """
+    Delete a task.
+    
+    A retry with the same Idempotency-Key gets the original success
+    response instead of 404.
+    """
+    async def delete():
+        try:
+            await TaskRepository.delete(task_id, current_user["_id"])
+            return {"message": "Task deleted successfully"}
+            
+        except TaskForbiddenError:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to delete this task"
             )
-        
-        result = await db.tasks.delete_one({"_id": ObjectId(task_id)})
-        
-        if result.deleted_count == 0:
+        except TaskNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
-            
-        return {"message": "Task deleted successfully"}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"❌ Error deleting task: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error deleting task"
-        )
+        except Exception as e:
+            logger.error("❌ Error deleting task: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error deleting task"
+            )
+    
+    return await Idempotency.run(
+        current_user["_id"], idempotency_key, request_fingerprint(f"DELETE /tasks/{task_id}"), delete
+    )
 
 # Add a custom exception handler for validation errors
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Handle HTTP exceptions with proper logging and response format."""
-    logger.error(f"HTTP Exception: {exc.detail}")
+    # Client errors are routine and can arrive in storms; only server
+    # errors are logged as errors
+    level = logging.ERROR if exc.status_code >= 500 else logging.WARNING
+    logger.log(level, "HTTP Exception %s: %s", exc.status_code, exc.detail)
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
             "message": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(DuplicateKeyError)
 async def duplicate_key_exception_handler(request, exc):
     """Handle MongoDB duplicate key errors (e.g., duplicate email)."""
-    logger.error(f"Duplicate key error: {str(exc)}")
+    logger.error("Duplicate key error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_400_BAD_REQUEST,
         content={
@@ -342,7 +888,7 @@ async def duplicate_key_exception_handler(request, exc):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
     """Handle validation errors with proper response format."""
-    logger.error(f"Validation error: {str(exc)}")
+    logger.warning("Validation error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
@@ -356,8 +902,7 @@ async def validation_exception_handler(request, exc):
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle unexpected errors with proper logging and response format."""
-    logger.error(f"Unexpected error: {str(exc)}")
-    logger.error(traceback.format_exc())
+    logger.error("Unexpected error: %s", exc, exc_info=exc)
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,1353 @@
+"""
+In-Memory Storage Module
+
+This module is a storage engine that keeps every collection in process
+memory, behind the subset of the Motor API the application uses:
+- Queries, projections, sorts and updates follow MongoDB semantics for
+  the operators the app issues, including null matching missing fields,
+  type-bracketed comparisons and BSON ordering across types
+- Declared indexes (see app.migrate) are honoured: unique indexes are
+  enforced, TTL indexes expire documents, and indexes led by user_id keep
+  per-user sorted keys, so a listing walks one user's tasks in sort order,
+  seeking to its range, instead of scanning and sorting
+- Every operation is reported to the client's command listeners as the
+  MongoDB command it stands for, so command metrics and counts work as
+  they do against a server
+- Data lives as long as the process, so it suits tests, benchmarks and
+  single-worker development; text search and explain() need MongoDB
+
+Settings.storage_backend = "memory" selects it (see app.database).
+"""
+
+import itertools
+import operator
+import re
+import time
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional
+from bson import ObjectId
+from pymongo import monitoring
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, WriteError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+# Stands in for absent fields; queries treat it like null
+_MISSING = object()
+
+# Sorts after every BSON value key
+_MAX_KEY = (99,)
+
+
+def sort_key(value: Any) -> tuple:
+    """
+    Key ordering values like MongoDB's BSON comparison order.
+
+    Values of different types compare by type (null < numbers < strings <
+    objects < arrays < binary < ObjectId < booleans < dates), so mixed-type
+    fields sort like they do in MongoDB.
+    """
+    rank = _RANKS.get(type(value))
+    if rank is not None:
+        return (rank, value)
+    if type(value) is ObjectId:
+        # Bytes compare in C, ObjectId's rich comparisons in Python
+        return (7, value.binary)
+    if value is None or value is _MISSING:
+        return (1,)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, dict):
+        return (4, tuple((k, sort_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (5, tuple(sort_key(v) for v in value))
+    if isinstance(value, bytes):
+        return (6, value)
+    if isinstance(value, ObjectId):
+        return (7, value.binary)
+    if isinstance(value, datetime):
+        return (9, value)
+    return (10, repr(value))
+
+
+# Type ranks of the common scalar types, looked up before isinstance checks
+_RANKS = {int: 2, float: 2, str: 3, bytes: 6, bool: 8, datetime: 9}
+
+
+def _store_value(value: Any) -> Any:
+    """Copy a value the way it round-trips through BSON."""
+    if isinstance(value, dict):
+        return {k: _store_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_store_value(v) for v in value]
+    if isinstance(value, datetime):
+        # BSON dates are UTC with millisecond precision
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _get(doc: dict, path: str) -> Any:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set(doc: dict, path: str, value: Any):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset(doc: dict, path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+# Queries
+
+
+Predicate = Callable[[Any], bool]
+
+_COMPARISONS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+
+def _getter(path: str) -> Callable[[dict], Any]:
+    if "." not in path:
+        return lambda doc: doc.get(path, _MISSING)
+    return lambda doc: _get(doc, path)
+
+
+def _equality(target: Any) -> Predicate:
+    if target is None:
+        return lambda value: value is _MISSING or value is None
+    key = sort_key(target)
+    if isinstance(target, list):
+        return lambda value: sort_key(value) == key
+    # Array fields match when any element does
+    return lambda value: (
+        any(sort_key(item) == key for item in value) if isinstance(value, list) else sort_key(value) == key
+    )
+
+
+def _membership(targets: list) -> Predicate:
+    keys = {sort_key(target) for target in targets if target is not None}
+    nullable = any(target is None for target in targets)
+
+    def test(value):
+        if value is _MISSING or value is None:
+            return nullable
+        if isinstance(value, list):
+            return any(sort_key(item) in keys for item in value)
+        return sort_key(value) in keys
+    return test
+
+
+def _comparison(op: str, target: Any) -> Predicate:
+    compare = _COMPARISONS[op]
+    target_key = sort_key(target)
+    rank = target_key[0]
+
+    def test(value):
+        values = value if isinstance(value, list) else (None if value is _MISSING else value,)
+        # Comparisons only match values of the same type
+        return any(
+            key[0] == rank and compare(key, target_key) for key in map(sort_key, values)
+        )
+    return test
+
+
+def _is_operators(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(k.startswith("$") for k in condition)
+
+
+def _compile_field(condition: Any) -> Predicate:
+    if not _is_operators(condition):
+        return _equality(condition)
+    tests = []
+    for op, arg in condition.items():
+        if op == "$eq":
+            tests.append(_equality(arg))
+        elif op == "$ne":
+            equal = _equality(arg)
+            tests.append(lambda value, equal=equal: not equal(value))
+        elif op == "$in":
+            tests.append(_membership(arg))
+        elif op == "$nin":
+            member = _membership(arg)
+            tests.append(lambda value, member=member: not member(value))
+        elif op in _COMPARISONS:
+            tests.append(_comparison(op, arg))
+        elif op == "$exists":
+            tests.append(lambda value, wanted=bool(arg): (value is not _MISSING) == wanted)
+        elif op == "$not":
+            inner = _compile_field(arg)
+            tests.append(lambda value, inner=inner: not inner(value))
+        elif op == "$regex":
+            flags = sum(getattr(re, flag.upper()) for flag in condition.get("$options", "") if flag in "imsx")
+            pattern = re.compile(arg, flags)
+            tests.append(lambda value, pattern=pattern: any(
+                isinstance(item, str) and pattern.search(item)
+                for item in (value if isinstance(value, list) else [value])
+            ))
+        elif op != "$options":
+            raise OperationFailure(f"Unsupported query operator {op} in the memory storage backend")
+    if len(tests) == 1:
+        return tests[0]
+    return lambda value: all(test(value) for test in tests)
+
+
+def compile_query(query: Optional[dict]) -> Callable[[dict], bool]:
+    """
+    Turn a MongoDB query into a predicate over documents.
+
+    Args:
+        query: The query filter
+
+    Returns:
+        Callable: Returns True for matching documents
+
+    Raises:
+        OperationFailure: For operators the memory backend does not support
+    """
+    tests = []
+    for key, condition in (query or {}).items():
+        if key in ("$and", "$or", "$nor"):
+            clauses = [compile_query(clause) for clause in condition]
+            if key == "$and":
+                tests.append(lambda doc, clauses=clauses: all(clause(doc) for clause in clauses))
+            elif key == "$or":
+                tests.append(lambda doc, clauses=clauses: any(clause(doc) for clause in clauses))
+            else:
+                tests.append(lambda doc, clauses=clauses: not any(clause(doc) for clause in clauses))
+        elif key == "$text":
+            raise OperationFailure("Text search needs the mongo storage backend")
+        elif key.startswith("$"):
+            raise OperationFailure(f"Unsupported query operator {key} in the memory storage backend")
+        else:
+            get, test = _getter(key), _compile_field(condition)
+            tests.append(lambda doc, get=get, test=test: test(get(doc)))
+    if not tests:
+        return lambda doc: True
+    if len(tests) == 1:
+        return tests[0]
+    return lambda doc: all(test(doc) for test in tests)
+
+
+def matches(doc: dict, query: Optional[dict]) -> bool:
+    """Whether a document matches a MongoDB query."""
+    return compile_query(query)(doc)
+
+
+def _field_bounds(condition: Any) -> Optional[tuple]:
+    """Inclusive (low, high) sort-key bounds of a field condition; None when unbounded."""
+    if not _is_operators(condition):
+        if isinstance(condition, (dict, list)):
+            return None
+        return sort_key(condition), sort_key(condition)
+    low, high = None, None
+    for op, arg in condition.items():
+        if op == "$eq" and not isinstance(arg, (dict, list)):
+            bound = (sort_key(arg), sort_key(arg))
+        elif op in ("$gt", "$gte"):
+            bound = (sort_key(arg), None)
+        elif op in ("$lt", "$lte"):
+            bound = (None, sort_key(arg))
+        elif op == "$in" and arg and not any(isinstance(item, (dict, list)) for item in arg):
+            keys = [sort_key(item) for item in arg]
+            bound = (min(keys), max(keys))
+        else:
+            continue
+        low = bound[0] if low is None or (bound[0] is not None and bound[0] > low) else low
+        high = bound[1] if high is None or (bound[1] is not None and bound[1] < high) else high
+    if low is None and high is None:
+        return None
+    return low, high
+
+
+def query_bounds(query: dict, field: str) -> tuple:
+    """
+    Inclusive sort-key range a field is restricted to by a query.
+
+    The range may be wider than the query allows; matching documents are
+    never outside it.
+
+    Returns:
+        tuple: (low, high), either of which is None when unbounded
+    """
+    low, high = None, None
+
+    def narrow(bounds):
+        nonlocal low, high
+        if bounds is None:
+            return
+        if bounds[0] is not None and (low is None or bounds[0] > low):
+            low = bounds[0]
+        if bounds[1] is not None and (high is None or bounds[1] < high):
+            high = bounds[1]
+
+    for key, condition in query.items():
+        if key == field:
+            narrow(_field_bounds(condition))
+        elif key == "$and":
+            for clause in condition:
+                narrow(query_bounds(clause, field))
+        elif key == "$or":
+            # The hull of the clauses' ranges, if every clause is bounded
+            clauses = [query_bounds(clause, field) for clause in condition]
+            if clauses and all(lo is not None for lo, _ in clauses):
+                narrow((min(lo for lo, _ in clauses), None))
+            if clauses and all(hi is not None for _, hi in clauses):
+                narrow((None, max(hi for _, hi in clauses)))
+    return low, high
+
+
+def _pinned_fields(query: dict) -> dict:
+    """Top-level field conditions of a query, including those nested in $and."""
+    pinned = {key: condition for key, condition in query.items() if not key.startswith("$")}
+    for clause in query.get("$and", []):
+        for key, condition in _pinned_fields(clause).items():
+            pinned.setdefault(key, condition)
+    return pinned
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    """Copy of a document limited by a find() projection."""
+    if not projection:
+        return _copy(doc)
+    inclusive = any(v for k, v in projection.items() if k != "_id") or (
+        len(projection) == 1 and projection.get("_id")
+    )
+    if inclusive:
+        result = {}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for key, include in projection.items():
+            if key != "_id" and include:
+                value = _get(doc, key)
+                if value is not _MISSING:
+                    _set(result, key, _copy(value))
+        return result
+    result = _copy(doc)
+    for key, include in projection.items():
+        if not include:
+            _unset(result, key)
+    return result
+
+
+def _sort_documents(docs: list[dict], spec: list[tuple[str, int]]) -> list[dict]:
+    # Stable sorts from the last key to the first honour mixed directions
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda doc: sort_key(_get(doc, field)), reverse=direction == -1)
+    return docs
+
+
+def _sort_spec(key_or_list: Any, direction: Optional[int] = None) -> list[tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    spec = list(key_or_list.items()) if isinstance(key_or_list, dict) else list(key_or_list)
+    for field, order in spec:
+        if not isinstance(order, int):
+            raise OperationFailure(f"Unsupported sort on {field} in the memory storage backend")
+    return spec
+
+
+# Updates and aggregation expressions
+
+
+def evaluate(expr: Any, doc: dict) -> Any:
+    """Evaluate an aggregation expression against a document."""
+    if isinstance(expr, str) and expr.startswith("$") and not expr.startswith("$$"):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, list):
+        return [evaluate(item, doc) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) == 1 and next(iter(expr)).startswith("$"):
+        op, args = next(iter(expr.items()))
+        if op == "$literal":
+            return args
+        if op == "$add":
+            values = [evaluate(arg, doc) for arg in args]
+            if any(value is None for value in values):
+                return None
+            dates = [value for value in values if isinstance(value, datetime)]
+            total = sum(value for value in values if not isinstance(value, datetime))
+            return dates[0] + timedelta(milliseconds=total) if dates else total
+        if op in ("$eq", "$ne"):
+            left, right = (evaluate(arg, doc) for arg in args)
+            return (sort_key(left) == sort_key(right)) == (op == "$eq")
+        if op == "$cond":
+            if isinstance(args, dict):
+                args = [args["if"], args["then"], args["else"]]
+            condition = evaluate(args[0], doc)
+            return evaluate(args[1] if condition not in (None, False, 0) else args[2], doc)
+        if op == "$ifNull":
+            for arg in args:
+                value = evaluate(arg, doc)
+                if value is not None:
+                    return value
+            return None
+        raise OperationFailure(f"Unsupported expression {op} in the memory storage backend")
+    return {key: evaluate(value, doc) for key, value in expr.items()}
+
+
+def apply_update(doc: dict, update: Any, inserting: bool = False) -> dict:
+    """
+    Apply an update document or pipeline to a copy of a document.
+
+    Args:
+        doc: The current document
+        update: Update operators, or a pipeline of $set/$unset stages
+        inserting: Whether this is an upsert's insert, for $setOnInsert
+
+    Returns:
+        dict: The updated copy
+
+    Raises:
+        ValueError: If update is not made of update operators
+        OperationFailure: For operators the memory backend does not support
+    """
+    result = _copy(doc)
+    if isinstance(update, list):
+        for stage in update:
+            for op, spec in stage.items():
+                if op in ("$set", "$addFields"):
+                    values = {field: evaluate(expr, result) for field, expr in spec.items()}
+                    for field, value in values.items():
+                        _set(result, field, _store_value(value))
+                elif op == "$unset":
+                    for field in [spec] if isinstance(spec, str) else spec:
+                        _unset(result, field)
+                else:
+                    raise OperationFailure(f"Unsupported update stage {op} in the memory storage backend")
+        return result
+
+    if not update or not all(key.startswith("$") for key in update):
+        raise ValueError("update only works with $ operators")
+    for op, spec in update.items():
+        for field, value in spec.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set(result, field, _store_value(value))
+            elif op == "$setOnInsert":
+                continue
+            elif op == "$unset":
+                _unset(result, field)
+            elif op == "$inc":
+                current = _get(result, field)
+                _set(result, field, value if current is _MISSING or current is None else current + value)
+            elif op in ("$min", "$max"):
+                current = _get(result, field)
+                if current is _MISSING or (
+                    sort_key(value) < sort_key(current) if op == "$min" else sort_key(value) > sort_key(current)
+                ):
+                    _set(result, field, _store_value(value))
+            else:
+                raise OperationFailure(f"Unsupported update operator {op} in the memory storage backend")
+    return result
+
+
+def _upsert_seed(query: dict) -> dict:
+    """Equality fields of a filter, which an upsert copies into the new document."""
+    seed = {}
+    for key, condition in query.items():
+        if key == "$and":
+            for clause in condition:
+                seed.update(_upsert_seed(clause))
+        elif key.startswith("$"):
+            continue
+        elif _is_operators(condition):
+            if "$eq" in condition:
+                _set(seed, key, _store_value(condition["$eq"]))
+        else:
+            _set(seed, key, _store_value(condition))
+    return seed
+
+
+# Indexes
+
+
+def _write_kind(request: Any) -> str:
+    if isinstance(request, InsertOne):
+        return "insert"
+    if isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+        return "update"
+    if isinstance(request, (DeleteOne, DeleteMany)):
+        return "delete"
+    raise TypeError(f"{request!r} is not a valid request")
+
+
+def _write_batches(requests: list, ordered: bool) -> list[tuple[str, list[tuple[int, Any]]]]:
+    """Split a bulk write into per-command batches of (position, request)."""
+    batches: list[tuple[str, list[tuple[int, Any]]]] = []
+    by_kind: dict[str, list[tuple[int, Any]]] = {}
+    for position, request in enumerate(requests):
+        kind = _write_kind(request)
+        if not ordered:
+            if kind not in by_kind:
+                by_kind[kind] = []
+                batches.append((kind, by_kind[kind]))
+            by_kind[kind].append((position, request))
+        elif batches and batches[-1][0] == kind:
+            batches[-1][1].append((position, request))
+        else:
+            batches.append((kind, [(position, request)]))
+    return batches
+
+
+class _Index:
+    """A declared index and the structures backing it."""
+
+    def __init__(self, name: str, keys: list[tuple[str, Any]], options: dict):
+        self.name = name
+        self.keys = keys
+        self.options = options
+        self.unique = bool(options.get("unique"))
+        self.sparse = bool(options.get("sparse"))
+        self.partial = options.get("partialFilterExpression")
+        self.partial_test = None if self.partial is None else compile_query(self.partial)
+        self.ttl = options.get("expireAfterSeconds")
+        self.fields = [field for field, _ in keys]
+        # Unique value -> _id
+        self.values: dict[tuple, Any] = {}
+        # Sorted keys of the covered documents, kept per user for indexes
+        # led by user_id. Entries are stored ascending whatever the declared
+        # directions, so walks follow the stored order
+        self.ordered = all(direction in (1, -1) for _, direction in keys) and not self.sparse
+        self.partitioned = len(keys) > 1 and keys[0][0] == "user_id"
+        sorted_keys = keys[1:] if self.partitioned else keys
+        self.sorted_fields = [field for field, _ in sorted_keys]
+        self.by_owner: dict[Any, list[tuple]] = {}
+
+    def describe(self) -> dict:
+        return {"v": 2, "key": dict(self.keys), "name": self.name, **self.options}
+
+    def covers(self, doc: dict) -> bool:
+        if self.sparse and all(_get(doc, field) is _MISSING for field in self.fields):
+            return False
+        return self.partial_test is None or self.partial_test(doc)
+
+    def unique_key(self, doc: dict) -> tuple:
+        return tuple(sort_key(_get(doc, field)) for field in self.fields)
+
+    def partition(self, doc: dict) -> Any:
+        return doc.get("user_id") if self.partitioned else None
+
+    def entry(self, doc: dict) -> tuple:
+        # Sorted by the index keys (after user_id, for per-user indexes),
+        # then _id; the raw _id rides along and is never compared
+        keys = tuple(sort_key(_get(doc, field)) for field in self.sorted_fields)
+        return (*keys, sort_key(doc["_id"]), doc["_id"])
+
+    def serves(self, pinned: dict) -> bool:
+        """Whether every document a query can match is in this index."""
+        if self.partial is None:
+            return True
+        return all(
+            not _is_operators(condition)
+            and field in pinned
+            and not isinstance(pinned[field], (dict, list))
+            and sort_key(pinned[field]) == sort_key(condition)
+            for field, condition in self.partial.items()
+        )
+
+    def add(self, doc: dict):
+        if not self.covers(doc):
+            return
+        if self.unique:
+            self.values[self.unique_key(doc)] = doc["_id"]
+        if self.ordered:
+            insort(self.by_owner.setdefault(self.partition(doc), []), self.entry(doc))
+
+    def remove(self, doc: dict):
+        if not self.covers(doc):
+            return
+        if self.unique:
+            self.values.pop(self.unique_key(doc), None)
+        if self.ordered:
+            entries = self.by_owner.get(self.partition(doc))
+            if entries is None:
+                return
+            entry = self.entry(doc)
+            position = bisect_left(entries, entry[:-1])
+            if position < len(entries) and entries[position][:-1] == entry[:-1]:
+                del entries[position]
+            if not entries:
+                del self.by_owner[self.partition(doc)]
+
+    def conflict(self, doc: dict) -> Optional[Any]:
+        """The _id of another document holding this document's unique key, if any."""
+        if not self.unique or not self.covers(doc):
+            return None
+        other = self.values.get(self.unique_key(doc))
+        return None if other is None or sort_key(other) == sort_key(doc["_id"]) else other
+
+
+def _index_name(keys: list[tuple[str, Any]]) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def _normalize_keys(keys: Any, direction: int = 1) -> list[tuple[str, Any]]:
+    if isinstance(keys, str):
+        return [(keys, direction)]
+    return list(keys.items()) if isinstance(keys, dict) else [tuple(key) for key in keys]
+
+
+# Cursors
+
+
+class MemoryCursor:
+    """
+    Cursor over a find() on a MemoryCollection, run on first iteration.
+
+    Documents are copied out one at a time as the cursor is iterated, so
+    streaming a large result holds one document at a time, like a server
+    cursor holds one batch.
+    """
+
+    def __init__(self, collection: "MemoryCollection", query: Optional[dict], projection: Any):
+        self.collection = collection
+        self.query = query or {}
+        if isinstance(projection, (list, tuple)):
+            projection = dict.fromkeys(projection, 1)
+        self.projection = projection
+        self.spec: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self.results: Optional[Iterator[dict]] = None
+
+    def sort(self, key_or_list: Any, direction: Optional[int] = None) -> "MemoryCursor":
+        self.spec = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = abs(limit)
+        return self
+
+    def hint(self, index: Any) -> "MemoryCursor":
+        self.collection._check_hint(index)
+        return self
+
+    def batch_size(self, batch_size: int) -> "MemoryCursor":
+        return self
+
+    def max_time_ms(self, max_time_ms: Optional[int]) -> "MemoryCursor":
+        return self
+
+    async def explain(self):
+        raise OperationFailure("explain needs the mongo storage backend")
+
+    def _run(self) -> Iterator[dict]:
+        with self.collection._command("find"):
+            return self.collection._find(self.query, self.projection, self.spec, self._skip, self._limit)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self.results is None:
+            self.results = self._run()
+        try:
+            return next(self.results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None) -> list[dict]:
+        docs = [doc async for doc in self]
+        return docs if length is None else docs[:length]
+
+
+class MemoryCommandCursor:
+    """Cursor over precomputed results, returned by aggregate()."""
+
+    def __init__(self, results: list[dict]):
+        self.results = iter(results)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return next(self.results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None) -> list[dict]:
+        docs = [doc async for doc in self]
+        return docs if length is None else docs[:length]
+
+
+# Collections
+
+
+class MemoryCollection:
+    """A collection of documents kept in memory, with the Motor collection API."""
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs: dict[Any, dict] = {}
+        self.indexes: dict[str, _Index] = {}
+        self.expires_checked = datetime.min
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.database.name}.{self.name}"
+
+    def _command(self, name: str):
+        return self.database.client._monitored(self.database.name, name, self.name)
+
+    # Index maintenance
+
+    def _duplicate(self, index_name: str, doc: dict) -> DuplicateKeyError:
+        message = f"E11000 duplicate key error collection: {self.full_name} index: {index_name}"
+        return DuplicateKeyError(message, 11000, {"code": 11000, "errmsg": message})
+
+    def _store(self, old: Optional[dict], new: Optional[dict]):
+        """Replace old with new in the documents and every index, enforcing unique keys."""
+        if new is not None:
+            if old is None and new["_id"] in self.docs:
+                raise self._duplicate("_id_", new)
+            for index in self.indexes.values():
+                if index.conflict(new) is not None:
+                    raise self._duplicate(index.name, new)
+        if old is not None:
+            for index in self.indexes.values():
+                index.remove(old)
+            del self.docs[old["_id"]]
+        if new is not None:
+            self.docs[new["_id"]] = new
+            for index in self.indexes.values():
+                index.add(new)
+
+    def _expire(self):
+        # TTL indexes are swept at most once a second, like a (faster) TTL monitor
+        now = datetime.utcnow()
+        if now - self.expires_checked < timedelta(seconds=1):
+            return
+        self.expires_checked = now
+        for index in self.indexes.values():
+            if index.ttl is None:
+                continue
+            cutoff = sort_key(now - timedelta(seconds=index.ttl))
+            if index.ordered and not index.partitioned:
+                # Dates sort together, so the expired ones are one slice
+                entries = index.by_owner.get(None, [])
+                start = bisect_left(entries, (sort_key(datetime.min),))
+                end = bisect_left(entries, (cutoff,))
+                expired = [self.docs[entry[-1]] for entry in entries[start:end]]
+            else:
+                expired = [
+                    doc for doc in self.docs.values()
+                    if isinstance(_get(doc, index.fields[0]), datetime)
+                    and sort_key(_get(doc, index.fields[0])) < cutoff
+                ]
+            for doc in expired:
+                self._store(doc, None)
+
+    def _check_hint(self, hint: Any):
+        if isinstance(hint, str):
+            if hint not in self.indexes and hint != "_id_":
+                raise OperationFailure("hint provided does not correspond to an existing index")
+            return
+        keys = _normalize_keys(hint)
+        if keys != [("_id", 1)] and not any(index.keys == keys for index in self.indexes.values()):
+            raise OperationFailure("hint provided does not correspond to an existing index")
+
+    # Query planning
+
+    def _ordered_walk(self, query: dict, spec: list[tuple[str, int]]) -> Optional[Iterator[dict]]:
+        """
+        Matching documents in sort order, read from a sorted index.
+
+        Used when the sort fields follow fields the query pins to single
+        values in some index, e.g. a listing of (user_id, completed) sorted
+        by due_date walks the (user_id, completed, due_date, _id) index.
+        Indexes led by user_id are kept per user and need the query to pin
+        it; partial indexes need the query to pin their filter. Entries are
+        stored ascending, so only sorts in one direction are walked, forwards
+        or backwards; mixed directions are sorted in memory. The walk starts
+        and stops at the range the query allows for the first sort field.
+
+        Returns:
+            Optional[Iterator]: Candidate documents in order, or None when
+                no index fits
+        """
+        if not spec:
+            return None
+        view = _pinned_fields(query)
+        owner = view.get("user_id", _MISSING)
+        owned = owner is not _MISSING and not isinstance(owner, (dict, list))
+        sort_fields = [field for field, _ in spec]
+        directions = {direction for _, direction in spec}
+        if len(directions) != 1:
+            return None
+        reverse = directions == {-1}
+        # Per-user indexes first: they only hold one user's documents
+        indexes = sorted(self.indexes.values(), key=lambda index: not index.partitioned)
+        for index in indexes:
+            if not index.ordered or (index.partitioned and not owned) or not index.serves(view):
+                continue
+            fields = index.sorted_fields
+            for split in range(len(fields) - len(sort_fields) + 1):
+                pinned = fields[:split]
+                if any(field not in view or isinstance(view[field], (dict, list)) for field in pinned):
+                    break
+                walked = fields[split:split + len(sort_fields)]
+                if walked != sort_fields:
+                    continue
+                # The rest of the index must only break ties
+                if fields[split + len(sort_fields):] not in ([], ["_id"]):
+                    continue
+                partition = owner if index.partitioned else None
+                return self._walk(index, partition, [view[field] for field in pinned], query, sort_fields[0], reverse)
+        return None
+
+    def _walk(
+        self, index: _Index, partition: Any, pinned: list, query: dict, first_sort: str, reverse: bool
+    ) -> Iterator[dict]:
+        prefix = tuple(sort_key(value) for value in pinned)
+        low, high = query_bounds(query, first_sort)
+        start = prefix if low is None else prefix + (low,)
+        end = prefix + ((_MAX_KEY,) if high is None else (high, _MAX_KEY))
+        # The walk resumes from the last key it returned rather than from a
+        # position, so writes made while a cursor is open do not make it
+        # skip or repeat documents
+        key = None
+        while True:
+            entries = index.by_owner.get(partition, [])
+            if reverse:
+                position = bisect_left(entries, end if key is None else key) - 1
+                if position < 0 or entries[position] < start:
+                    return
+            else:
+                position = bisect_left(entries, start if key is None else key)
+                if key is not None and position < len(entries) and entries[position][:-1] == key:
+                    position += 1
+                if position >= len(entries) or entries[position] >= end:
+                    return
+            entry = entries[position]
+            key = entry[:-1]
+            doc = self.docs.get(entry[-1])
+            if doc is not None:
+                yield doc
+
+    def _candidates(self, query: dict) -> Iterable[dict]:
+        query = _pinned_fields(query)
+        doc_id = query.get("_id", _MISSING)
+        if doc_id is not _MISSING:
+            if not isinstance(doc_id, dict):
+                return [self.docs[doc_id]] if doc_id in self.docs else []
+            if set(doc_id) == {"$in"}:
+                found = (self.docs.get(item) for item in doc_id["$in"])
+                return [doc for doc in found if doc is not None]
+        for index in self.indexes.values():
+            if not index.unique or index.partial or len(index.fields) != 1:
+                continue
+            value = query.get(index.fields[0], _MISSING)
+            if value is not _MISSING and not isinstance(value, (dict, list)):
+                found = index.values.get((sort_key(value),))
+                return [self.docs[found]] if found is not None else []
+        owner = query.get("user_id", _MISSING)
+        if owner is not _MISSING and not isinstance(owner, (dict, list)):
+            for index in self.indexes.values():
+                if index.ordered and index.partitioned and index.partial is None:
+                    entries = index.by_owner.get(owner, [])
+                    return [self.docs[entry[-1]] for entry in entries]
+        return list(self.docs.values())
+
+    def _matching(self, query: dict, spec: Optional[list[tuple[str, int]]] = None) -> Iterator[dict]:
+        """Stored documents matching a query, in sort order when spec is given."""
+        self._expire()
+        test = compile_query(query)
+        ordered = self._ordered_walk(query, spec) if spec else None
+        if ordered is not None:
+            return filter(test, ordered)
+        docs = [doc for doc in self._candidates(query) if test(doc)]
+        return iter(_sort_documents(docs, spec) if spec else docs)
+
+    def _find(self, query: dict, projection: Any, spec: list, skip: int, limit: int) -> Iterator[dict]:
+        # The plan is made now; documents are copied as the cursor reaches them
+        matching = self._matching(query, spec)
+        return (project(doc, projection) for doc in itertools.islice(matching, skip, skip + limit if limit else None))
+
+    def _first(self, query: dict, sort: Any = None) -> Optional[dict]:
+        spec = _sort_spec(sort) if sort else None
+        return next(self._matching(query or {}, spec), None)
+
+    # Reads
+
+    def find(self, filter: Optional[dict] = None, projection: Any = None, **kwargs) -> MemoryCursor:
+        cursor = MemoryCursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        cursor.skip(kwargs.get("skip", 0)).limit(kwargs.get("limit", 0))
+        return cursor
+
+    async def find_one(self, filter: Any = None, projection: Any = None, sort: Any = None) -> Optional[dict]:
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        if isinstance(projection, (list, tuple)):
+            projection = dict.fromkeys(projection, 1)
+        with self._command("find"):
+            doc = self._first(filter or {}, sort)
+        return None if doc is None else project(doc, projection)
+
+    async def count_documents(self, filter: dict, skip: int = 0, limit: int = 0) -> int:
+        # Like pymongo, counting runs as an aggregation
+        with self._command("aggregate"):
+            count = sum(1 for _ in self._matching(filter))
+        count = max(0, count - skip)
+        return min(count, limit) if limit else count
+
+    async def estimated_document_count(self) -> int:
+        with self._command("count"):
+            self._expire()
+            return len(self.docs)
+
+    def aggregate(self, pipeline: list[dict]) -> MemoryCommandCursor:
+        with self._command("aggregate"):
+            return self._aggregate(pipeline)
+
+    def _aggregate(self, pipeline: list[dict]) -> MemoryCommandCursor:
+        # A leading $match picks its documents through the indexes
+        match = pipeline[0]["$match"] if pipeline and "$match" in pipeline[0] else {}
+        docs: list[dict] = [_copy(doc) for doc in self._matching(match)]
+        for stage in pipeline[1 if match else 0:]:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = list(filter(compile_query(spec), docs))
+            elif op == "$group":
+                docs = self._group(docs, spec)
+            elif op == "$sort":
+                docs = _sort_documents(docs, _sort_spec(spec))
+            elif op == "$skip":
+                docs = docs[spec:]
+            elif op == "$limit":
+                docs = docs[:spec]
+            elif op == "$count":
+                docs = [{spec: len(docs)}] if docs else []
+            elif op == "$project":
+                docs = [project(doc, spec) for doc in docs]
+            else:
+                raise OperationFailure(f"Unsupported aggregation stage {op} in the memory storage backend")
+        return MemoryCommandCursor(docs)
+
+    @staticmethod
+    def _group(docs: list[dict], spec: dict) -> list[dict]:
+        groups: dict[tuple, dict] = {}
+        for doc in docs:
+            key = evaluate(spec["_id"], doc)
+            group = groups.setdefault(sort_key(key), {"_id": key})
+            for field, accumulator in spec.items():
+                if field == "_id":
+                    continue
+                (op, expr), = accumulator.items()
+                value = evaluate(expr, doc)
+                if op == "$sum":
+                    group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0)
+                elif op == "$min":
+                    if value is not None and (field not in group or sort_key(value) < sort_key(group[field])):
+                        group[field] = value
+                elif op == "$max":
+                    if value is not None and (field not in group or sort_key(value) > sort_key(group[field])):
+                        group[field] = value
+                elif op == "$first":
+                    group.setdefault(field, value)
+                elif op == "$last":
+                    group[field] = value
+                elif op == "$push":
+                    group.setdefault(field, []).append(value)
+                else:
+                    raise OperationFailure(f"Unsupported accumulator {op} in the memory storage backend")
+        return list(groups.values())
+
+    # Writes
+
+    def _insert(self, doc: dict) -> Any:
+        if "_id" not in doc:
+            # Like pymongo, the caller's document gets its generated _id
+            doc["_id"] = ObjectId()
+        self._store(None, _store_value(doc))
+        return doc["_id"]
+
+    def _update(self, query: dict, update: Any, upsert: bool, multi: bool) -> dict:
+        """Apply an update; returns the raw result fields of UpdateResult."""
+        self._expire()
+        targets = list(self._matching(query)) if multi else [self._first(query)]
+        targets = [doc for doc in targets if doc is not None]
+        if not targets:
+            if not upsert:
+                return {"n": 0, "nModified": 0}
+            doc = apply_update(_upsert_seed(query), update, inserting=True)
+            upserted_id = self._insert(doc)
+            return {"n": 1, "nModified": 0, "upserted": upserted_id}
+
+        modified = 0
+        for doc in targets:
+            new = apply_update(doc, update)
+            if sort_key(new.get("_id")) != sort_key(doc["_id"]):
+                raise WriteError("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+            if new != doc:
+                self._store(doc, new)
+                modified += 1
+        return {"n": len(targets), "nModified": modified}
+
+    def _replace(self, query: dict, replacement: dict, upsert: bool) -> dict:
+        self._expire()
+        doc = self._first(query)
+        if doc is None:
+            if not upsert:
+                return {"n": 0, "nModified": 0}
+            new = {**_upsert_seed(query), **replacement}
+            return {"n": 1, "nModified": 0, "upserted": self._insert(new)}
+        new = _store_value({**replacement, "_id": doc["_id"]})
+        if new != doc:
+            self._store(doc, new)
+            return {"n": 1, "nModified": 1}
+        return {"n": 1, "nModified": 0}
+
+    def _delete(self, query: dict, multi: bool) -> int:
+        self._expire()
+        targets = list(self._matching(query)) if multi else [self._first(query)]
+        targets = [doc for doc in targets if doc is not None]
+        for doc in targets:
+            self._store(doc, None)
+        return len(targets)
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        with self._command("insert"):
+            self._expire()
+            return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True) -> InsertManyResult:
+        return InsertManyResult(await self._bulk([InsertOne(doc) for doc in documents], ordered, ids=True), True)
+
+    async def update_one(self, filter: dict, update: Any, upsert: bool = False) -> UpdateResult:
+        with self._command("update"):
+            return UpdateResult(self._update(filter, update, upsert, multi=False), True)
+
+    async def update_many(self, filter: dict, update: Any, upsert: bool = False) -> UpdateResult:
+        with self._command("update"):
+            return UpdateResult(self._update(filter, update, upsert, multi=True), True)
+
+    async def replace_one(self, filter: dict, replacement: dict, upsert: bool = False) -> UpdateResult:
+        with self._command("update"):
+            return UpdateResult(self._replace(filter, replacement, upsert), True)
+
+    async def delete_one(self, filter: dict) -> DeleteResult:
+        with self._command("delete"):
+            return DeleteResult({"n": self._delete(filter, multi=False)}, True)
+
+    async def delete_many(self, filter: dict) -> DeleteResult:
+        with self._command("delete"):
+            return DeleteResult({"n": self._delete(filter, multi=True)}, True)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: Any,
+        projection: Any = None,
+        sort: Any = None,
+        upsert: bool = False,
+        return_document: bool = False
+    ) -> Optional[dict]:
+        with self._command("findAndModify"):
+            return self._find_one_and_update(filter, update, projection, sort, upsert, return_document)
+
+    def _find_one_and_update(
+        self, filter: dict, update: Any, projection: Any, sort: Any, upsert: bool, return_document: bool
+    ) -> Optional[dict]:
+        self._expire()
+        doc = self._first(filter, sort)
+        if doc is None:
+            if not upsert:
+                return None
+            doc_id = self._insert(apply_update(_upsert_seed(filter), update, inserting=True))
+            return project(self.docs[doc_id], projection) if return_document else None
+        new = apply_update(doc, update)
+        if sort_key(new.get("_id")) != sort_key(doc["_id"]):
+            raise WriteError("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+        if new != doc:
+            self._store(doc, new)
+        return project(new if return_document else doc, projection)
+
+    async def find_one_and_delete(self, filter: dict, projection: Any = None, sort: Any = None) -> Optional[dict]:
+        with self._command("findAndModify"):
+            self._expire()
+            doc = self._first(filter, sort)
+            if doc is None:
+                return None
+            self._store(doc, None)
+            return project(doc, projection)
+
+    async def bulk_write(self, requests: list, ordered: bool = True) -> BulkWriteResult:
+        return BulkWriteResult(await self._bulk(requests, ordered), True)
+
+    async def _bulk(self, requests: list, ordered: bool, ids: bool = False) -> Any:
+        """
+        Run write operations, reporting failures like a MongoDB bulk write.
+
+        Like the driver, one command is issued per batch of operations of
+        the same kind: per run of them when ordered, per kind otherwise.
+
+        Returns:
+            The bulk_api_result, or the inserted ids when ids is set
+
+        Raises:
+            BulkWriteError: If any operation failed
+        """
+        self._expire()
+        result = {
+            "writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+            "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+        }
+        inserted_ids = []
+        for kind, batch in _write_batches(requests, ordered):
+            with self._command(kind):
+                stopped = self._run_batch(batch, ordered, result, inserted_ids)
+            if stopped:
+                break
+        if result["writeErrors"]:
+            result["writeErrors"].sort(key=lambda error: error["index"])
+            raise BulkWriteError(result)
+        return inserted_ids if ids else result
+
+    def _run_batch(self, batch: list[tuple[int, Any]], ordered: bool, result: dict, inserted_ids: list) -> bool:
+        """Apply one batch of a bulk write; returns whether an ordered write stopped on an error."""
+        for position, request in batch:
+            try:
+                if isinstance(request, InsertOne):
+                    inserted_ids.append(self._insert(request._doc))
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    if isinstance(request, ReplaceOne):
+                        raw = self._replace(request._filter, request._doc, request._upsert)
+                    else:
+                        raw = self._update(
+                            request._filter, request._doc, bool(request._upsert), isinstance(request, UpdateMany)
+                        )
+                    if "upserted" in raw:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": position, "_id": raw["upserted"]})
+                    else:
+                        result["nMatched"] += raw["n"]
+                        result["nModified"] += raw["nModified"]
+                else:
+                    result["nRemoved"] += self._delete(request._filter, isinstance(request, DeleteMany))
+            except (DuplicateKeyError, WriteError) as e:
+                result["writeErrors"].append({
+                    "index": position, "code": e.code, "errmsg": str(e), "op": getattr(request, "_doc", None)
+                })
+                if ordered:
+                    return True
+        return False
+
+    # Indexes
+
+    def _add_index(self, keys: list[tuple[str, Any]], options: dict) -> str:
+        options = {key: value for key, value in options.items() if key != "name"}
+        name = options.pop("_name")
+        current = self.indexes.get(name)
+        if current is not None:
+            if current.keys != keys:
+                raise OperationFailure(f"An index named {name} already exists with different keys", 86)
+            return name
+        index = _Index(name, keys, options)
+        for doc in self.docs.values():
+            if index.conflict(doc) is not None:
+                raise self._duplicate(name, doc)
+            index.add(doc)
+        self.indexes[name] = index
+        return name
+
+    async def create_indexes(self, indexes: list) -> list[str]:
+        names = []
+        with self._command("createIndexes"):
+            for model in indexes:
+                spec = dict(model.document)
+                keys = list(spec.pop("key").items())
+                names.append(self._add_index(keys, {**spec, "_name": spec["name"]}))
+        return names
+
+    async def create_index(self, keys: Any, **kwargs) -> str:
+        keys = _normalize_keys(keys)
+        with self._command("createIndexes"):
+            return self._add_index(keys, {**kwargs, "_name": kwargs.get("name") or _index_name(keys)})
+
+    def list_indexes(self) -> MemoryCommandCursor:
+        with self._command("listIndexes"):
+            indexes = [{"v": 2, "key": {"_id": 1}, "name": "_id_"}]
+            return MemoryCommandCursor(indexes + [index.describe() for index in self.indexes.values()])
+
+    async def index_information(self) -> dict:
+        return {
+            index["name"]: {**index, "key": list(index["key"].items())}
+            async for index in self.list_indexes()
+        }
+
+    async def drop_index(self, name: str):
+        with self._command("dropIndexes"):
+            if self.indexes.pop(name, None) is None:
+                raise OperationFailure(f"index not found with name [{name}]", 27)
+
+    async def drop(self):
+        with self._command("drop"):
+            self.docs.clear()
+            self.indexes.clear()
+            self.database.collections.pop(self.name, None)
+
+
+class MemoryDatabase:
+    """A database of in-memory collections, with the Motor database API."""
+
+    def __init__(self, client: "MemoryClient", name: str):
+        self.client = client
+        self.name = name
+        self.collections: dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = MemoryCollection(self, name)
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name: str) -> MemoryCollection:
+        return self[name]
+
+    async def list_collection_names(self) -> list[str]:
+        with self.client._monitored(self.name, "listCollections", 1):
+            return list(self.collections)
+
+    async def drop_collection(self, name: str):
+        if name in self.collections:
+            await self.collections[name].drop()
+
+    async def command(self, command: Any, **kwargs) -> dict:
+        """
+        Run the database commands the application issues.
+
+        Raises:
+            OperationFailure: For commands the memory backend does not support
+        """
+        if isinstance(command, str):
+            command = {command: 1, **kwargs}
+        name = next(iter(command))
+        with self.client._monitored(self.name, name, command[name]):
+            return self._run_command(command, name)
+
+    def _run_command(self, command: dict, name: str) -> dict:
+        if name == "ping":
+            return {"ok": 1.0}
+        if name == "collMod":
+            change = command.get("index", {})
+            index = self[command["collMod"]].indexes.get(change.get("name"))
+            if index is None:
+                raise OperationFailure("cannot find index", 27)
+            if "expireAfterSeconds" in change:
+                index.ttl = index.options["expireAfterSeconds"] = change["expireAfterSeconds"]
+            return {"ok": 1.0}
+        if name == "dropDatabase":
+            self.collections.clear()
+            return {"ok": 1.0}
+        raise OperationFailure(f"Command {name} is not supported by the memory storage backend")
+
+
+class _CommandEvent:
+    """What command listeners read from pymongo's command events."""
+
+    def __init__(self, name: str, database: str, target: Any, request_id: int):
+        self.command_name = name
+        self.command = {name: target}
+        self.database_name = database
+        self.request_id = self.operation_id = request_id
+        self.connection_id = ("memory", 0)
+        self.duration_micros = 0
+        self.reply: dict = {"ok": 1.0}
+        self.failure: Optional[dict] = None
+
+
+class MemoryClient:
+    """In-process stand-in for AsyncIOMotorClient."""
+
+    def __init__(self, event_listeners: Iterable = ()):
+        self.databases: dict[str, MemoryDatabase] = {}
+        self.command_listeners = [
+            listener for listener in event_listeners if isinstance(listener, monitoring.CommandListener)
+        ]
+        self.request_ids = itertools.count(1)
+
+    @contextmanager
+    def _monitored(self, database: str, name: str, target: Any):
+        """Report the enclosed operation to the command listeners as one command."""
+        if not self.command_listeners:
+            yield
+            return
+        event = _CommandEvent(name, database, target, next(self.request_ids))
+        for listener in self.command_listeners:
+            listener.started(event)
+        start = time.perf_counter()
+        try:
+            yield
+        except (DuplicateKeyError, WriteError, BulkWriteError):
+            # Write errors come back in a successful reply
+            event.duration_micros = int((time.perf_counter() - start) * 1e6)
+            for listener in self.command_listeners:
+                listener.succeeded(event)
+            raise
+        except Exception as e:
+            event.duration_micros = int((time.perf_counter() - start) * 1e6)
+            event.failure = {"errmsg": str(e)}
+            for listener in self.command_listeners:
+                listener.failed(event)
+            raise
+        event.duration_micros = int((time.perf_counter() - start) * 1e6)
+        for listener in self.command_listeners:
+            listener.succeeded(event)
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self.databases.get(name)
+        if database is None:
+            database = self.databases[name] = MemoryDatabase(self, name)
+        return database
+
+    def get_database(self, name: str) -> MemoryDatabase:
+        return self[name]
+
+    async def drop_database(self, name: str):
+        self.databases.pop(name, None)
+
+    def close(self):
+        pass
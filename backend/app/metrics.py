@@ -0,0 +1,348 @@
+"""
+Metrics Module
+
+This module collects performance metrics and renders them in the
+Prometheus text exposition format:
+- Per-route request counts, latency histograms and in-flight gauge,
+  recorded by ASGI middleware
+- MongoDB command counts and durations by command and collection, and
+  connection pool gauges, recorded by pymongo event listeners
+- Password hashing durations
+- Dropped and sampled-out log records
+- Task archival batches, archived tasks and archive lag
+- Idempotency-Key outcomes
+- Reminders fired and failed, scheduled reminders and firing delay
+
+Metrics are updated from the event loop and from driver threads. Each
+thread writes to its own shard of every metric, so recording takes no
+lock; shards are only merged when /metrics is rendered.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Iterable
+from pymongo import monitoring
+
+# Default latency buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric(ABC):
+    """Base class for labelled metrics with per-thread shards."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.local = threading.local()
+        self.shards: list[dict] = []
+        self.lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.lock:
+                self.shards.append(values)
+            return values
+
+    def _snapshots(self) -> list[dict]:
+        with self.lock:
+            shards = list(self.shards)
+        # dict.copy runs entirely under the GIL, so it is safe against
+        # concurrent writers
+        return [shard.copy() for shard in shards]
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Render the metric's samples as exposition format lines."""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        values = self._shard()
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def totals(self) -> dict[tuple[str, ...], float]:
+        """Current value of every label set, summed over the shards."""
+        totals: dict[tuple[str, ...], float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, labels)} {value}" for labels, value in self.totals().items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        # Shards are summed on render, so a gauge that is set must only
+        # be written from one thread
+        self._shard()[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str):
+        # Each series is [per-bucket counts..., +Inf count, sum]
+        values = self._shard()
+        series = values.get(labels)
+        if series is None:
+            series = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        totals: dict[tuple[str, ...], list[float]] = {}
+        for shard in self._snapshots():
+            for labels, series in shard.items():
+                series = list(series)
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = series
+                else:
+                    totals[labels] = [a + b for a, b in zip(merged, series)]
+
+        lines = self.header()
+        for labels, series in totals.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labels, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            bucket_labels = _format_labels(self.labels, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ("route",)
+))
+mongo_commands = registry.register(Counter(
+    "mongodb_commands_total", "MongoDB commands sent", ("command", "collection", "outcome")
+))
+mongo_duration = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection")
+))
+mongo_pool_connections = registry.register(Gauge(
+    "mongodb_pool_connections", "Open connections in the MongoDB pool", ("address",)
+))
+mongo_pool_checked_out = registry.register(Gauge(
+    "mongodb_pool_checked_out", "MongoDB connections checked out of the pool", ("address",)
+))
+password_hash_duration = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hashing and verification time", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5)
+))
+log_records_dropped = registry.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full"
+))
+log_records_suppressed = registry.register(Counter(
+    "log_records_suppressed_total", "Repeated log records suppressed by sampling", ("logger",)
+))
+archive_batches = registry.register(Counter(
+    "task_archive_batches_total", "Task archival batches run", ("outcome",)
+))
+archive_batch_duration = registry.register(Histogram(
+    "task_archive_batch_duration_seconds", "Task archival batch duration",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+tasks_archived = registry.register(Counter(
+    "tasks_archived_total", "Tasks moved to the archive"
+))
+archive_lag = registry.register(Gauge(
+    "task_archive_lag_seconds", "How long the oldest archivable task has been waiting to be archived"
+))
+idempotent_requests = registry.register(Counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",)
+))
+reminders_fired = registry.register(Counter(
+    "reminders_fired_total", "Reminders delivered to the sink", ("sink",)
+))
+reminders_failed = registry.register(Counter(
+    "reminders_failed_total", "Reminders the sink failed to deliver", ("sink",)
+))
+reminder_heap_size = registry.register(Gauge(
+    "reminders_scheduled", "Reminders held in the scheduler's time window"
+))
+reminder_fire_delay = registry.register(Histogram(
+    "reminder_fire_delay_seconds", "Delay between a reminder's due time and its delivery",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The route template is only known after routing, so the in-flight
+        # gauge is keyed by the raw path's first segment
+        section = "/" + scope["path"].split("/", 2)[1] if scope["path"] != "/" else "/"
+        http_in_flight.inc(section)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec(section)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_requests.inc(scope["method"], route_path, str(status_code))
+            http_duration.observe(elapsed, scope["method"], route_path)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo listener recording command counts and durations."""
+
+    def __init__(self):
+        self.collections: dict[tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self.collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        mongo_commands.inc(event.command_name, collection, outcome)
+        mongo_duration.observe(event.duration_micros / 1e6, event.command_name, collection)
+
+    def succeeded(self, event):
+        self._finish(event, "succeeded")
+
+    def failed(self, event):
+        self._finish(event, "failed")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """pymongo listener tracking connection pool usage."""
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(self._address(event))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.inc(self._address(event))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(self._address(event))
+
+
+def mongo_event_listeners() -> list:
+    """Listeners to register on the MongoDB client."""
+    return [CommandMetrics(), PoolMetrics()]
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the text exposition format."""
+    return registry.render()
@@ -0,0 +1,290 @@
+"""
+Migration Module
+
+This module owns the database schema:
+- Declared indexes for every collection, applied idempotently
+- Versioned migrations for one-off data changes, recorded in the
+  schema_migrations collection so each runs once
+- Index verification, used by workers at startup to warn on drift and
+  pending migrations without blocking or failing the boot
+
+Usage (from backend/):
+    python -m app.migrate            # Apply pending migrations and indexes
+    python -m app.migrate status     # Show migrations and index drift
+    python -m app.migrate verify     # Exit with status 1 on index drift
+
+`python -m app.serve --migrate` applies them before starting the workers,
+for platforms without a release phase.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable
+from pymongo import IndexModel
+from .config import settings
+from .database import Database
+from .pagination import TASK_SORT_FIELDS
+from .repository import ARCHIVE_PENDING_FIELD
+
+logger = logging.getLogger(__name__)
+
+
+def declared_indexes() -> dict[str, list[IndexModel]]:
+    """
+    Indexes every collection should have.
+
+    Returns:
+        dict: Collection name to its index models
+    """
+    tasks = [
+        # Per-user reads in _id order, such as export
+        IndexModel([("user_id", 1), ("_id", 1)]),
+        # Task filtering
+        IndexModel([("user_id", 1), ("completed", 1), ("due_date", 1), ("_id", 1)]),
+        # Per-user text index for task search
+        IndexModel(
+            [("user_id", 1), ("title", "text"), ("description", "text")],
+            weights={"title": 3, "description": 1},
+            name="tasks_text_search"
+        ),
+        # Archival candidates (see app.archive); partial, so only completed
+        # tasks are indexed
+        IndexModel(
+            [("completed", 1), ("updated_at", 1)],
+            partialFilterExpression={"completed": True},
+            name="tasks_archivable"
+        ),
+        # Upcoming due dates for the reminder scheduler (see app.reminders)
+        IndexModel(
+            [("due_date", 1), ("_id", 1)],
+            partialFilterExpression={"completed": False},
+            name="tasks_upcoming_due"
+        ),
+    ]
+    # Keyset pagination, with and without the completed filter, for every
+    # selectable sort field. Listings are hinted to these (see
+    # app.filters.listing_index); range filters on other fields are applied
+    # during the ordered index walk.
+    archive = [IndexModel(ARCHIVE_PENDING_FIELD, sparse=True)]
+    for field in TASK_SORT_FIELDS:
+        tasks.append(IndexModel([("user_id", 1), (field, 1), ("_id", 1)]))
+        # Archived tasks are all completed
+        archive.append(IndexModel([("user_id", 1), (field, 1), ("_id", 1)]))
+        if field != "due_date":
+            tasks.append(IndexModel([("user_id", 1), ("completed", 1), (field, 1), ("_id", 1)]))
+
+    return {
+        "users": [IndexModel("email", unique=True)],
+        "tasks": tasks,
+        "tasks_archive": archive,
+        # Drop revocation records once the revoked token has expired
+        "revoked_tokens": [IndexModel("expires_at", expireAfterSeconds=0)],
+        # Stored Idempotency-Key responses expire on their own
+        "idempotency_keys": [IndexModel("expires_at", expireAfterSeconds=0)],
+        # Fired reminders are remembered until a day after their due date
+        "reminder_claims": [IndexModel("expires_at", expireAfterSeconds=0)],
+        # The TTL index compacts old change log entries
+        "task_changes": [
+            IndexModel([("user_id", 1), ("seq", 1)]),
+            IndexModel("at", expireAfterSeconds=settings.change_log_retention_seconds),
+        ],
+    }
+
+
+# Indexes created by earlier releases and now covered by a declared index
+# with the same prefix; dropped by migration 3
+OBSOLETE_INDEXES = {
+    "tasks": ["user_id_1", "user_id_1_completed_1_due_date_1"],
+}
+
+
+async def _existing_indexes(collection: str) -> dict[str, dict]:
+    db = Database.get_db()
+    return {index["name"]: index async for index in db[collection].list_indexes()}
+
+
+async def apply_indexes():
+    """
+    Create missing indexes and update changed TTLs. Safe to run repeatedly.
+    """
+    db = Database.get_db()
+    for collection, models in declared_indexes().items():
+        existing = await _existing_indexes(collection)
+        for model in models:
+            spec = model.document
+            current = existing.get(spec["name"])
+            # create_index rejects a changed TTL, so it is updated in place
+            if (
+                current is not None
+                and "expireAfterSeconds" in spec
+                and current.get("expireAfterSeconds") != spec["expireAfterSeconds"]
+            ):
+                await db.command({
+                    "collMod": collection,
+                    "index": {"name": spec["name"], "expireAfterSeconds": spec["expireAfterSeconds"]}
+                })
+                logger.info("✅ Updated TTL of %s.%s", collection, spec['name'])
+        await db[collection].create_indexes(models)
+    logger.info("✅ Database indexes are up to date")
+
+
+async def verify_indexes() -> list[str]:
+    """
+    Compare the database's indexes with the declared ones.
+
+    Returns:
+        list: One message per missing or obsolete index, or changed TTL
+    """
+    drift = []
+    for collection, models in declared_indexes().items():
+        existing = await _existing_indexes(collection)
+        for name in OBSOLETE_INDEXES.get(collection, ()):
+            if name in existing:
+                drift.append(f"{collection}.{name} is obsolete")
+        for model in models:
+            spec = model.document
+            current = existing.get(spec["name"])
+            if current is None:
+                drift.append(f"{collection}.{spec['name']} is missing")
+            elif "expireAfterSeconds" in spec and current.get("expireAfterSeconds") != spec["expireAfterSeconds"]:
+                drift.append(
+                    f"{collection}.{spec['name']} expires after {current.get('expireAfterSeconds')}s, "
+                    f"expected {spec['expireAfterSeconds']}s"
+                )
+    return drift
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    run: Callable[[], Awaitable[None]]
+
+
+async def _backfill_task_counters():
+    # Users created before the task list version and counters existed
+    from .stats import TaskStats
+    db = Database.get_db()
+    await db.users.update_many({"tasks_version": {"$exists": False}}, {"$set": {"tasks_version": 0}})
+    await TaskStats.reconcile(confirm=False)
+
+
+async def _backfill_updated_at():
+    # Archival selects completed tasks by updated_at
+    await Database.get_db().tasks.update_many(
+        {"completed": True, "updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": "$created_at"}}]
+    )
+
+
+async def _drop_obsolete_indexes():
+    db = Database.get_db()
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await _existing_indexes(collection)
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info("✅ Dropped obsolete index %s.%s", collection, name)
+
+
+# Versioned migrations, in order. Each must be safe to re-run, since a
+# failure after it finishes but before it is recorded runs it again.
+MIGRATIONS = [
+    Migration(1, "Backfill task list versions and counters on existing users", _backfill_task_counters),
+    Migration(2, "Backfill updated_at on completed tasks that never had one", _backfill_updated_at),
+    Migration(3, "Drop task indexes covered by the keyset pagination indexes", _drop_obsolete_indexes),
+]
+
+
+async def applied_versions() -> set[int]:
+    """
+    Versions recorded as applied.
+
+    Returns:
+        set: Applied migration versions
+    """
+    cursor = Database.get_db().schema_migrations.find({}, {"_id": 1})
+    return {doc["_id"] async for doc in cursor}
+
+
+async def pending_migrations() -> list[Migration]:
+    """
+    Migrations not yet recorded as applied.
+
+    Returns:
+        list: Pending migrations, in order
+    """
+    applied = await applied_versions()
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+async def migrate():
+    """Apply pending migrations in order, then the declared indexes."""
+    db = Database.get_db()
+    for migration in await pending_migrations():
+        logger.info("Applying migration %s: %s", migration.version, migration.description)
+        await migration.run()
+        await db.schema_migrations.replace_one(
+            {"_id": migration.version},
+            {"description": migration.description, "applied_at": datetime.utcnow()},
+            upsert=True
+        )
+    await apply_indexes()
+
+
+async def _status() -> int:
+    applied = await applied_versions()
+    for migration in MIGRATIONS:
+        state = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version:>4}  {state:<8} {migration.description}")
+    drift = await verify_indexes()
+    for message in drift:
+        print(f"index drift: {message}")
+    if not drift:
+        print("indexes: up to date")
+    return 0
+
+
+async def _run(command: str) -> int:
+    await Database.connect_to_database(check_indexes=False)
+    try:
+        if command == "apply":
+            await migrate()
+            return 0
+        if command == "status":
+            return await _status()
+        drift = await verify_indexes()
+        for message in drift:
+            print(f"index drift: {message}")
+        return 1 if drift else 0
+    finally:
+        await Database.close_database_connection()
+
+
+def run(command: str = "apply") -> int:
+    """
+    Run a schema command in its own event loop.
+
+    Args:
+        command: "apply", "status" or "verify"
+
+    Returns:
+        int: Exit status
+    """
+    return asyncio.run(_run(command))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the TodoList database schema")
+    parser.add_argument("command", nargs="?", choices=("apply", "status", "verify"), default="apply")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(run(args.command))
+
+
+if __name__ == "__main__":
+    main()
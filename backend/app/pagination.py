@@ -0,0 +1,132 @@
+"""
+Pagination Module
+
+This module implements keyset (cursor) pagination for task listings:
+- Opaque cursor tokens encoding the last seen sort value and _id
+- Query filters that resume right after the cursor position
+- Sort specifications with _id as a tiebreaker
+
+Keyset pages are served straight from the (user_id, <sort field>, _id)
+indexes, so deep pages cost the same as the first one.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+from bson import ObjectId
+
+# Fields clients may sort task listings by. Each one has matching indexes
+# declared in app.migrate.
+TASK_SORT_FIELDS = ("due_date", "created_at", "updated_at", "title")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token cannot be decoded or does not match the query."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc: dict, sort: str, order: str) -> str:
+    """
+    Build an opaque cursor pointing right after a document.
+
+    Args:
+        doc: The last document of the current page
+        sort: The sort field used for the listing
+        order: The sort order ("asc" or "desc")
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = {
+        "s": sort,
+        "o": order,
+        "v": _encode_value(doc.get(sort)),
+        "id": str(doc["_id"])
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: str, order: str) -> tuple[Any, ObjectId]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token: The cursor token
+        sort: The sort field of the current request
+        order: The sort order of the current request
+
+    Returns:
+        tuple: The last sort value and the last _id
+
+    Raises:
+        InvalidCursorError: If the token is malformed or was issued for a
+            different sort
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        value = _decode_value(payload["v"])
+        last_id = ObjectId(payload["id"])
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return value, last_id
+
+
+def keyset_filter(sort: str, order: str, value: Any, last_id: ObjectId) -> dict:
+    """
+    Build the filter selecting documents after a cursor position.
+
+    Null sort values (tasks without a due date) sort before every other
+    value in MongoDB, so they are handled explicitly.
+
+    Args:
+        sort: The sort field
+        order: The sort order ("asc" or "desc")
+        value: The sort value of the last returned document
+        last_id: The _id of the last returned document
+
+    Returns:
+        dict: MongoDB filter to combine with the listing query
+    """
+    op = "$gt" if order == "asc" else "$lt"
+    same_value = {sort: value, "_id": {op: last_id}}
+
+    if value is None:
+        if order == "asc":
+            return {"$or": [same_value, {sort: {"$ne": None}}]}
+        return same_value
+
+    clauses = [{sort: {op: value}}, same_value]
+    if order == "desc":
+        clauses.append({sort: None})
+    return {"$or": clauses}
+
+
+def sort_spec(sort: str, order: str) -> list[tuple[str, int]]:
+    """
+    Build the sort specification for a listing.
+
+    Args:
+        sort: The sort field
+        order: The sort order ("asc" or "desc")
+
+    Returns:
+        list: MongoDB sort keys with _id as tiebreaker
+    """
+    direction = 1 if order == "asc" else -1
+    return [(sort, direction), ("_id", direction)]
@@ -0,0 +1,163 @@
+"""
+Pub/Sub Module
+
+This module fans task change events out to connected stream clients:
+- A Broker interface so another backend (e.g. a MongoDB change stream)
+  can replace the default one
+- An in-process asyncio implementation with a bounded queue per
+  subscription
+- Slow consumers either lose events or get disconnected, depending on
+  configuration, so one stuck client never grows memory unbounded
+- Heartbeats are sent to all subscriptions from a single periodic task
+  instead of one timer per connection
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue item telling a subscription's reader to stop
+CLOSE = object()
+
+
+class Subscription:
+    """A single client's view of a user's event stream."""
+    __slots__ = ("user_id", "queue", "closed", "dropped")
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+        self.dropped = 0
+
+    def close(self):
+        """Discard pending events and tell the reader to stop."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSE)
+
+    async def get(self) -> Any:
+        """Wait for the next event, or CLOSE."""
+        return await self.queue.get()
+
+
+class Broker(ABC):
+    """Interface for task event brokers."""
+
+    @abstractmethod
+    async def publish(self, user_id: str, event: dict):
+        """Deliver an event to every subscription of a user."""
+
+    @abstractmethod
+    def subscribe(self, user_id: str) -> Subscription:
+        """Open a subscription to a user's events."""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        """Close a subscription and release its resources."""
+
+    async def start(self):
+        """Start background work, if any."""
+
+    async def stop(self):
+        """Stop background work and close all subscriptions."""
+
+
+class InProcessBroker(Broker):
+    """Broker delivering events to subscriptions in this process only."""
+
+    def __init__(self):
+        self.subscriptions: dict[str, set[Subscription]] = {}
+        self.heartbeat_task: Optional[asyncio.Task] = None
+
+    def connection_count(self) -> int:
+        return sum(len(subs) for subs in self.subscriptions.values())
+
+    def _offer(self, subscription: Subscription, event: dict):
+        if subscription.closed:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if settings.stream_slow_consumer_policy == "disconnect":
+                logger.warning("Disconnecting slow stream consumer for user %s", subscription.user_id)
+                self.unsubscribe(subscription)
+            else:
+                subscription.dropped += 1
+
+    async def publish(self, user_id: str, event: dict):
+        for subscription in list(self.subscriptions.get(user_id, ())):
+            self._offer(subscription, event)
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, settings.stream_queue_size)
+        self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        subs = self.subscriptions.get(subscription.user_id)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del self.subscriptions[subscription.user_id]
+
+    async def _heartbeat_loop(self):
+        event = {"type": "heartbeat"}
+        while True:
+            await asyncio.sleep(settings.stream_heartbeat_seconds)
+            for subs in list(self.subscriptions.values()):
+                for subscription in list(subs):
+                    # A full queue already has data on its way; skip it
+                    if not subscription.closed and not subscription.queue.full():
+                        subscription.queue.put_nowait(event)
+
+    async def start(self):
+        if self.heartbeat_task is None:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            try:
+                await self.heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self.heartbeat_task = None
+        for subs in list(self.subscriptions.values()):
+            for subscription in list(subs):
+                self.unsubscribe(subscription)
+
+
+# Available broker implementations, selected by Settings.pubsub_backend
+BROKERS = {
+    "memory": InProcessBroker,
+}
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    """
+    Get the configured broker, creating it on first use.
+
+    Returns:
+        Broker: The process-wide broker
+
+    Raises:
+        ValueError: If Settings.pubsub_backend names an unknown broker
+    """
+    global _broker
+    if _broker is None:
+        try:
+            _broker = BROKERS[settings.pubsub_backend]()
+        except KeyError:
+            raise ValueError(f"Unknown pubsub backend: {settings.pubsub_backend}")
+    return _broker
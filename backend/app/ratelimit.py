@@ -0,0 +1,241 @@
+"""
+Rate Limiting Module
+
+This module implements admission control as ASGI middleware:
+- Token buckets per client IP, per authenticated user and per client IP
+  and account, configured per route group (auth, tasks) in
+  Settings.rate_limits
+- A global limit on requests in flight
+- Fast 429/503 responses with Retry-After instead of queueing
+
+Buckets live in a BucketStore; the default one is in-memory and
+per-process, and the interface allows a store shared across workers.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+from abc import ABC, abstractmethod
+from typing import Optional
+from jose import JWTError, jwt
+from .config import settings, RateLimit
+
+
+class BucketStore(ABC):
+    """Interface for token bucket storage."""
+
+    @abstractmethod
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key: The bucket key
+            limit: Refill rate and capacity of the bucket
+            cost: Tokens to take
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they
+                would be available
+        """
+
+
+class InMemoryBucketStore(BucketStore):
+    """Token buckets kept in process memory, evicting the least recently used past max_keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        # key -> (tokens, last update, seconds to refill completely), least
+        # recently used first
+        self.buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+        self.max_keys = max_keys
+
+    async def take(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            tokens = float(limit.burst)
+            if len(self.buckets) >= self.max_keys:
+                # The least recently used bucket has had the longest to refill
+                self.buckets.popitem(last=False)
+        else:
+            tokens = min(float(limit.burst), bucket[0] + (now - bucket[1]) * limit.rate)
+            self.buckets.move_to_end(key)
+        refill = limit.burst / limit.rate if limit.rate > 0 else math.inf
+
+        if tokens >= cost:
+            self.buckets[key] = (tokens - cost, now, refill)
+            return 0.0
+        self.buckets[key] = (tokens, now, refill)
+        if limit.rate <= 0:
+            return math.inf
+        return (cost - tokens) / limit.rate
+
+
+def route_group(path: str) -> Optional[str]:
+    """Map a request path to its rate limit group, if any."""
+    for prefix, group in (("/auth", "auth"), ("/tasks", "tasks")):
+        if path == prefix or path.startswith(prefix + "/"):
+            return group
+    return None
+
+
+def _token_subject(headers: list[tuple[bytes, bytes]]) -> Optional[str]:
+    """Extract the verified subject of a bearer token, without a database lookup."""
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            except JWTError:
+                return None
+            return payload.get("uid") or payload.get("sub")
+    return None
+
+
+# Largest request body read to find the account it names
+MAX_ACCOUNT_BODY = 16 * 1024
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _body_account(content_type: str, body: bytes) -> Optional[str]:
+    """The account a login (form username) or signup (JSON email) body names."""
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            account = parse_qs(body.decode())["username"][0]
+        elif content_type.startswith("application/json"):
+            account = json.loads(body)["email"]
+        else:
+            return None
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    return account.strip().lower() if isinstance(account, str) and account.strip() else None
+
+
+async def _read_account(scope: dict, receive) -> tuple[Optional[str], object]:
+    """
+    Find the account a request acts for.
+
+    The bearer token's subject is used when present; otherwise small
+    bodies are read to find the login username or signup email.
+
+    Args:
+        scope: The ASGI scope
+        receive: The ASGI receive callable
+
+    Returns:
+        tuple: The account, or None, and a receive callable that replays
+            the body if it was read
+    """
+    subject = _token_subject(scope["headers"])
+    if subject is not None:
+        return subject, receive
+    content_type = _header(scope["headers"], b"content-type") or ""
+    length = _header(scope["headers"], b"content-length")
+    if not length or not length.isdigit() or int(length) > MAX_ACCOUNT_BODY:
+        return None, receive
+
+    messages = []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request" or not message.get("more_body", False):
+            break
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return _body_account(content_type, body), replay
+
+
+def _client_ip(scope: dict) -> str:
+    if settings.rate_limit_trust_forwarded_for:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the global in-flight limit and token buckets."""
+
+    def __init__(self, app, store: Optional[BucketStore] = None):
+        self.app = app
+        self.store = store or InMemoryBucketStore()
+        self.in_flight = 0
+
+    async def _reject(self, send, status_code: int, message: str, retry_after: float):
+        body = json.dumps({
+            "success": False,
+            "message": message,
+            "status_code": status_code
+        }).encode()
+        retry = str(max(1, math.ceil(min(retry_after, 3600))))
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        group = route_group(path)
+        limits = settings.rate_limits.get(group) if group else None
+        if limits is not None:
+            if limits.per_ip is not None:
+                wait = await self.store.take(f"{group}:ip:{_client_ip(scope)}", limits.per_ip)
+                if wait:
+                    await self._reject(send, 429, "Too many requests", wait)
+                    return
+            if limits.per_user is not None:
+                subject = _token_subject(scope["headers"])
+                if subject is not None:
+                    wait = await self.store.take(f"{group}:user:{subject}", limits.per_user)
+                    if wait:
+                        await self._reject(send, 429, "Too many requests", wait)
+                        return
+            if limits.per_ip_account is not None:
+                account, receive = await _read_account(scope, receive)
+                if account is not None:
+                    wait = await self.store.take(
+                        f"{group}:ip_account:{_client_ip(scope)}:{account}", limits.per_ip_account
+                    )
+                    if wait:
+                        await self._reject(send, 429, "Too many requests", wait)
+                        return
+
+        # Long-lived streams would hold a slot for their whole lifetime
+        if path in settings.rate_limit_long_lived_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= settings.rate_limit_max_in_flight:
+            await self._reject(send, 503, "Server is busy, please retry shortly", 1)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,421 @@
+"""
+Reminders Module
+
+This module fires reminder events at configurable offsets before task
+due dates:
+- One worker, the holder of the scheduler lease, schedules reminders;
+  the others only stand by to take over
+- Upcoming deadlines are paged through the partial (due_date, _id)
+  index into an in-memory min-heap covering a sliding window, so only
+  the next few minutes of reminders are ever held in memory
+- Task writes reschedule incrementally: the leader's own writes through
+  repository hooks, other workers' writes by tailing the change log
+- Before firing, due tasks are re-read in one query, and each reminder
+  is claimed in the reminder_claims collection, so a reminder fires at
+  most once even across leader changes
+- Events go to a pluggable sink: the log, a webhook, or the task event
+  stream (Settings.reminder_sink)
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from .config import settings
+from .database import Database
+from .leases import Lease
+from .metrics import reminders_fired, reminders_failed, reminder_heap_size, reminder_fire_delay
+from .pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+# Fields read to schedule a task's reminders
+_PROJECTION = {"user_id": 1, "title": 1, "due_date": 1, "completed": 1}
+
+# Change log entries are timestamped by the writing worker's clock; the
+# tail re-reads this far back to tolerate clock skew
+_CLOCK_SKEW = timedelta(seconds=5)
+
+
+class ReminderSink(ABC):
+    """Interface for reminder event destinations."""
+
+    @abstractmethod
+    async def send(self, reminders: list[dict]):
+        """Deliver a batch of reminder events."""
+
+
+class LogSink(ReminderSink):
+    """Write reminders to the application log."""
+
+    async def send(self, reminders: list[dict]):
+        for reminder in reminders:
+            logger.info(
+                "⏰ Reminder for task %s of user %s due at %s",
+                reminder["task_id"], reminder["user_id"], reminder["due_date"]
+            )
+
+
+class WebhookSink(ReminderSink):
+    """POST each batch of reminders as JSON to Settings.reminder_webhook_url."""
+
+    def __init__(self):
+        if not settings.reminder_webhook_url:
+            raise ValueError("REMINDER_WEBHOOK_URL is required by the webhook reminder sink")
+        self.url = settings.reminder_webhook_url
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=settings.reminder_webhook_timeout_seconds):
+            pass
+
+    async def send(self, reminders: list[dict]):
+        body = json.dumps({"reminders": reminders}).encode()
+        await asyncio.to_thread(self._post, body)
+
+
+class PubSubSink(ReminderSink):
+    """Publish reminders to the owner's task event stream (/tasks/stream)."""
+
+    async def send(self, reminders: list[dict]):
+        broker = get_broker()
+        for reminder in reminders:
+            await broker.publish(reminder["user_id"], {"type": "reminder", **reminder})
+
+
+# Available sinks, selected by Settings.reminder_sink
+SINKS = {
+    "log": LogSink,
+    "webhook": WebhookSink,
+    "pubsub": PubSubSink,
+}
+
+_sink: Optional[ReminderSink] = None
+
+
+def get_sink() -> ReminderSink:
+    """
+    Get the configured reminder sink, creating it on first use.
+
+    Returns:
+        ReminderSink: The process-wide sink
+
+    Raises:
+        ValueError: If Settings.reminder_sink names an unknown sink
+    """
+    global _sink
+    if _sink is None:
+        try:
+            sink_class = SINKS[settings.reminder_sink]
+        except KeyError:
+            raise ValueError(f"Unknown reminder sink: {settings.reminder_sink}")
+        _sink = sink_class()
+    return _sink
+
+
+@dataclass(eq=False)
+class _Reminder:
+    task_id: ObjectId
+    user_id: str
+    title: str
+    due_date: datetime
+    offset_minutes: int
+    fire_at: datetime
+    cancelled: bool = False
+
+    def claim_id(self) -> str:
+        return f"{self.task_id}:{self.offset_minutes}:{self.due_date.isoformat()}"
+
+    def event(self) -> dict:
+        return {
+            "task_id": str(self.task_id),
+            "user_id": self.user_id,
+            "title": self.title,
+            "due_date": self.due_date.isoformat(),
+            "offset_minutes": self.offset_minutes,
+        }
+
+
+class ReminderScheduler:
+    loop_task: Optional[asyncio.Task] = None
+    lease: Optional[Lease] = None
+    leading: bool = False
+    wakeup: Optional[asyncio.Event] = None
+    # (fire_at, sequence, reminder); cancelled reminders are skipped when popped
+    heap: list[tuple[datetime, int, _Reminder]] = []
+    by_task: dict[ObjectId, list[_Reminder]] = {}
+    dirty: set[ObjectId] = set()
+    sequence = itertools.count()
+    covered_until: Optional[datetime] = None
+    next_refill: Optional[datetime] = None
+    changes_since: Optional[datetime] = None
+    next_poll: Optional[datetime] = None
+
+    @classmethod
+    def _tasks(cls):
+        return Database.get_db().tasks
+
+    @classmethod
+    def _reset(cls):
+        cls.leading = False
+        cls.heap = []
+        cls.by_task = {}
+        cls.dirty = set()
+        cls.covered_until = None
+        reminder_heap_size.set(value=0)
+
+    @classmethod
+    def _push(cls, doc: dict, offset: int, since: datetime, until: datetime):
+        """Schedule one reminder of a task if it fires within [since, until)."""
+        due_date = doc["due_date"]
+        fire_at = due_date - timedelta(minutes=offset)
+        if not since <= fire_at < until:
+            return
+        scheduled = cls.by_task.setdefault(doc["_id"], [])
+        if any(r.offset_minutes == offset and r.due_date == due_date for r in scheduled):
+            return
+        reminder = _Reminder(doc["_id"], str(doc["user_id"]), doc.get("title", ""), due_date, offset, fire_at)
+        scheduled.append(reminder)
+        if not cls.heap or fire_at < cls.heap[0][0]:
+            cls.wakeup.set()
+        heapq.heappush(cls.heap, (fire_at, next(cls.sequence), reminder))
+
+    @classmethod
+    def _cancel(cls, task_id: ObjectId):
+        for reminder in cls.by_task.pop(task_id, ()):
+            reminder.cancelled = True
+
+    @classmethod
+    def on_change(cls, task_ids: Iterable[ObjectId]):
+        """
+        Reschedule tasks that were created, updated or deleted.
+
+        Called by the repository after every task write; only the leader
+        acts on it. The tasks are re-read by the scheduler loop.
+
+        Args:
+            task_ids: The changed tasks
+        """
+        if not cls.leading:
+            return
+        cls.dirty.update(task_ids)
+        cls.wakeup.set()
+
+    @classmethod
+    async def _refill(cls, now: datetime):
+        """Page the reminders between the covered time and now + window into the heap."""
+        until = now + timedelta(seconds=settings.reminder_window_seconds)
+        since = cls.covered_until
+        page_size = settings.reminder_page_size
+        for offset in settings.reminder_offsets_minutes:
+            low = since + timedelta(minutes=offset)
+            high = until + timedelta(minutes=offset)
+            last = None
+            while True:
+                query = {"completed": False, "due_date": {"$gte": low, "$lt": high}}
+                if last is not None:
+                    query["$or"] = [
+                        {"due_date": {"$gt": last["due_date"]}},
+                        {"due_date": last["due_date"], "_id": {"$gt": last["_id"]}},
+                    ]
+                cursor = cls._tasks().find(query, _PROJECTION).sort([("due_date", 1), ("_id", 1)]).limit(page_size)
+                docs = [doc async for doc in cursor]
+                for doc in docs:
+                    cls._push(doc, offset, since, until)
+                if len(docs) < page_size:
+                    break
+                last = docs[-1]
+        cls.covered_until = until
+        cls.next_refill = now + timedelta(seconds=settings.reminder_window_seconds / 2)
+
+    @classmethod
+    async def _poll_changes(cls, now: datetime):
+        """Mark tasks written by other workers as dirty, from the change log."""
+        cursor = Database.get_db().task_changes.find(
+            {"at": {"$gte": cls.changes_since - _CLOCK_SKEW}}, {"task_id": 1, "at": 1}
+        )
+        async for entry in cursor:
+            cls.dirty.add(entry["task_id"])
+            cls.changes_since = max(cls.changes_since, entry["at"])
+        cls.next_poll = now + timedelta(seconds=settings.reminder_poll_seconds)
+
+    @classmethod
+    async def _reschedule_dirty(cls, now: datetime):
+        task_ids, cls.dirty = list(cls.dirty), set()
+        if not task_ids:
+            return
+        cursor = cls._tasks().find({"_id": {"$in": task_ids}}, _PROJECTION)
+        docs = {doc["_id"]: doc async for doc in cursor}
+        since = now - timedelta(seconds=settings.reminder_catchup_seconds)
+        for task_id in task_ids:
+            cls._cancel(task_id)
+            doc = docs.get(task_id)
+            if doc is None or doc.get("completed") or not isinstance(doc.get("due_date"), datetime):
+                continue
+            for offset in settings.reminder_offsets_minutes:
+                cls._push(doc, offset, since, cls.covered_until)
+
+    @classmethod
+    async def _fire_due(cls, now: datetime) -> bool:
+        """
+        Fire one batch of reminders that are due.
+
+        Returns:
+            bool: Whether more reminders may be due
+        """
+        due: list[_Reminder] = []
+        while cls.heap and cls.heap[0][0] <= now and len(due) < settings.reminder_page_size:
+            _, _, reminder = heapq.heappop(cls.heap)
+            if reminder.cancelled:
+                continue
+            scheduled = cls.by_task.get(reminder.task_id, [])
+            if reminder in scheduled:
+                scheduled.remove(reminder)
+                if not scheduled:
+                    del cls.by_task[reminder.task_id]
+            due.append(reminder)
+        if not due:
+            return False
+
+        # Tasks completed or moved since they were scheduled are skipped
+        cursor = cls._tasks().find(
+            {"_id": {"$in": list({r.task_id for r in due})}, "completed": False}, {"due_date": 1}
+        )
+        current = {doc["_id"]: doc.get("due_date") async for doc in cursor}
+        due = [r for r in due if current.get(r.task_id) == r.due_date]
+        if due:
+            await cls._claim_and_send(due, now)
+        return bool(cls.heap) and cls.heap[0][0] <= now
+
+    @classmethod
+    async def _claim_and_send(cls, due: list[_Reminder], now: datetime):
+        claims = [
+            {"_id": r.claim_id(), "fired_at": now, "expires_at": r.due_date + timedelta(days=1)}
+            for r in due
+        ]
+        claimed = set(range(len(due)))
+        try:
+            await Database.get_db().reminder_claims.insert_many(claims, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details["writeErrors"]:
+                if error.get("code") != 11000:
+                    raise
+                # Already fired, e.g. by a previous leader
+                claimed.discard(error["index"])
+        due = [r for index, r in enumerate(due) if index in claimed]
+        if not due:
+            return
+
+        try:
+            await get_sink().send([r.event() for r in due])
+        except Exception as e:
+            reminders_failed.inc(settings.reminder_sink, amount=len(due))
+            logger.error("❌ Error sending %s reminders: %s", len(due), e)
+            return
+        reminders_fired.inc(settings.reminder_sink, amount=len(due))
+        for r in due:
+            reminder_fire_delay.observe((now - r.fire_at).total_seconds())
+
+    @classmethod
+    async def _lead(cls, now: datetime):
+        """Start scheduling after taking the lease."""
+        cls._reset()
+        cls.leading = True
+        # Reminders missed while no worker was leading are fired late, up to the catch-up limit
+        cls.covered_until = now - timedelta(seconds=settings.reminder_catchup_seconds)
+        cls.changes_since = now
+        cls.next_poll = now
+        await cls._refill(now)
+        logger.info("✅ Reminder scheduler is leading (%s reminders in window)", len(cls.heap))
+
+    @classmethod
+    async def _tick(cls) -> float:
+        """
+        Run one scheduler step.
+
+        Returns:
+            float: Seconds until the next step is needed
+        """
+        now = datetime.utcnow()
+        if now >= cls.next_poll:
+            await cls._poll_changes(now)
+        if now >= cls.next_refill:
+            await cls._refill(now)
+        await cls._reschedule_dirty(now)
+        if await cls._fire_due(now):
+            return 0
+
+        # Drop cancelled entries once they dominate the heap
+        live = sum(len(reminders) for reminders in cls.by_task.values())
+        if len(cls.heap) > 2 * live + 1000:
+            cls.heap = [item for item in cls.heap if not item[2].cancelled]
+            heapq.heapify(cls.heap)
+        reminder_heap_size.set(value=live)
+
+        wake_at = min(cls.next_poll, cls.next_refill)
+        if cls.heap:
+            wake_at = min(wake_at, cls.heap[0][0])
+        return max(0.0, (wake_at - datetime.utcnow()).total_seconds())
+
+    @classmethod
+    async def _run(cls):
+        renew_every = settings.reminder_lease_seconds / 3
+        renew_at = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() >= renew_at:
+                    renew_at = loop.time() + renew_every
+                    if await cls.lease.acquire():
+                        if not cls.leading:
+                            await cls._lead(datetime.utcnow())
+                    elif cls.leading:
+                        logger.warning("⚠️ Reminder scheduler lost its lease")
+                        cls._reset()
+                timeout = await cls._tick() if cls.leading else renew_every
+            except Exception as e:
+                logger.error("❌ Error in reminder scheduler: %s", e)
+                timeout = 1.0
+            timeout = min(timeout, max(0.0, renew_at - loop.time()))
+            try:
+                await asyncio.wait_for(cls.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            cls.wakeup.clear()
+
+    @classmethod
+    def start(cls):
+        """Start the scheduler loop, unless reminders are disabled."""
+        if cls.loop_task is None and settings.reminders_enabled:
+            get_sink()
+            cls.lease = Lease("reminder_scheduler", settings.reminder_lease_seconds)
+            cls.wakeup = asyncio.Event()
+            cls.loop_task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        """Stop the scheduler loop and hand the lease over."""
+        if cls.loop_task is None:
+            return
+        cls.loop_task.cancel()
+        try:
+            await cls.loop_task
+        except asyncio.CancelledError:
+            pass
+        cls.loop_task = None
+        if cls.leading:
+            try:
+                await cls.lease.release()
+            except Exception as e:
+                logger.warning("⚠️ Could not release the reminder scheduler lease: %s", e)
+        cls._reset()
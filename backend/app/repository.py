@@ -0,0 +1,740 @@
+"""
+Task Repository Module
+
+This module is the data-access layer for tasks. All task endpoints go
+through it, so in the common case a mutation sends one MongoDB command
+to the tasks collection, followed by the bookkeeping every write shares:
+one version and counter bump on the user's document and one change log
+insert (see app.changes):
+- Ownership checks are part of the write filter
+- Created documents are built locally instead of being re-read
+- A follow-up _id-only read is made only when a write matches nothing,
+  to tell a missing task (404) apart from someone else's task (403); a
+  missing one is then looked up in the archive
+- Bulk deletes, and bulk updates that set completed, first read the
+  tasks' completion state to keep the completed counter exact
+- Listings can include archived tasks (see app.archive), merging both
+  collections in sort order; exports always do
+- Updating an archived task moves it back to the tasks collection first,
+  and deleting one removes it from the archive, in bulk requests too
+"""
+
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from .database import Database
+from .changes import ChangeLog
+from .search import get_search_engine
+from .reminders import ReminderScheduler
+from .pagination import encode_cursor, decode_cursor, keyset_filter, sort_spec
+from .filters import TaskFilters, listing_index
+
+logger = logging.getLogger(__name__)
+
+# Archive copies carrying this field are still being moved, and are not
+# visible to readers yet
+ARCHIVE_PENDING_FIELD = "archiving"
+
+# Which collections a listing reads
+TASK_SCOPES = ("active", "all", "archived")
+
+# Task fields reminders depend on
+REMINDER_FIELDS = {"title", "due_date", "completed"}
+
+
+class TaskNotFoundError(LookupError):
+    """Raised when a task does not exist."""
+
+
+class TaskForbiddenError(PermissionError):
+    """Raised when a task exists but belongs to another user."""
+
+
+def parse_task_id(task_id: str) -> Optional[ObjectId]:
+    """Convert a task id to ObjectId, returning None when it is malformed."""
+    return ObjectId(task_id) if ObjectId.is_valid(task_id) else None
+
+
+def serialize_task(task: dict) -> dict:
+    """
+    Convert the ObjectId fields of a task document to strings.
+
+    Args:
+        task: The task document, modified in place
+
+    Returns:
+        dict: The same document, ready for the Task response model
+    """
+    task["_id"] = str(task["_id"])
+    if "user_id" in task:
+        task["user_id"] = str(task["user_id"])
+    return task
+
+
+def utcnow_ms() -> datetime:
+    """Current UTC time truncated to the millisecond precision BSON stores."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def completed_delta(before: dict, after: dict) -> int:
+    """Change of the completed counter when a task goes from before to after."""
+    if "completed" not in after:
+        return 0
+    return int(bool(after["completed"])) - int(bool(before.get("completed")))
+
+
+@dataclass
+class ListingQuery:
+    """One collection read of a task listing."""
+    collection: Any
+    query: dict
+    projection: Optional[dict]
+    sort: list[tuple[str, int]]
+    # The index the listing is designed for; hinted so the planner never
+    # picks a plan that sorts in memory, but only when it exists, since a
+    # hint naming a missing index fails the query
+    hint: list[tuple[str, int]]
+
+    def find(self, skip: int = 0, limit: int = 0):
+        cursor = self.collection.find(self.query, self.projection).sort(self.sort)
+        if Database.has_index(self.collection.name, self.hint):
+            cursor = cursor.hint(self.hint)
+        return cursor.skip(skip).limit(limit)
+
+
+async def _to_list(cursor) -> list[dict]:
+    return [doc async for doc in cursor]
+
+
+def _sort_key(task: dict, sort: str) -> tuple:
+    """Sort key ordering tasks like sort_spec, with nulls first as MongoDB does."""
+    value = task.get(sort)
+    return (value is not None, value, task["_id"])
+
+
+class TaskRepository:
+
+    @classmethod
+    def collection(cls):
+        return Database.get_db().tasks
+
+    @classmethod
+    def archive_collection(cls):
+        return Database.get_db().tasks_archive
+
+    @classmethod
+    async def _missing_reason(cls, task_id: ObjectId) -> Exception:
+        """Tell whether a task that matched no write is missing or foreign."""
+        exists = await cls.collection().find_one({"_id": task_id}, {"_id": 1})
+        if exists is None:
+            return TaskNotFoundError("Task not found")
+        return TaskForbiddenError("Task belongs to another user")
+
+    @classmethod
+    async def _find_archived(cls, task_id: ObjectId, user_id: str) -> dict:
+        """
+        Find the user's archived task after a write to tasks matched nothing.
+
+        Args:
+            task_id: The task the write targeted
+            user_id: The user making the change
+
+        Returns:
+            dict: The archived task
+
+        Raises:
+            TaskNotFoundError: If the task is in neither collection
+            TaskForbiddenError: If the task belongs to another user
+        """
+        reason = await cls._missing_reason(task_id)
+        if isinstance(reason, TaskForbiddenError):
+            raise reason
+        archived = await cls.archive_collection().find_one(
+            {"_id": task_id, ARCHIVE_PENDING_FIELD: {"$exists": False}}
+        )
+        if archived is None:
+            raise reason
+        if archived["user_id"] != ObjectId(user_id):
+            raise TaskForbiddenError("Task belongs to another user")
+        return archived
+
+    @classmethod
+    async def _archived(cls, owner: ObjectId, task_ids: list[ObjectId]) -> list[dict]:
+        """
+        Find the user's archived tasks among ids a bulk write did not match.
+
+        Args:
+            owner: The user making the change
+            task_ids: The unmatched task ids
+
+        Returns:
+            list: The archived tasks, none when task_ids is empty
+        """
+        if not task_ids:
+            return []
+        cursor = cls.archive_collection().find(
+            {"_id": {"$in": task_ids}, "user_id": owner, ARCHIVE_PENDING_FIELD: {"$exists": False}}
+        )
+        return [doc async for doc in cursor]
+
+    @classmethod
+    async def _restore(cls, archived: dict, user_id: str):
+        """
+        Move an archived task back to the tasks collection.
+
+        Args:
+            archived: The archived task, from _find_archived
+            user_id: The owner of the task
+        """
+        task = {key: value for key, value in archived.items() if key != "archived_at"}
+        try:
+            await cls.collection().insert_one(task)
+        except DuplicateKeyError:
+            # Restored concurrently
+            pass
+        # Only the request that removes the archive copy counts the task again
+        removed = await cls.archive_collection().delete_one({"_id": task["_id"]})
+        if removed.deleted_count:
+            await cls._after_upsert(
+                user_id, {task["_id"]: task}, {"total": 1, "completed": int(bool(task.get("completed")))}
+            )
+
+    @classmethod
+    async def _after_upsert(
+        cls,
+        user_id: str,
+        changes: dict[ObjectId, dict],
+        counts: Optional[dict[str, int]] = None
+    ):
+        """Propagate created or updated tasks to the change log, counters, search index and reminders."""
+        if not changes:
+            return
+        engine = get_search_engine()
+        for task_id, fields in changes.items():
+            engine.on_upsert(user_id, task_id, fields)
+        ReminderScheduler.on_change(
+            task_id for task_id, fields in changes.items() if REMINDER_FIELDS.intersection(fields)
+        )
+        await ChangeLog.record(user_id, changes.keys(), "upsert", counts)
+
+    @classmethod
+    async def _after_delete(
+        cls,
+        user_id: str,
+        task_ids: list[ObjectId],
+        completed: int = 0,
+        op: str = "delete",
+        removed: Optional[int] = None
+    ):
+        """
+        Propagate deleted tasks to the change log, counters, search index and reminders.
+
+        Tasks moved to the archive leave the tasks collection the same way,
+        and are logged with op "archive". The total counter drops by removed,
+        the number of tasks the write actually removed, which defaults to
+        one per task id.
+        """
+        if not task_ids:
+            return
+        get_search_engine().on_delete(user_id, task_ids)
+        ReminderScheduler.on_change(task_ids)
+        total = len(task_ids) if removed is None else removed
+        await ChangeLog.record(
+            user_id, task_ids, op, {"total": -total, "completed": -completed}
+        )
+
+    @classmethod
+    def listing_queries(
+        cls,
+        user_id: str,
+        filters: Optional[TaskFilters] = None,
+        sort: str = "created_at",
+        order: str = "asc",
+        cursor: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        scope: str = "active"
+    ) -> list[ListingQuery]:
+        """
+        Build the queries a task listing runs, one per collection read.
+
+        Args:
+            user_id: The owner of the tasks
+            filters: Optional task filters
+            sort: The sort field
+            order: The sort order ("asc" or "desc")
+            cursor: Keyset cursor from a previous page
+            fields: Only read these fields, plus _id and the sort field
+            scope: "active" for tasks, "archived" for archived tasks, or "all"
+
+        Returns:
+            list: The queries, without skip and limit
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        query = {"user_id": ObjectId(user_id), **(filters or TaskFilters()).query()}
+        by_completed = "completed" in query
+
+        if cursor:
+            last_value, last_id = decode_cursor(cursor, sort, order)
+            keyset = keyset_filter(sort, order, last_value, last_id)
+            if keyset.keys() & query.keys():
+                query = {"$and": [query, keyset]}
+            else:
+                query.update(keyset)
+
+        # The sort field is needed to build the next cursor
+        projection = None if fields is None else dict.fromkeys([*fields, sort], 1)
+        spec = sort_spec(sort, order)
+        queries = []
+        if scope in ("active", "all"):
+            queries.append(ListingQuery(
+                cls.collection(), query, projection, spec, listing_index(sort, by_completed)
+            ))
+        # Archived tasks are all completed
+        if scope in ("archived", "all") and query.get("completed") is not False:
+            queries.append(ListingQuery(
+                cls.archive_collection(),
+                {**query, ARCHIVE_PENDING_FIELD: {"$exists": False}},
+                projection,
+                spec,
+                listing_index(sort, by_completed, archive=True)
+            ))
+        return queries
+
+    @classmethod
+    async def list_for_user(
+        cls,
+        user_id: str,
+        filters: Optional[TaskFilters] = None,
+        sort: str = "created_at",
+        order: str = "asc",
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        scope: str = "active"
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        List a user's tasks in a stable order.
+
+        With scope "all", both collections are read with the same filter,
+        sort and skip + limit, and merged in sort order.
+
+        Args:
+            user_id: The owner of the tasks
+            filters: Optional task filters
+            sort: The sort field
+            order: The sort order ("asc" or "desc")
+            skip: Number of tasks to skip when no cursor is given
+            limit: Maximum number of tasks to return
+            cursor: Keyset cursor from a previous page
+            fields: Only read these fields, plus _id and the sort field
+            scope: "active" for tasks, "archived" for archived tasks, or "all"
+
+        Returns:
+            tuple: Serialized tasks and the cursor for the next page, if any
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        queries = cls.listing_queries(user_id, filters, sort, order, cursor, fields, scope)
+        if cursor:
+            skip = 0
+
+        if len(queries) == 1:
+            tasks = [task async for task in queries[0].find(skip, limit)]
+        else:
+            # limit=0 means no limit
+            window = skip + limit if limit else 0
+            results = await asyncio.gather(*(
+                _to_list(listing.find(0, window)) for listing in queries
+            ))
+            merged = heapq.merge(*results, key=lambda task: _sort_key(task, sort), reverse=order == "desc")
+            tasks = list(merged)[skip:window or None]
+
+        next_cursor = None
+        if limit and len(tasks) == limit:
+            next_cursor = encode_cursor(tasks[-1], sort, order)
+
+        return [serialize_task(task) for task in tasks], next_cursor
+
+    @classmethod
+    async def iter_for_user(cls, user_id: str, batch_size: int) -> AsyncIterator[dict]:
+        """
+        Stream all of a user's raw task documents, archived ones included, in _id order.
+
+        Args:
+            user_id: The owner of the tasks
+            batch_size: Number of documents fetched per server round trip
+
+        Yields:
+            dict: Raw task documents; archived ones carry archived_at
+        """
+        owner = ObjectId(user_id)
+        active = cls.collection().find({"user_id": owner}).sort("_id", 1).batch_size(batch_size)
+        archived = cls.archive_collection().find(
+            {"user_id": owner, ARCHIVE_PENDING_FIELD: {"$exists": False}}
+        ).sort("_id", 1).batch_size(batch_size)
+        # Merge the two sorted cursors, holding one document from each
+        cursors = [aiter(active), aiter(archived)]
+        heads = [await anext(cursor, None) for cursor in cursors]
+        while heads[0] is not None or heads[1] is not None:
+            i = 0 if heads[1] is None or (heads[0] is not None and heads[0]["_id"] < heads[1]["_id"]) else 1
+            yield heads[i]
+            heads[i] = await anext(cursors[i], None)
+
+    @classmethod
+    async def get_many(cls, user_id: str, task_ids: list[ObjectId]) -> list[dict]:
+        """
+        Fetch several of a user's tasks by id.
+
+        Args:
+            user_id: The owner of the tasks
+            task_ids: The tasks to fetch
+
+        Returns:
+            list: Serialized tasks that still exist
+        """
+        if not task_ids:
+            return []
+        cursor = cls.collection().find({"_id": {"$in": task_ids}, "user_id": ObjectId(user_id)})
+        return [serialize_task(task) async for task in cursor]
+
+    @classmethod
+    async def search(cls, user_id: str, query: str, skip: int = 0, limit: int = 10) -> list[dict]:
+        """
+        Search a user's tasks by title and description.
+
+        Args:
+            user_id: The owner of the tasks
+            query: The search text
+            skip: Number of results to skip
+            limit: Maximum number of results to return
+
+        Returns:
+            list: Serialized tasks, best match first
+        """
+        ranked = await get_search_engine().search(user_id, query, skip, limit)
+        tasks = {task["_id"]: task for task in await cls.get_many(user_id, ranked)}
+        return [tasks[str(task_id)] for task_id in ranked if str(task_id) in tasks]
+
+    @classmethod
+    async def create(cls, user_id: str, data: dict) -> dict:
+        """
+        Insert a task and return it without re-reading it.
+
+        Args:
+            user_id: The owner of the task
+            data: The validated task fields
+
+        Returns:
+            dict: The serialized task
+        """
+        task = {
+            **data,
+            "_id": ObjectId(),
+            "user_id": ObjectId(user_id),
+            "created_at": utcnow_ms(),
+            "completed": False
+        }
+        await cls.collection().insert_one(task)
+        await cls._after_upsert(user_id, {task["_id"]: task}, {"total": 1})
+        return serialize_task(task)
+
+    @classmethod
+    async def update(cls, task_id: str, user_id: str, data: dict) -> dict:
+        """
+        Update a task owned by the user.
+
+        Args:
+            task_id: The task to update
+            user_id: The user making the change
+            data: The fields to set
+
+        Returns:
+            dict: The serialized updated task
+
+        Raises:
+            TaskNotFoundError: If the task does not exist
+            TaskForbiddenError: If the task belongs to another user
+        """
+        oid = parse_task_id(task_id)
+        if oid is None:
+            raise TaskNotFoundError("Task not found")
+
+        changes = {**data, "updated_at": utcnow_ms()}
+        # The previous document tells whether completed flipped; the
+        # response is built from it locally
+        write = {
+            "filter": {"_id": oid, "user_id": ObjectId(user_id)},
+            "update": {"$set": changes},
+            "return_document": ReturnDocument.BEFORE
+        }
+        before = await cls.collection().find_one_and_update(**write)
+        if before is None:
+            await cls._restore(await cls._find_archived(oid, user_id), user_id)
+            before = await cls.collection().find_one_and_update(**write)
+            if before is None:
+                raise await cls._missing_reason(oid)
+        result = {**before, **changes}
+        await cls._after_upsert(
+            user_id, {oid: data}, {"completed": completed_delta(before, result)}
+        )
+        return serialize_task(result)
+
+    @classmethod
+    async def delete(cls, task_id: str, user_id: str):
+        """
+        Delete a task owned by the user.
+
+        Args:
+            task_id: The task to delete
+            user_id: The user making the change
+
+        Raises:
+            TaskNotFoundError: If the task does not exist
+            TaskForbiddenError: If the task belongs to another user
+        """
+        oid = parse_task_id(task_id)
+        if oid is None:
+            raise TaskNotFoundError("Task not found")
+
+        deleted = await cls.collection().find_one_and_delete(
+            {"_id": oid, "user_id": ObjectId(user_id)},
+            projection={"completed": 1}
+        )
+        if deleted is None:
+            await cls._find_archived(oid, user_id)
+            removed = await cls.archive_collection().delete_one(
+                {"_id": oid, ARCHIVE_PENDING_FIELD: {"$exists": False}}
+            )
+            if not removed.deleted_count:
+                raise TaskNotFoundError("Task not found")
+            # Archived tasks are no longer counted or indexed
+            await ChangeLog.record(user_id, [oid], "delete")
+            return
+        await cls._after_delete(user_id, [oid], completed=int(bool(deleted.get("completed"))))
+
+    @classmethod
+    async def _bulk_write(cls, operations: list) -> tuple[dict, dict[int, str]]:
+        """
+        Run an unordered bulk write, collecting per-operation errors.
+
+        Args:
+            operations: The write operations
+
+        Returns:
+            tuple: The bulk write result details and errors keyed by operation index
+        """
+        try:
+            result = await cls.collection().bulk_write(operations, ordered=False)
+            return result.bulk_api_result, {}
+        except BulkWriteError as e:
+            errors = {err["index"]: err.get("errmsg", "Write error") for err in e.details["writeErrors"]}
+            return e.details, errors
+
+    @classmethod
+    async def bulk_create(cls, user_id: str, items: list[dict]) -> list[dict]:
+        """
+        Insert several tasks with a single unordered bulk write.
+
+        Args:
+            user_id: The owner of the tasks
+            items: The validated task fields for each task
+
+        Returns:
+            list: Per-item results
+        """
+        owner = ObjectId(user_id)
+        now = utcnow_ms()
+        ids = [ObjectId() for _ in items]
+        operations = [
+            InsertOne({**data, "_id": task_id, "user_id": owner, "created_at": now, "completed": False})
+            for task_id, data in zip(ids, items)
+        ]
+        _, errors = await cls._bulk_write(operations)
+        created = {
+            task_id: data for index, (task_id, data) in enumerate(zip(ids, items)) if index not in errors
+        }
+        await cls._after_upsert(user_id, created, {"total": len(created)})
+
+        results = []
+        for index, task_id in enumerate(ids):
+            if index in errors:
+                results.append({"index": index, "status": "error", "error": errors[index]})
+            else:
+                results.append({"index": index, "id": str(task_id), "status": "created"})
+        return results
+
+    @classmethod
+    async def bulk_update(cls, user_id: str, updates: list[tuple[str, dict]]) -> list[dict]:
+        """
+        Apply partial updates to several tasks with a single unordered bulk write.
+
+        Only the user's tasks are matched. The affected ids are re-read only
+        when some update did not match, to tell which ones were missing.
+        Repeats of an id already in the request are reported as not_found.
+
+        Args:
+            user_id: The user making the change
+            updates: Pairs of task id and fields to set
+
+        Returns:
+            list: Per-item results
+        """
+        owner = ObjectId(user_id)
+        now = utcnow_ms()
+
+        results: list[Optional[dict]] = [None] * len(updates)
+        positions = []
+        operations = []
+        seen = set()
+        for index, (raw_id, data) in enumerate(updates):
+            task_id = parse_task_id(raw_id)
+            if task_id is None:
+                results[index] = {"index": index, "id": raw_id, "status": "invalid", "error": "Invalid task id"}
+                continue
+            if task_id in seen:
+                results[index] = {"index": index, "id": str(task_id), "status": "not_found"}
+                continue
+            seen.add(task_id)
+            operations.append(UpdateOne({"_id": task_id, "user_id": owner}, {"$set": {**data, "updated_at": now}}))
+            positions.append((index, task_id))
+
+        if operations:
+            # Read the current completion state of tasks whose completed flag
+            # is being set, to keep the completed counter exact
+            previous = {}
+            toggled = [task_id for index, task_id in positions if "completed" in updates[index][1]]
+            if toggled:
+                cursor = cls.collection().find(
+                    {"_id": {"$in": toggled}, "user_id": owner},
+                    {"completed": 1}
+                )
+                previous = {doc["_id"]: doc async for doc in cursor}
+
+            details, errors = await cls._bulk_write(operations)
+
+            existing = None
+            if details["nMatched"] + len(errors) < len(operations):
+                cursor = cls.collection().find(
+                    {"_id": {"$in": [task_id for _, task_id in positions]}, "user_id": owner},
+                    {"_id": 1}
+                )
+                existing = {doc["_id"] async for doc in cursor}
+
+            updated = {
+                task_id: updates[index][1] for op_index, (index, task_id) in enumerate(positions)
+                if op_index not in errors and (existing is None or task_id in existing)
+            }
+            completed = sum(
+                completed_delta(previous[task_id], data)
+                for task_id, data in updated.items() if task_id in previous
+            )
+            await cls._after_upsert(user_id, updated, {"completed": completed})
+
+            # Archived tasks are moved back and updated one by one, like the
+            # single-task route does
+            restored = set()
+            missing = {
+                task_id: index for op_index, (index, task_id) in enumerate(positions)
+                if op_index not in errors and existing is not None and task_id not in existing
+            }
+            for archived in await cls._archived(owner, list(missing)):
+                try:
+                    await cls._restore(archived, user_id)
+                    await cls.update(str(archived["_id"]), user_id, updates[missing[archived["_id"]]][1])
+                except (TaskNotFoundError, TaskForbiddenError):
+                    continue
+                restored.add(archived["_id"])
+
+            for op_index, (index, task_id) in enumerate(positions):
+                if op_index in errors:
+                    results[index] = {"index": index, "id": str(task_id), "status": "error", "error": errors[op_index]}
+                elif existing is not None and task_id not in existing and task_id not in restored:
+                    results[index] = {"index": index, "id": str(task_id), "status": "not_found"}
+                else:
+                    results[index] = {"index": index, "id": str(task_id), "status": "updated"}
+
+        return results
+
+    @classmethod
+    async def bulk_delete(cls, user_id: str, raw_ids: list[str]) -> list[dict]:
+        """
+        Delete several tasks with a single unordered bulk write.
+
+        The user's tasks among the requested ids are looked up first with an
+        _id-only projection, since deleted tasks cannot be told apart from
+        missing ones afterwards. Repeats of an id already in the request are
+        reported as not_found. Counters drop by the number of tasks the bulk
+        write removed, not by the number requested.
+
+        Args:
+            user_id: The user making the change
+            raw_ids: The ids of the tasks to delete
+
+        Returns:
+            list: Per-item results
+        """
+        owner = ObjectId(user_id)
+        task_ids = [parse_task_id(raw_id) for raw_id in raw_ids]
+        valid_ids = [task_id for task_id in task_ids if task_id is not None]
+
+        owned = {}
+        if valid_ids:
+            cursor = cls.collection().find({"_id": {"$in": valid_ids}, "user_id": owner}, {"completed": 1})
+            owned = {doc["_id"]: bool(doc.get("completed")) async for doc in cursor}
+
+        # The first occurrence of each id deletes it
+        first = {}
+        for index, task_id in enumerate(task_ids):
+            if task_id is not None:
+                first.setdefault(task_id, index)
+        positions = [index for task_id, index in first.items() if task_id in owned]
+        errors = {}
+        if positions:
+            operations = [DeleteOne({"_id": task_ids[index], "user_id": owner}) for index in positions]
+            details, errors = await cls._bulk_write(operations)
+            deleted = [task_ids[index] for op_index, index in enumerate(positions) if op_index not in errors]
+            removed = details["nRemoved"]
+            completed = sum(owned[task_id] for task_id in deleted)
+            if removed < len(deleted):
+                # A concurrent delete removed some of these tasks first and
+                # counted them itself. The bulk result does not say which, so
+                # the counters only drop by what this write removed; the
+                # reconciliation job (app.stats) fixes any completed drift
+                completed = min(completed, removed)
+            await cls._after_delete(user_id, deleted, completed=completed, removed=removed)
+        op_errors = {positions[op_index]: message for op_index, message in errors.items()}
+
+        # Archived tasks are deleted from the archive, like the single-task
+        # route does; they are no longer counted or indexed
+        archived = [
+            doc["_id"] for doc in await cls._archived(owner, [task_id for task_id in first if task_id not in owned])
+        ]
+        if archived:
+            await cls.archive_collection().delete_many(
+                {"_id": {"$in": archived}, ARCHIVE_PENDING_FIELD: {"$exists": False}}
+            )
+            await ChangeLog.record(user_id, archived, "delete")
+        archived = set(archived)
+
+        results = []
+        for index, (raw_id, task_id) in enumerate(zip(raw_ids, task_ids)):
+            if task_id is None:
+                results.append({"index": index, "id": raw_id, "status": "invalid", "error": "Invalid task id"})
+            elif index in op_errors:
+                results.append({"index": index, "id": raw_id, "status": "error", "error": op_errors[index]})
+            elif (task_id in owned or task_id in archived) and first[task_id] == index:
+                results.append({"index": index, "id": raw_id, "status": "deleted"})
+            else:
+                results.append({"index": index, "id": raw_id, "status": "not_found"})
+        return results
@@ -0,0 +1,23 @@
+"""
+Responses Module
+
+This module defines custom response classes that encode task documents
+directly, bypassing FastAPI's response_model validation and
+jsonable_encoder pass while producing the same JSON.
+"""
+
+from typing import Any, Optional
+from fastapi.responses import Response
+from .schemas import dump_tasks_json
+
+
+class TaskListResponse(Response):
+    """JSON response for a list of serialized task documents, optionally sparse."""
+    media_type = "application/json"
+
+    def __init__(self, content: Any, fields: Optional[list[str]] = None, **kwargs):
+        self.fields = fields
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dump_tasks_json(content, self.fields)
@@ -0,0 +1,105 @@
+"""
+Token Revocation Module
+
+This module keeps track of revoked JWTs so stateless authentication can
+reject them without a database lookup per request:
+- Persistent revocation records in the revoked_tokens collection
+- In-memory copy of the revoked token ids, checked on every request
+- Periodic background sync of the in-memory copy
+
+Records expire together with the token they revoke through a TTL index.
+Tokens revoked in this process while a sync is reading the database are
+re-applied to the reloaded set, so a sync never un-revokes them.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Set
+from .config import settings
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    revoked: Set[str] = set()
+    # Token ids revoked here while a sync is running, or None between syncs
+    revoked_during_sync: Optional[Set[str]] = None
+    sync_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def is_revoked(cls, jti: str) -> bool:
+        """
+        Check whether a token id has been revoked.
+
+        Args:
+            jti: The token id (jti claim)
+
+        Returns:
+            bool: True if the token has been revoked
+        """
+        return jti in cls.revoked
+
+    @classmethod
+    async def revoke(cls, jti: str, expires_at: datetime):
+        """
+        Revoke a token until it expires.
+
+        Args:
+            jti: The token id (jti claim)
+            expires_at: Expiration time of the token
+        """
+        cls.revoked.add(jti)
+        if cls.revoked_during_sync is not None:
+            cls.revoked_during_sync.add(jti)
+        db = Database.get_db()
+        await db.revoked_tokens.update_one(
+            {"_id": jti},
+            {"$set": {"expires_at": expires_at}},
+            upsert=True
+        )
+
+    @classmethod
+    async def sync(cls):
+        """Reload the in-memory revocation set from the database."""
+        db = Database.get_db()
+        revoked = set()
+        cls.revoked_during_sync = set()
+        try:
+            cursor = db.revoked_tokens.find(
+                {"expires_at": {"$gt": datetime.utcnow()}},
+                {"_id": 1}
+            )
+            async for record in cursor:
+                revoked.add(record["_id"])
+            # Revocations made after the snapshot was read may be missing from it
+            cls.revoked = revoked | cls.revoked_during_sync
+        finally:
+            cls.revoked_during_sync = None
+
+    @classmethod
+    async def _sync_loop(cls):
+        while True:
+            try:
+                await cls.sync()
+            except Exception as e:
+                logger.error("❌ Error syncing revoked tokens: %s", e)
+            await asyncio.sleep(settings.revocation_sync_interval_seconds)
+
+    @classmethod
+    def start(cls):
+        """Start the periodic background sync."""
+        if cls.sync_task is None:
+            cls.sync_task = asyncio.create_task(cls._sync_loop())
+
+    @classmethod
+    async def stop(cls):
+        """Stop the periodic background sync."""
+        if cls.sync_task is not None:
+            cls.sync_task.cancel()
+            try:
+                await cls.sync_task
+            except asyncio.CancelledError:
+                pass
+            cls.sync_task = None
@@ -10,7 +10,8 @@ It includes models for:
 
 from pydantic import BaseModel, EmailStr, Field, validator, GetJsonSchemaHandler, field_validator
 from pydantic.json_schema import JsonSchemaValue
-from typing import Optional, Any, Annotated
+from pydantic_core import to_json
+from typing import Optional, Any, Annotated, Literal
 from datetime import datetime
 from bson import ObjectId
 import re
@@ -87,6 +88,11 @@ class Token(BaseModel):
     """Schema for JWT token response"""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token for a new access token"""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Schema for JWT token payload"""
@@ -98,6 +104,17 @@ class TaskCreate(BaseModel):
     description: Optional[str] = None
     due_date: Optional[datetime] = None
 
+class TaskUpdate(TaskCreate):
+    """Schema for task update; completed is left unchanged when omitted"""
+    completed: Optional[bool] = None
+
+    def changes(self) -> dict:
+        """Fields to set: title, description and due_date always, completed when given"""
+        data = self.model_dump(exclude={"completed"})
+        if self.completed is not None:
+            data["completed"] = self.completed
+        return data
+
 class Task(BaseModel):
     """Schema for task response data"""
     id: str = Field(alias="_id")
@@ -108,6 +125,7 @@ class Task(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
     completed: bool = Field(default=False)
+    archived_at: Optional[datetime] = None  # Set on archived tasks
 
     model_config = {
         "populate_by_name": True,
@@ -123,3 +141,119 @@ class Task(BaseModel):
             }
         }
     }
+
+class TaskStatistics(BaseModel):
+    """Schema for task statistics response data"""
+    total: int
+    completed: int
+    pending: int
+    overdue: int
+    due_today: int
+
+class TaskChanges(BaseModel):
+    """Schema for delta sync response data"""
+    upserts: list[Task] = []
+    deletes: list[str] = []
+    archived: list[str] = []  # Moved to the archive; see GET /tasks/archive
+    next_token: str
+    has_more: bool = False
+    resync_required: bool = False
+
+def task_wire_fields() -> list[tuple[str, Any]]:
+    """
+    List the Task response keys in wire order with their defaults.
+    
+    Returns:
+        list: (serialized key, default) pairs
+    """
+    fields = []
+    for name, field in Task.model_fields.items():
+        default = None if field.default_factory is not None or field.is_required() else field.default
+        fields.append((field.alias or name, default))
+    return fields
+
+TASK_WIRE_FIELDS = task_wire_fields()
+
+# Fields a task listing can be narrowed to; _id is always included
+TASK_SELECTABLE_FIELDS = tuple(key for key, _ in TASK_WIRE_FIELDS if key != "_id")
+
+def parse_task_fields(value: Optional[str]) -> Optional[list[str]]:
+    """
+    Parse a comma-separated sparse fieldset.
+    
+    Args:
+        value (Optional[str]): The fields query parameter
+        
+    Returns:
+        Optional[list]: The selected fields, or None for all fields
+        
+    Raises:
+        ValueError: If a field is not selectable
+    """
+    if value is None:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in TASK_SELECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(TASK_SELECTABLE_FIELDS)}"
+        )
+    return list(dict.fromkeys(fields))
+
+def dump_tasks_json(tasks: list[dict], fields: Optional[list[str]] = None) -> bytes:
+    """
+    Encode task documents exactly like a list[Task] response model would,
+    without validating each item through the model.
+    
+    Documents must already have their ObjectId fields converted to strings.
+    
+    Args:
+        tasks (list[dict]): Task documents as returned by the repository
+        fields (Optional[list[str]]): Only include these fields, plus _id
+        
+    Returns:
+        bytes: The JSON response body
+    """
+    wire_fields = TASK_WIRE_FIELDS
+    if fields is not None:
+        wire_fields = [(key, default) for key, default in TASK_WIRE_FIELDS if key == "_id" or key in fields]
+    rows = [{key: task.get(key, default) for key, default in wire_fields} for task in tasks]
+    return to_json(rows)
+
+class TaskBulkCreate(BaseModel):
+    """Schema for creating several tasks in one request"""
+    tasks: list[TaskCreate] = Field(..., min_length=1)
+
+class TaskBulkUpdateItem(BaseModel):
+    """Schema for a partial update of one task in a bulk request"""
+    id: str
+    title: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    due_date: Optional[datetime] = None
+    completed: Optional[bool] = None
+
+    @field_validator('title', 'completed')
+    def reject_null(cls, v, info):
+        """Reject an explicit null: tasks always have a title and a completion state"""
+        if v is None:
+            raise ValueError(f'{info.field_name} cannot be null')
+        return v
+
+class TaskBulkUpdate(BaseModel):
+    """Schema for updating several tasks in one request"""
+    updates: list[TaskBulkUpdateItem] = Field(..., min_length=1)
+
+class TaskBulkDelete(BaseModel):
+    """Schema for deleting several tasks in one request"""
+    ids: list[str] = Field(..., min_length=1)
+
+class BulkItemResult(BaseModel):
+    """Schema for the outcome of one item in a bulk request"""
+    index: int
+    id: Optional[str] = None
+    status: Literal["created", "updated", "deleted", "not_found", "invalid", "error"]
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    """Schema for bulk operation response data"""
+    results: list[BulkItemResult]
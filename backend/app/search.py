@@ -0,0 +1,237 @@
+"""
+Search Module
+
+This module provides ranked full-text search over task titles and
+descriptions behind a pluggable engine interface:
+- MongoTextSearchEngine uses the (user_id, title, description) text index
+- InMemorySearchEngine keeps a per-user inverted index with prefix
+  matching, built lazily on first search and maintained incrementally
+  on task writes
+
+Settings.search_engine selects the engine.
+"""
+
+import asyncio
+import math
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, Optional
+from bson import ObjectId
+from .config import settings
+from .database import Database
+
+# Relative weight of a term found in each searchable field
+FIELD_WEIGHTS = {"title": 3, "description": 1}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Split text into lowercase word tokens."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchEngine(ABC):
+    """Interface for task search engines."""
+
+    @abstractmethod
+    async def search(self, user_id: str, query: str, skip: int, limit: int) -> list[ObjectId]:
+        """Return the ids of the user's best matching tasks, best first."""
+
+    def on_upsert(self, user_id: str, task_id: ObjectId, fields: dict):
+        """Update the index after a task was created or changed."""
+
+    def on_delete(self, user_id: str, task_ids: Iterable[ObjectId]):
+        """Update the index after tasks were deleted."""
+
+
+class MongoTextSearchEngine(SearchEngine):
+    """Search engine backed by a MongoDB text index."""
+
+    async def search(self, user_id: str, query: str, skip: int, limit: int) -> list[ObjectId]:
+        cursor = Database.get_db().tasks.find(
+            {"user_id": ObjectId(user_id), "$text": {"$search": query}},
+            {"_id": 1, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit)
+        return [doc["_id"] async for doc in cursor]
+
+
+class _UserIndex:
+    """Inverted index over one user's tasks."""
+    __slots__ = ("postings", "terms", "fields")
+
+    def __init__(self):
+        # term -> {task_id: weighted term frequency}
+        self.postings: dict[str, dict[ObjectId, int]] = {}
+        # Sorted list of terms, for prefix lookups
+        self.terms: list[str] = []
+        # task_id -> indexed field values, so partial updates can be merged
+        self.fields: dict[ObjectId, dict] = {}
+
+    def _weights(self, fields: dict) -> dict[str, int]:
+        weights: dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                weights[term] = weights.get(term, 0) + weight
+        return weights
+
+    def remove(self, task_id: ObjectId):
+        fields = self.fields.pop(task_id, None)
+        if fields is None:
+            return
+        for term in self._weights(fields):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(task_id, None)
+            if not posting:
+                del self.postings[term]
+                index = bisect_left(self.terms, term)
+                if index < len(self.terms) and self.terms[index] == term:
+                    del self.terms[index]
+
+    def add(self, task_id: ObjectId, fields: dict):
+        merged = {**self.fields.get(task_id, {}), **{k: v for k, v in fields.items() if k in FIELD_WEIGHTS}}
+        self.remove(task_id)
+        self.fields[task_id] = merged
+        for term, weight in self._weights(merged).items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                index = bisect_left(self.terms, term)
+                self.terms.insert(index, term)
+            posting[task_id] = weight
+
+    def expand(self, prefix: str) -> list[str]:
+        start = bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(prefix):
+            end += 1
+        return self.terms[start:end]
+
+    def search(self, query: str) -> list[ObjectId]:
+        total = len(self.fields) or 1
+        scores: dict[ObjectId, float] = {}
+        for query_term in set(tokenize(query)):
+            # Each query term scores a task once, through its best matching
+            # indexed term; exact matches rank above prefix matches
+            best: dict[ObjectId, float] = {}
+            for term in self.expand(query_term):
+                posting = self.postings[term]
+                idf = math.log(1 + total / len(posting))
+                exactness = 1.0 if term == query_term else 0.5
+                for task_id, weight in posting.items():
+                    score = weight * idf * exactness
+                    if score > best.get(task_id, 0):
+                        best[task_id] = score
+            for task_id, score in best.items():
+                scores[task_id] = scores.get(task_id, 0) + score
+        return sorted(scores, key=lambda task_id: (-scores[task_id], task_id))
+
+
+class InMemorySearchEngine(SearchEngine):
+    """
+    Search engine keeping per-user inverted indexes in process memory.
+
+    A user's index is built from the database on their first search and
+    then kept current by on_upsert/on_delete. Writes that land while the
+    index is being built are buffered and replayed once the load finishes,
+    since the load's cursor may already have passed the changed tasks.
+    Only the most recently used users are kept, up to
+    Settings.search_memory_max_users.
+    """
+
+    def __init__(self):
+        self.indexes: OrderedDict[str, _UserIndex] = OrderedDict()
+        self.loading: dict[str, asyncio.Lock] = {}
+        # user_id -> writes seen while that user's index is loading
+        self.pending: dict[str, list[tuple]] = {}
+
+    async def _load(self, user_id: str) -> _UserIndex:
+        index = self.indexes.get(user_id)
+        if index is not None:
+            self.indexes.move_to_end(user_id)
+            return index
+
+        lock = self.loading.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self.indexes.get(user_id)
+            if index is None:
+                index = _UserIndex()
+                pending = self.pending[user_id] = []
+                try:
+                    cursor = Database.get_db().tasks.find(
+                        {"user_id": ObjectId(user_id)},
+                        {"title": 1, "description": 1}
+                    )
+                    async for task in cursor:
+                        index.add(task["_id"], task)
+                    # Replaying in order leaves each task as its last write
+                    # made it, whether or not the cursor saw that write
+                    for op, task_ids, fields in pending:
+                        for task_id in task_ids:
+                            if op == "upsert":
+                                index.add(task_id, fields)
+                            else:
+                                index.remove(task_id)
+                finally:
+                    del self.pending[user_id]
+                self.indexes[user_id] = index
+                while len(self.indexes) > settings.search_memory_max_users:
+                    self.indexes.popitem(last=False)
+        self.loading.pop(user_id, None)
+        return index
+
+    async def search(self, user_id: str, query: str, skip: int, limit: int) -> list[ObjectId]:
+        index = await self._load(user_id)
+        return index.search(query)[skip:skip + limit]
+
+    def on_upsert(self, user_id: str, task_id: ObjectId, fields: dict):
+        pending = self.pending.get(user_id)
+        if pending is not None:
+            pending.append(("upsert", [task_id], dict(fields)))
+        index = self.indexes.get(user_id)
+        if index is not None:
+            index.add(task_id, fields)
+
+    def on_delete(self, user_id: str, task_ids: Iterable[ObjectId]):
+        task_ids = list(task_ids)
+        pending = self.pending.get(user_id)
+        if pending is not None:
+            pending.append(("delete", task_ids, None))
+        index = self.indexes.get(user_id)
+        if index is not None:
+            for task_id in task_ids:
+                index.remove(task_id)
+
+
+# Available search engines, selected by Settings.search_engine
+SEARCH_ENGINES = {
+    "mongo": MongoTextSearchEngine,
+    "memory": InMemorySearchEngine,
+}
+
+_engine: Optional[SearchEngine] = None
+
+
+def get_search_engine() -> SearchEngine:
+    """
+    Get the configured search engine, creating it on first use.
+
+    Returns:
+        SearchEngine: The process-wide search engine
+
+    Raises:
+        ValueError: If Settings.search_engine names an unknown engine
+    """
+    global _engine
+    if _engine is None:
+        try:
+            _engine = SEARCH_ENGINES[settings.search_engine]()
+        except KeyError:
+            raise ValueError(f"Unknown search engine: {settings.search_engine}")
+    return _engine
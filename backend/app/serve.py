@@ -0,0 +1,149 @@
+"""
+Server Launcher Module
+
+This module runs the API for production:
+- One or more uvicorn worker processes sharing a listening socket
+- uvloop and httptools when they are installed
+- The MongoDB pool budget divided between workers (see Settings)
+- Graceful drain: on SIGTERM/SIGINT each worker stops accepting
+  connections, closes event streams and waits up to
+  graceful_shutdown_seconds for in-flight requests
+- Multiple workers are refused with components that keep their data in
+  one process (memory storage or search), and warned about for ones
+  that only become per-worker (event broker, rate limit buckets)
+
+Usage (from backend/):
+    python -m app.serve --workers 4 --port 8000
+    python -m app.serve --migrate    # Apply migrations first (see app.migrate)
+
+Host, port and worker count default to the HOST, PORT and WEB_WORKERS
+settings.
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from .config import settings
+from .drain import Drain
+from .logs import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that starts the application drain on the first exit signal."""
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit:
+            Drain.begin()
+        super().handle_exit(sig, frame)
+
+
+def _pick(module: str, fast: str, fallback: str) -> str:
+    return fast if importlib.util.find_spec(module) is not None else fallback
+
+
+def build_config(host: str, port: int, workers: int) -> uvicorn.Config:
+    """
+    Build the uvicorn configuration for the API.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes
+
+    Returns:
+        uvicorn.Config: The server configuration
+    """
+    return uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=_pick("uvloop", "uvloop", "asyncio"),
+        http=_pick("httptools", "httptools", "h11"),
+        # Behind a proxy, the client address comes from X-Forwarded-For
+        # only when the proxy is listed here; otherwise every client gets
+        # the proxy's address, and shares its rate limit buckets
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+        timeout_keep_alive=75,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        # Server and access logs propagate to the app's logging pipeline
+        log_config=None,
+    )
+
+
+def process_local_issues() -> tuple[list[str], list[str]]:
+    """
+    Find configured components that keep their state in one process.
+
+    Returns:
+        tuple: Problems that make multiple workers incorrect, and ones
+            that only weaken guarantees per worker
+    """
+    errors = []
+    warnings = []
+    if settings.storage_backend == "memory":
+        errors.append("STORAGE_BACKEND=memory gives each worker its own database")
+    elif settings.search_engine == "memory":
+        errors.append("SEARCH_ENGINE=memory misses task writes made by other workers")
+    if settings.pubsub_backend == "memory":
+        warnings.append(
+            "PUBSUB_BACKEND=memory only streams changes made by the same worker; "
+            "clients catch up through /tasks/changes"
+        )
+    if settings.rate_limit_enabled:
+        warnings.append("Rate limit buckets are per worker, so each limit is multiplied by the worker count")
+    return errors, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the TodoList API")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.web_workers)
+    parser.add_argument(
+        "--migrate", action="store_true",
+        help="Apply pending migrations and indexes before starting, for deploys without a release phase"
+    )
+    args = parser.parse_args()
+    if args.workers > 1:
+        errors, warnings = process_local_issues()
+        for warning in warnings:
+            logger.warning("⚠️ %s", warning)
+        if errors:
+            parser.error("; ".join(errors) + ", use --workers 1")
+
+    if args.migrate:
+        from .migrate import run
+        run("apply")
+
+    # Workers are spawned processes that read their own Settings, so the
+    # worker count goes through the environment for the pool split
+    os.environ["WEB_WORKERS"] = str(args.workers)
+    settings.web_workers = args.workers
+
+    config = build_config(args.host, args.port, args.workers)
+    server = DrainingServer(config)
+    logger.info(
+        "✅ Starting %s worker(s) on %s:%s (loop: %s, http: %s, MongoDB pool per worker: %s)",
+        args.workers, args.host, args.port, config.loop, config.http, settings.worker_pool_size()
+    )
+
+    if args.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+        if not server.started:
+            sys.exit(3)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    main()
@@ -0,0 +1,201 @@
+"""
+Task Statistics Module
+
+This module serves per-user task statistics without scanning tasks:
+- Total and completed counts come from task_counts on the users
+  document, maintained with $inc on every task write
+- Overdue and due-today counts are indexed range counts on
+  (user_id, completed, due_date)
+- A reconciliation job recomputes each user's counters and fixes drift
+  that persists across two passes, with an update conditional on
+  tasks_version so concurrent $inc are never overwritten; a lease keeps
+  it to one worker at a time
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from .config import settings
+from .database import Database
+from .leases import Lease
+
+logger = logging.getLogger(__name__)
+
+
+# Users reconciled between lease renewals
+RECONCILE_RENEW_EVERY = 1000
+
+
+class TaskStats:
+    reconcile_task: Optional[asyncio.Task] = None
+    lease: Optional[Lease] = None
+    # user_id -> (tasks_version, recomputed counters) of drift seen by the
+    # previous pass, fixed only if the next pass sees it unchanged
+    suspects: dict[str, tuple] = {}
+
+    @classmethod
+    def _lease(cls) -> Lease:
+        if cls.lease is None:
+            cls.lease = Lease("task_stats_reconcile", settings.stats_reconcile_lease_seconds)
+        return cls.lease
+
+    @classmethod
+    async def get(cls, user: dict, tz_offset_minutes: int = 0) -> dict:
+        """
+        Get task statistics for a user.
+
+        Args:
+            user: The current user
+            tz_offset_minutes: Client UTC offset, used for "today" boundaries
+
+        Returns:
+            dict: total, completed, pending, overdue and due_today counts
+        """
+        db = Database.get_db()
+        counts = user.get("task_counts")
+        if counts is None:
+            doc = await db.users.find_one({"_id": user["_id"]}, {"task_counts": 1})
+            counts = (doc or {}).get("task_counts")
+        if counts is None:
+            counts = await cls.reconcile_user(user["_id"])
+
+        owner = ObjectId(user["_id"])
+        now = datetime.utcnow()
+        offset = timedelta(minutes=tz_offset_minutes)
+        start_of_day = (now + offset).replace(hour=0, minute=0, second=0, microsecond=0) - offset
+        end_of_day = start_of_day + timedelta(days=1)
+
+        overdue, due_today = await asyncio.gather(
+            db.tasks.count_documents({"user_id": owner, "completed": False, "due_date": {"$lt": now}}),
+            db.tasks.count_documents({
+                "user_id": owner,
+                "completed": False,
+                "due_date": {"$gte": start_of_day, "$lt": end_of_day}
+            })
+        )
+
+        total = counts.get("total", 0)
+        completed = counts.get("completed", 0)
+        return {
+            "total": total,
+            "completed": completed,
+            "pending": total - completed,
+            "overdue": overdue,
+            "due_today": due_today
+        }
+
+    @classmethod
+    async def _compute(cls, match: dict) -> dict[str, dict]:
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$user_id",
+                "total": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [{"$eq": ["$completed", True]}, 1, 0]}}
+            }}
+        ]
+        cursor = Database.get_db().tasks.aggregate(pipeline)
+        return {
+            str(row["_id"]): {"total": row["total"], "completed": row["completed"]}
+            async for row in cursor
+        }
+
+    @classmethod
+    async def reconcile_user(cls, user_id: str) -> dict:
+        """
+        Recompute and store one user's task counters.
+
+        Args:
+            user_id: The user to reconcile
+
+        Returns:
+            dict: The recomputed counters
+        """
+        computed = await cls._compute({"user_id": ObjectId(user_id)})
+        counts = computed.get(user_id, {"total": 0, "completed": 0})
+        await Database.get_db().users.update_one({"_id": user_id}, {"$set": {"task_counts": counts}})
+        return counts
+
+    @classmethod
+    async def reconcile(cls, confirm: bool = True) -> int:
+        """
+        Recompute every user's task counters and fix the ones that drifted.
+
+        A task write lands before its counter $inc, so a user read between
+        the two looks drifted. With confirm, drift is only fixed when the
+        previous pass saw the same drift at the same tasks_version; an
+        in-flight write bumps the version and is left alone. Each fix only
+        applies if tasks_version is still the one read, so no $inc that
+        landed in between is overwritten.
+
+        Args:
+            confirm: Fix drift only once seen by two passes; the backfill
+                migration, run before serving, fixes it on the first
+
+        Returns:
+            int: Number of users whose counters were corrected; 0 when
+                another worker holds the lease
+        """
+        lease = cls._lease()
+        if not await lease.acquire():
+            return 0
+        db = Database.get_db()
+        fixed = 0
+        suspects = {}
+        cursor = db.users.find({}, {"task_counts": 1, "tasks_version": 1})
+        checked = 0
+        async for user in cursor:
+            checked += 1
+            if checked % RECONCILE_RENEW_EVERY == 0 and not await lease.acquire():
+                break
+            user_id = str(user["_id"])
+            version = user.get("tasks_version")
+            computed = await cls._compute({"user_id": ObjectId(user_id)})
+            expected = computed.get(user_id, {"total": 0, "completed": 0})
+            if user.get("task_counts") == expected:
+                continue
+            if confirm and cls.suspects.get(user_id) != (version, expected):
+                suspects[user_id] = (version, expected)
+                continue
+            result = await db.users.update_one(
+                {"_id": user["_id"], "tasks_version": version},
+                {"$set": {"task_counts": expected}}
+            )
+            fixed += result.modified_count
+        cls.suspects = suspects
+        if fixed:
+            logger.warning("Reconciled task counters for %s users", fixed)
+        return fixed
+
+    @classmethod
+    async def _reconcile_loop(cls):
+        while True:
+            await asyncio.sleep(settings.stats_reconcile_interval_seconds)
+            try:
+                await cls.reconcile()
+            except Exception as e:
+                logger.error("❌ Error reconciling task counters: %s", e)
+
+    @classmethod
+    def start(cls):
+        """Start the periodic reconciliation job, unless disabled."""
+        if cls.reconcile_task is None and settings.stats_reconcile_interval_seconds > 0:
+            cls.reconcile_task = asyncio.create_task(cls._reconcile_loop())
+
+    @classmethod
+    async def stop(cls):
+        """Stop the periodic reconciliation job and release the lease."""
+        if cls.reconcile_task is not None:
+            cls.reconcile_task.cancel()
+            try:
+                await cls.reconcile_task
+            except asyncio.CancelledError:
+                pass
+            cls.reconcile_task = None
+        if cls.lease is not None:
+            try:
+                await cls.lease.release()
+            except Exception as e:
+                logger.warning("⚠️ Could not release the stats reconcile lease: %s", e)
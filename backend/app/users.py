@@ -0,0 +1,45 @@
+"""
+User Repository Module
+
+This module is the data-access layer for user accounts, used by signup,
+login and authentication:
+- Lookups by email, served by the unique email index
+- Creation, where a registered email raises DuplicateKeyError on every
+  storage backend (see app.database)
+"""
+
+from typing import Optional
+from .database import Database
+
+
+class UserRepository:
+
+    @classmethod
+    def collection(cls):
+        return Database.get_db().users
+
+    @classmethod
+    async def get_by_email(cls, email: str) -> Optional[dict]:
+        """
+        Load a user by email.
+
+        Args:
+            email: The user's email
+
+        Returns:
+            Optional[dict]: The user document, None if there is none
+        """
+        return await cls.collection().find_one({"email": email})
+
+    @classmethod
+    async def create(cls, user: dict):
+        """
+        Store a new user.
+
+        Args:
+            user: The complete user document, including its _id
+
+        Raises:
+            DuplicateKeyError: If the email is already registered
+        """
+        await cls.collection().insert_one(user)
@@ -0,0 +1,105 @@
+"""
+Task Versions Module
+
+This module tracks a per-user task version used for conditional requests:
+- Every task write bumps tasks_version on the owner's users document
+- Task listings derive an ETag from that version and the query string
+- A matching If-None-Match is answered with 304 after a single point read
+"""
+
+import hashlib
+import logging
+from typing import Optional
+from pymongo import ReturnDocument
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class TaskVersion:
+
+    @classmethod
+    async def bump(cls, user_id: str, counts: Optional[dict[str, int]] = None) -> Optional[int]:
+        """
+        Increment the user's task version after a write.
+
+        Args:
+            user_id: The owner of the changed tasks
+            counts: Task counter deltas (e.g. {"total": 1}) applied atomically
+                with the version bump
+
+        Returns:
+            Optional[int]: The new version, None if the user does not exist
+        """
+        inc = {"tasks_version": 1}
+        for name, delta in (counts or {}).items():
+            if delta:
+                inc[f"task_counts.{name}"] = delta
+        doc = await Database.get_db().users.find_one_and_update(
+            {"_id": user_id},
+            {"$inc": inc},
+            projection={"tasks_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["tasks_version"] if doc else None
+
+    @classmethod
+    async def get(cls, user: dict) -> int:
+        """
+        Get the user's current task version.
+
+        The version is taken from the user document when get_current_user
+        already loaded it, otherwise it is fetched with a projected point read.
+
+        Args:
+            user: The current user
+
+        Returns:
+            int: The task version, 0 if the user never changed a task
+        """
+        if "tasks_version" in user:
+            return user["tasks_version"]
+        doc = await Database.get_db().users.find_one(
+            {"_id": user["_id"]},
+            {"tasks_version": 1}
+        )
+        return (doc or {}).get("tasks_version", 0)
+
+
+def task_list_etag(user_id: str, version: int, query: str) -> str:
+    """
+    Build the weak ETag of a task listing.
+
+    Args:
+        user_id: The owner of the tasks
+        version: The user's task version
+        query: The path and raw query string of the request
+
+    Returns:
+        str: The ETag header value
+    """
+    digest = hashlib.blake2b(f"{user_id}?{query}".encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Args:
+        if_none_match: The If-None-Match header value, if any
+        etag: The current ETag
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
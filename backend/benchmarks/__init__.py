@@ -0,0 +1,6 @@
+"""
+Benchmarks Package
+
+Reproducible load tests for the TodoList API. See benchmarks.run for the
+command line interface.
+"""
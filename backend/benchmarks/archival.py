@@ -0,0 +1,132 @@
+"""
+Archival Benchmark
+
+Seeds long-lived users whose completed tasks are all past the archive
+cutoff, then compares the tasks collection's index size and list
+latency before and after an archival pass. Index sizes come from
+collStats and are only reported by the mongo store.
+
+Usage (from backend/):
+    python -m benchmarks.archival --users 20 --tasks 5000
+    python -m benchmarks.archival --store mongo --output archival.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import httpx
+from app.archive import TaskArchiver
+from app.config import settings
+from app.database import Database
+from app.hashing import PasswordHasher
+from app.main import app
+from .run import percentile
+from .scenarios import BenchContext
+from .seed import BASE_TIME
+from .stores import STORES, prepare_store
+
+# Listings measured before and after archival
+QUERIES = {
+    "first_page": {"limit": 50},
+    "pending_by_due_date": {"limit": 50, "completed": "false", "sort": "due_date"},
+    "last_page": {"limit": 50, "order": "desc"},
+}
+
+
+async def collection_stats(name: str) -> dict:
+    db = Database.get_db()
+    stats = {"documents": await db[name].count_documents({})}
+    try:
+        raw = await db.command({"collStats": name})
+        stats["index_bytes"] = raw["totalIndexSize"]
+        stats["index_sizes"] = raw["indexSizes"]
+    except Exception:
+        # The in-memory store has no collStats
+        stats["index_bytes"] = None
+    return stats
+
+
+async def measure(client, ctx: BenchContext, queries: dict, repeats: int) -> dict:
+    results = {}
+    for name, params in queries.items():
+        latencies = []
+        for i in range(repeats):
+            start = time.perf_counter()
+            response = await client.get("/tasks", params=params, headers=ctx.headers[ctx.user(i)])
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        }
+    return results
+
+
+async def run(args) -> dict:
+    settings.rate_limit_enabled = False
+    await prepare_store(args.store, args.mongo_url, args.users, args.tasks)
+    # Seeded completed tasks were last changed long before the cutoff
+    await Database.get_db().tasks.update_many({"completed": True}, {"$set": {"updated_at": BASE_TIME}})
+    PasswordHasher.start()
+    ctx = BenchContext(users=args.users, tasks_per_user=args.tasks)
+
+    report = {"meta": {"store": args.store, "users": args.users, "tasks_per_user": args.tasks}}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        report["before"] = {
+            "tasks": await collection_stats("tasks"),
+            "latency": await measure(client, ctx, QUERIES, args.repeats),
+        }
+
+        settings.archive_after_days = 30
+        settings.archive_batch_size = args.batch_size
+        settings.archive_batch_pause_seconds = args.batch_pause
+        started = time.perf_counter()
+        archived = await TaskArchiver.run_once()
+        elapsed = time.perf_counter() - started
+        await TaskArchiver.stop()
+        report["archival"] = {
+            "archived": archived,
+            "seconds": round(elapsed, 3),
+            "tasks_per_second": round(archived / elapsed, 2) if elapsed else None,
+        }
+
+        archived_queries = {f"{name}+archived": {**params, "include_archived": "true"} for name, params in QUERIES.items()}
+        report["after"] = {
+            "tasks": await collection_stats("tasks"),
+            "tasks_archive": await collection_stats("tasks_archive"),
+            "latency": await measure(client, ctx, {**QUERIES, **archived_queries}, args.repeats),
+        }
+    PasswordHasher.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task archival")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=2000, help="Tasks per user; half of them completed")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    parser.add_argument("--batch-pause", type=float, default=0.0, help="Seconds between archival batches")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    for phase in ("before", "after"):
+        tasks = report[phase]["tasks"]
+        print(f"{phase}: tasks={tasks['documents']} index_bytes={tasks['index_bytes']}")
+        for name, values in report[phase]["latency"].items():
+            print(f"  {name:>30}: {json.dumps(values)}")
+    print(f"archival: {json.dumps(report['archival'])}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
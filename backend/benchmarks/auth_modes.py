@@ -0,0 +1,98 @@
+"""
+Authentication Mode Benchmark
+
+Runs task scenarios with the user lookup per request and with stateless
+authentication, and reports throughput, latency and MongoDB commands per
+request for each, including the users lookups stateless mode saves.
+
+Commands are counted by the MongoDB command listener behind /metrics,
+which the in-memory store reports to as well.
+
+Usage (from backend/):
+    python -m benchmarks.auth_modes --requests 1000
+    python -m benchmarks.auth_modes --store mongo --output auth_modes.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import httpx
+from app.config import settings
+from app.hashing import PasswordHasher
+from app.main import app
+from app.metrics import mongo_commands
+from .run import run_scenario
+from .scenarios import BenchContext
+from .stores import STORES, prepare_store
+
+SCENARIOS = ("list_shallow", "create", "update")
+
+MODES = {"lookup": False, "stateless": True}
+
+
+def command_counts() -> dict[str, float]:
+    """MongoDB commands sent so far, by collection."""
+    counts: dict[str, float] = {}
+    for (_, collection, _), value in mongo_commands.totals().items():
+        counts[collection] = counts.get(collection, 0) + value
+    return counts
+
+
+async def run_mode(args, stateless: bool) -> dict:
+    await prepare_store(args.store, args.mongo_url, args.users, args.tasks)
+    settings.stateless_auth = stateless
+    ctx = BenchContext(users=args.users, tasks_per_user=args.tasks)
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name in SCENARIOS:
+            before = command_counts()
+            result = await run_scenario(client, ctx, name, args.requests, args.concurrency)
+            sent = {
+                collection: value - before.get(collection, 0)
+                for collection, value in command_counts().items()
+                if value - before.get(collection, 0)
+            }
+            result["mongo_ops_per_request"] = round(sum(sent.values()) / args.requests, 3)
+            result["mongo_ops_per_request_by_collection"] = {
+                collection: round(value / args.requests, 3) for collection, value in sorted(sent.items())
+            }
+            results[name] = result
+    return results
+
+
+async def run(args) -> dict:
+    settings.rate_limit_enabled = False
+    PasswordHasher.start()
+    report = {}
+    try:
+        for mode, stateless in MODES.items():
+            report[mode] = await run_mode(args, stateless)
+            for name, result in report[mode].items():
+                summary = {key: result[key] for key in ("throughput_rps", "p50_ms", "p99_ms", "mongo_ops_per_request")}
+                print(f"{mode:>9} {name:>12}: {json.dumps(summary)}", flush=True)
+    finally:
+        PasswordHasher.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare user lookup and stateless authentication")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks seeded per user")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Deep Page Benchmark
+
+Seeds one user with many tasks and times GET /tasks at page 1 and at a
+deep page, through a keyset cursor and through skip. With keyset
+pagination the deep page should cost the same as the first one; skip
+gets slower with depth and is shown for comparison.
+
+Exits non-zero when the deep cursor page's p50 exceeds the first page's
+by more than --max-ratio.
+
+Usage (from backend/):
+    python -m benchmarks.deep_pages
+    python -m benchmarks.deep_pages --store mongo --tasks 1000000 --page 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import timedelta
+import httpx
+from app.config import settings
+from app.main import app
+from app.pagination import encode_cursor
+from .run import percentile
+from .scenarios import PAGE_SIZE, BenchContext
+from .seed import BASE_TIME, task_id
+from .stores import STORES, prepare_store
+
+
+def page_params(page: int, mode: str) -> dict:
+    """Query parameters for a 1-based page, by cursor or by skip."""
+    params = {"limit": PAGE_SIZE}
+    if page == 1:
+        return params
+    last = (page - 1) * PAGE_SIZE - 1
+    if mode == "skip":
+        params["skip"] = last + 1
+    else:
+        # Seeded tasks are created one second apart
+        params["cursor"] = encode_cursor(
+            {"_id": task_id(0, last), "created_at": BASE_TIME + timedelta(seconds=last)}, "created_at", "asc"
+        )
+    return params
+
+
+async def time_page(client, headers: dict, params: dict, requests: int) -> dict:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/tasks", params=params, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200 or len(response.json()) != PAGE_SIZE:
+            raise RuntimeError(f"Unexpected page response: {response.status_code}")
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+async def run(args) -> dict:
+    if args.page * PAGE_SIZE > args.tasks:
+        raise SystemExit(f"--page {args.page} needs at least {args.page * PAGE_SIZE} tasks")
+    settings.rate_limit_enabled = False
+    await prepare_store(args.store, args.mongo_url, 1, args.tasks)
+    headers = BenchContext(users=1, tasks_per_user=args.tasks).headers[0]
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for mode in ("cursor", "skip"):
+            for page in (1, args.page):
+                name = f"{mode} page {page}"
+                results[name] = await time_page(client, headers, page_params(page, mode), args.requests)
+                print(f"{name:>18}: {json.dumps(results[name])}", flush=True)
+    first = results["cursor page 1"]["p50_ms"]
+    deep = results[f"cursor page {args.page}"]["p50_ms"]
+    return {
+        "tasks": args.tasks,
+        "page": args.page,
+        "results": results,
+        "cursor_deep_to_first_ratio": round(deep / first, 2) if first else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare first and deep page latency")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--tasks", type=int, default=200000, help="Tasks seeded for the user")
+    parser.add_argument("--page", type=int, default=5000, help="Deep page number, 1-based")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per page")
+    parser.add_argument("--max-ratio", type=float, default=2.0, help="Allowed deep/first cursor page p50 ratio")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    ratio = report["cursor_deep_to_first_ratio"]
+    print(f"deep/first cursor page p50 ratio: {ratio}")
+    if ratio is not None and ratio > args.max_ratio:
+        print(f"Deep cursor pages are more than {args.max_ratio}x slower than the first page")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Query Plan Harness
+
+Seeds a dataset, then runs every query shape the API can produce through
+explain() and fails if any winning plan contains a COLLSCAN or an
+in-memory SORT stage:
+- Task listings for every scope, sort field, order and filter
+  combination, on the first page and after a cursor
+- Export, the overdue and due-today counts of /tasks/stats, archival
+  candidates and the reminder scheduler's window
+
+Needs a MongoDB server; the in-memory store has no explain. Run it after
+changing a query or the declared indexes.
+
+Usage (from backend/):
+    python -m benchmarks.explain
+    python -m benchmarks.explain --mongo-url mongodb://localhost:27017 --output plans.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Iterator
+from bson import ObjectId
+from app.archive import archivable_filter
+from app.database import Database
+from app.filters import InvalidFilterError, TaskFilters
+from app.pagination import TASK_SORT_FIELDS, encode_cursor
+from app.repository import TaskRepository
+from .seed import BASE_TIME, user_id
+from .stores import prepare_store
+
+# Winning plan stages that mean a query does not scale with the collection
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+
+SCOPES = ("active", "all", "archived")
+
+# One value per filter; shapes combine up to two of them
+FILTER_OPTIONS = {
+    "completed=true": {"completed": True},
+    "completed=false": {"completed": False},
+    "due_after": {"due_after": BASE_TIME + timedelta(days=30)},
+    "due_before": {"due_before": BASE_TIME + timedelta(days=200)},
+    "overdue": {"overdue": True},
+    "no_due_date": {"no_due_date": True},
+    "created_after": {"created_after": BASE_TIME + timedelta(minutes=10)},
+    "created_before": {"created_before": BASE_TIME + timedelta(hours=1)},
+    "updated_after": {"updated_after": BASE_TIME + timedelta(minutes=10)},
+    "updated_before": {"updated_before": BASE_TIME + timedelta(hours=1)},
+}
+
+
+def filter_combinations() -> Iterator[tuple[str, TaskFilters]]:
+    """Every valid combination of up to two filters, including none."""
+    names = list(FILTER_OPTIONS)
+    for size in range(3):
+        for combo in itertools.combinations(names, size):
+            values = {}
+            for name in combo:
+                values.update(FILTER_OPTIONS[name])
+            if len(values) < size:
+                # Two values of the same filter
+                continue
+            filters = TaskFilters(**values)
+            try:
+                filters.validate()
+            except InvalidFilterError:
+                continue
+            yield "+".join(combo) or "none", filters
+
+
+def plan_stages(explain: dict) -> list[str]:
+    """Stage names of every winning plan in an explain() result."""
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.append(node["stage"])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    def find_plans(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "winningPlan":
+                    walk(value)
+                else:
+                    find_plans(value)
+        elif isinstance(node, list):
+            for value in node:
+                find_plans(value)
+
+    find_plans(explain)
+    return stages
+
+
+async def explain_find(collection, query: dict, sort=None, hint=None, limit: int = 0) -> dict:
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if hint:
+        cursor = cursor.hint(hint)
+    return await cursor.limit(limit).explain()
+
+
+async def explain_count(collection, query: dict) -> dict:
+    # count_documents runs as an aggregation
+    return await Database.get_db().command({
+        "explain": {
+            "aggregate": collection.name,
+            "pipeline": [{"$match": query}, {"$group": {"_id": 1, "n": {"$sum": 1}}}],
+            "cursor": {},
+        },
+        "verbosity": "queryPlanner",
+    })
+
+
+async def cursor_docs(owner: str) -> list[dict]:
+    """Tasks to resume listings after: one with every sort field set, one without a due date."""
+    collection = TaskRepository.collection()
+    full = await collection.find_one({"user_id": ObjectId(owner), "due_date": {"$ne": None}, "updated_at": {"$ne": None}})
+    empty = await collection.find_one({"user_id": ObjectId(owner), "due_date": None})
+    return [doc for doc in (full, empty) if doc is not None]
+
+
+async def listing_shapes(owner: str) -> list[tuple[str, object]]:
+    """Name and explain() coroutine of every task listing shape."""
+    resume_from = await cursor_docs(owner)
+    shapes = []
+    for scope, sort, order in itertools.product(SCOPES, TASK_SORT_FIELDS, ("asc", "desc")):
+        cursors = [(None, None)] + [
+            ("null" if doc.get(sort) is None else "value", encode_cursor(doc, sort, order))
+            for doc in resume_from
+        ]
+        for (filter_name, filters), (cursor_kind, cursor) in itertools.product(filter_combinations(), cursors):
+            name = f"list scope={scope} sort={sort} order={order} filters={filter_name}"
+            if cursor_kind:
+                name += f" cursor={cursor_kind}"
+            for listing in TaskRepository.listing_queries(owner, filters, sort, order, cursor, scope=scope):
+                shapes.append((
+                    f"{name} collection={listing.collection.name}",
+                    explain_find(listing.collection, listing.query, listing.sort, listing.hint, limit=50)
+                ))
+    return shapes
+
+
+def other_shapes(owner: str) -> list[tuple[str, object]]:
+    """Queries issued outside task listings, as built by their modules."""
+    tasks = TaskRepository.collection()
+    oid = ObjectId(owner)
+    now = BASE_TIME + timedelta(days=100)
+    return [
+        # TaskRepository.iter_for_user
+        ("export", explain_find(tasks, {"user_id": oid}, [("_id", 1)])),
+        # TaskStats.get
+        ("stats overdue", explain_count(tasks, {"user_id": oid, "completed": False, "due_date": {"$lt": now}})),
+        ("stats due_today", explain_count(tasks, {
+            "user_id": oid, "completed": False,
+            "due_date": {"$gte": now, "$lt": now + timedelta(days=1)}
+        })),
+        # TaskArchiver.archive_batch
+        ("archivable", explain_find(tasks, archivable_filter(now), [("updated_at", 1)], limit=500)),
+        # ReminderScheduler._refill
+        ("reminder window", explain_find(
+            tasks,
+            {"completed": False, "due_date": {"$gte": now, "$lt": now + timedelta(minutes=15)}},
+            [("due_date", 1), ("_id", 1)],
+            limit=1000
+        )),
+    ]
+
+
+async def seed_shapes_dataset(mongo_url: str, users: int, tasks_per_user: int):
+    await prepare_store("mongo", mongo_url, users, tasks_per_user)
+    db = Database.get_db()
+    # Seeded tasks have no updated_at; give all but the oldest ones one
+    await db.tasks.update_many(
+        {"created_at": {"$gte": BASE_TIME + timedelta(minutes=5)}},
+        [{"$set": {"updated_at": {"$add": ["$created_at", 60 * 1000]}}}]
+    )
+    # Archive a slice of the completed tasks
+    archived = [
+        {**doc, "archived_at": datetime.utcnow()}
+        async for doc in db.tasks.find({"completed": True}).limit(users * tasks_per_user // 10)
+    ]
+    if archived:
+        await db.tasks_archive.insert_many(archived)
+        await db.tasks.delete_many({"_id": {"$in": [doc["_id"] for doc in archived]}})
+
+
+async def run(args) -> dict:
+    await seed_shapes_dataset(args.mongo_url, args.users, args.tasks)
+    owner = user_id(0)
+    shapes = await listing_shapes(owner) + other_shapes(owner)
+
+    results = {}
+    failures = {}
+    for name, explain in shapes:
+        stages = plan_stages(await explain)
+        results[name] = stages
+        bad = sorted(FORBIDDEN_STAGES.intersection(stages))
+        if bad:
+            failures[name] = bad
+    await Database.close_database_connection()
+    return {"shapes": len(results), "failures": failures, "plans": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that every API query shape is served by an index")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=5000, help="Tasks per user")
+    parser.add_argument("--output", help="Write every shape's plan stages to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    for name, stages in report["failures"].items():
+        print(f"FAIL {name}: {', '.join(stages)}")
+    print(f"{report['shapes']} query shapes, {len(report['failures'])} with a collection scan or in-memory sort")
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
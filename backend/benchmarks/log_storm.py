@@ -0,0 +1,84 @@
+"""
+Log Storm Benchmark
+
+Measures throughput of the 4xx error scenarios under each logging
+pipeline, with log output written to a file:
+
+- sync: records formatted and written by the request's thread
+- async: records written by the QueueListener thread
+- async+sampled: as async, with repeated warnings sampled (the default)
+
+Usage (from backend/):
+    python -m benchmarks.log_storm --requests 2000 --output log_storm.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from .scenarios import ERROR_SCENARIOS
+
+PIPELINES = {
+    "sync": {"LOG_ASYNC": "false", "LOG_SAMPLE_BURST": "0"},
+    "async": {"LOG_ASYNC": "true", "LOG_SAMPLE_BURST": "0"},
+    "async+sampled": {"LOG_ASYNC": "true"},
+}
+
+
+def run_pipeline(name: str, args, workdir: str) -> dict:
+    report_path = os.path.join(workdir, f"{name}.json")
+    log_path = os.path.join(workdir, f"{name}.log")
+    env = {**os.environ, **PIPELINES[name]}
+    with open(log_path, "w") as log_file:
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.run",
+                "--transport", args.transport,
+                "--users", str(args.users),
+                "--tasks", str(args.tasks),
+                "--requests", str(args.requests),
+                "--concurrency", str(args.concurrency),
+                "--scenarios", *ERROR_SCENARIOS,
+                "--output", report_path,
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=log_file,
+            check=True
+        )
+    with open(report_path) as f:
+        results = json.load(f)["results"]
+    results["log_bytes"] = os.path.getsize(log_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logging under a 4xx storm")
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in PIPELINES:
+            report[name] = run_pipeline(name, args, workdir)
+            summary = ", ".join(
+                f"{scenario} {report[name][scenario]['throughput_rps']} req/s "
+                f"(p99 {report[name][scenario]['p99_ms']}ms)"
+                for scenario in ERROR_SCENARIOS
+            )
+            print(f"{name:>14}: {summary}, {report[name]['log_bytes']} log bytes")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
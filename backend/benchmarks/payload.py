@@ -0,0 +1,88 @@
+"""
+Payload Benchmark
+
+Measures response bytes and latency of large task listing pages with
+long descriptions, for full and sparse fieldsets under each available
+content encoding.
+
+Usage (from backend/):
+    python -m benchmarks.payload --page-size 1000 --description-length 2000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import httpx
+from app.compression import available_encoders
+from app.config import settings
+from app.hashing import PasswordHasher
+from app.main import app
+from .scenarios import BenchContext
+from .stores import STORES, prepare_store
+
+FIELDSETS = {
+    "full": None,
+    "list_view": "title,completed,due_date",
+}
+
+
+async def measure(client, headers: dict, params: dict, repeats: int) -> dict:
+    latencies = []
+    size = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        async with client.stream("GET", "/tasks", params=params, headers=headers) as response:
+            response.raise_for_status()
+            size = sum([len(chunk) async for chunk in response.aiter_raw()])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "bytes": size,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+async def run(args) -> dict:
+    settings.rate_limit_enabled = False
+    await prepare_store(args.store, args.mongo_url, 1, args.page_size, description_length=args.description_length)
+    PasswordHasher.start()
+    ctx = BenchContext(users=1, tasks_per_user=args.page_size)
+    encodings = ["identity", *available_encoders()]
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for fieldset, fields in FIELDSETS.items():
+            params = {"limit": args.page_size}
+            if fields:
+                params["fields"] = fields
+            for encoding in encodings:
+                headers = {**ctx.headers[0], "Accept-Encoding": encoding}
+                key = f"{fieldset}/{encoding}"
+                results[key] = await measure(client, headers, params, args.repeats)
+                print(f"{key:>22}: {json.dumps(results[key])}", flush=True)
+    PasswordHasher.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task listing payload size")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--description-length", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
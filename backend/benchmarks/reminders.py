@@ -0,0 +1,125 @@
+"""
+Reminder Scheduler Benchmark
+
+Seeds pending tasks with due dates spread evenly over the coming days
+and measures what the reminder scheduler loads: time to take over as
+leader and page its window into the heap, heap entries against pending
+tasks, and the time to fire a burst of reminders that fall due together.
+
+Usage (from backend/):
+    python -m benchmarks.reminders --tasks 100000 --burst 5000
+    python -m benchmarks.reminders --store mongo --tasks 1000000 --output reminders.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.config import settings
+from app.database import Database
+from app.reminders import ReminderScheduler, ReminderSink, SINKS
+from .seed import user_id
+from .stores import STORES, prepare_store
+
+
+class CountingSink(ReminderSink):
+    """Sink that only counts reminders, so delivery cost is not measured."""
+    delivered = 0
+
+    async def send(self, reminders: list[dict]):
+        CountingSink.delivered += len(reminders)
+
+
+async def seed_due_tasks(count: int, days: float, start: datetime, batch_size: int = 10000):
+    owner = ObjectId(user_id(0))
+    step = timedelta(days=days) / max(1, count)
+    batch = []
+    for i in range(count):
+        batch.append({
+            "user_id": owner,
+            "title": f"Due {i}",
+            "due_date": start + step * i,
+            "completed": False,
+            "created_at": start,
+        })
+        if len(batch) >= batch_size:
+            await Database.get_db().tasks.insert_many(batch)
+            batch = []
+    if batch:
+        await Database.get_db().tasks.insert_many(batch)
+
+
+async def run(args) -> dict:
+    await prepare_store(args.store, args.mongo_url, 1, 0)
+    SINKS["counting"] = CountingSink
+    settings.reminder_sink = "counting"
+    settings.reminder_offsets_minutes = [60]
+    settings.reminder_window_seconds = args.window
+
+    offset = timedelta(minutes=60)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    await seed_due_tasks(args.tasks, args.days, now + offset + timedelta(minutes=5))
+    seeded = time.perf_counter() - started
+
+    ReminderScheduler.wakeup = asyncio.Event()
+    started = time.perf_counter()
+    await ReminderScheduler._lead(datetime.utcnow())
+    lead_seconds = time.perf_counter() - started
+    window_entries = len(ReminderScheduler.heap)
+
+    # A burst of reminders falling due at the same moment
+    burst_due = datetime.utcnow() + offset + timedelta(seconds=1)
+    docs = [
+        {"user_id": ObjectId(user_id(0)), "title": f"Burst {i}", "due_date": burst_due, "completed": False}
+        for i in range(args.burst)
+    ]
+    await Database.get_db().tasks.insert_many(docs)
+    ReminderScheduler.on_change(doc["_id"] for doc in docs)
+    await ReminderScheduler._reschedule_dirty(datetime.utcnow())
+    await asyncio.sleep(max(0.0, (burst_due - offset - datetime.utcnow()).total_seconds()))
+
+    started = time.perf_counter()
+    while CountingSink.delivered < args.burst and await ReminderScheduler._fire_due(datetime.utcnow()):
+        pass
+    fire_seconds = time.perf_counter() - started
+    ReminderScheduler._reset()
+
+    return {
+        "pending_tasks": args.tasks,
+        "seed_seconds": round(seeded, 2),
+        "window_seconds": args.window,
+        "window_entries": window_entries,
+        "lead_ms": round(lead_seconds * 1000, 2),
+        "burst": args.burst,
+        "burst_delivered": CountingSink.delivered,
+        "burst_fire_ms": round(fire_seconds * 1000, 2),
+        "burst_reminders_per_second": round(CountingSink.delivered / fire_seconds, 1) if fire_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reminder scheduler")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--tasks", type=int, default=100000, help="Pending tasks with due dates")
+    parser.add_argument("--days", type=float, default=30, help="Days the due dates are spread over")
+    parser.add_argument("--window", type=int, default=settings.reminder_window_seconds)
+    parser.add_argument("--burst", type=int, default=5000, help="Reminders falling due at once")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f"{key:>28}: {value}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark Runner
+
+Drives the API through an in-process ASGI transport or a uvicorn server
+process, against a seeded in-memory store or local mongod, and reports
+throughput and latency percentiles per scenario.
+
+Usage (from backend/):
+    python -m benchmarks.run --transport asgi --store memory --output results.json
+    python -m benchmarks.run --baseline baseline.json --threshold 0.2
+    python -m benchmarks.run --scenarios list_during_logins --hashing inline
+
+With --baseline, the run fails (exit code 1) when any scenario's p95
+latency grows, or its throughput drops, by more than the threshold.
+
+With --hashing inline (ASGI transport only), bcrypt runs on the event
+loop as it did before the hashing pool, for before/after comparisons.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+import httpx
+from app.config import settings
+from app.hashing import PasswordHasher
+from app.main import app
+from .scenarios import AUTH_SCENARIOS, MIXED_SCENARIOS, SCENARIOS, BenchContext
+from .stores import STORES, prepare_store
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def inline_hash(func, *args):
+    """PasswordHasher.run replacement that hashes on the event loop."""
+    return func(*args)
+
+
+async def run_scenario(
+    client, ctx, name: str, requests: int, concurrency: int, background: Optional[str] = None
+) -> dict:
+    """
+    Issue a scenario's requests from concurrent workers and summarize them.
+
+    Args:
+        client: Client for the API under test
+        ctx: The benchmark context
+        name: Scenario to measure
+        requests: Number of measured requests
+        concurrency: Number of measuring workers
+        background: Scenario looped by as many extra workers until the
+            measured requests are done; only the measured ones are timed
+
+    Returns:
+        dict: Request and error counts, throughput and latency percentiles
+    """
+    scenario, expected_status = SCENARIOS[name]
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+    done = False
+    background_requests = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, ctx, i)
+                ok = response.status_code == expected_status
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    async def background_worker(offset: int):
+        nonlocal background_requests
+        load, _ = SCENARIOS[background]
+        i = offset
+        while not done:
+            try:
+                await load(client, ctx, i)
+            except httpx.HTTPError:
+                pass
+            background_requests += 1
+            i += concurrency
+
+    loaders = [asyncio.create_task(background_worker(n)) for n in range(concurrency)] if background else []
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - started
+        done = True
+        await asyncio.gather(*loaders)
+
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+    if background:
+        result["background_requests"] = background_requests
+    return result
+
+
+async def wait_for_server(base_url: str, process: subprocess.Popen, timeout: float = 120):
+    """Poll /health until the server answers or the process dies."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("Benchmark server exited during startup")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Benchmark server did not become ready in time")
+
+
+async def run(args) -> dict:
+    ctx = BenchContext(users=args.users, tasks_per_user=args.tasks)
+    # Mixed scenarios only run when asked for
+    selected = args.scenarios or list(SCENARIOS)
+    process: Optional[subprocess.Popen] = None
+
+    if args.transport == "asgi":
+        settings.rate_limit_enabled = False
+        await prepare_store(args.store, args.mongo_url, args.users, args.tasks)
+        PasswordHasher.start()
+        if args.hashing == "inline":
+            PasswordHasher.run = inline_hash
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    else:
+        process = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.server",
+            "--port", str(args.port),
+            "--store", args.store,
+            "--mongo-url", args.mongo_url,
+            "--users", str(args.users),
+            "--tasks", str(args.tasks),
+        ])
+        base_url = f"http://127.0.0.1:{args.port}"
+        await wait_for_server(base_url, process)
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+            timeout=60
+        )
+
+    results = {}
+    try:
+        for name in SCENARIOS:
+            if name not in selected:
+                continue
+            requests = args.auth_requests if name in AUTH_SCENARIOS else args.requests
+            results[name] = await run_scenario(client, ctx, name, requests, args.concurrency)
+            print(f"{name:>18}: {json.dumps(results[name])}", flush=True)
+        for name, (measured, background) in MIXED_SCENARIOS.items():
+            if name not in selected:
+                continue
+            results[name] = await run_scenario(
+                client, ctx, measured, args.requests, args.concurrency, background=background
+            )
+            print(f"{name:>18}: {json.dumps(results[name])}", flush=True)
+    finally:
+        await client.aclose()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        else:
+            PasswordHasher.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "transport": args.transport,
+            "store": args.store,
+            "users": args.users,
+            "tasks_per_user": args.tasks,
+            "concurrency": args.concurrency,
+            "hashing": args.hashing,
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare a report to a baseline.
+
+    Args:
+        report: The current benchmark report
+        baseline: A report saved from an earlier run
+        threshold: Allowed relative regression, e.g. 0.2 for 20%
+
+    Returns:
+        list: One message per regression found
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TodoList API")
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks seeded per user")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--auth-requests", type=int, default=50, help="Requests per signup/login scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS) + list(MIXED_SCENARIOS))
+    parser.add_argument(
+        "--hashing", choices=("pool", "inline"), default="pool",
+        help="inline hashes on the event loop, as before the hashing pool (asgi transport only)"
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Fail on regressions against this JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+    if args.hashing == "inline" and args.transport != "asgi":
+        parser.error("--hashing inline needs --transport asgi")
+
+    # Per-request client logging would dominate the output
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Performance regressions:")
+            for message in regressions:
+                print(f"  - {message}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
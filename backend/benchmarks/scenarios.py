@@ -0,0 +1,157 @@
+"""
+Benchmark Scenarios Module
+
+Each scenario issues one request for a given iteration number and returns
+the response. Iterations are spread across the seeded users, and the
+mutating scenarios touch distinct seeded tasks.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable
+import httpx
+from app.auth import create_access_token, user_claims
+from app.pagination import encode_cursor
+from .seed import BASE_TIME, PASSWORD, task_id, user_email, user_id
+
+PAGE_SIZE = 20
+
+
+@dataclass
+class BenchContext:
+    """Seeded dataset shape and per-user credentials."""
+    users: int
+    tasks_per_user: int
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    headers: list[dict] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.headers = [
+            {"Authorization": "Bearer " + create_access_token(
+                user_claims({"_id": user_id(u), "email": user_email(u), "name": "Bench User"}),
+                expires_delta=timedelta(hours=6)
+            )}
+            for u in range(self.users)
+        ]
+
+    def user(self, i: int) -> int:
+        return i % self.users
+
+    def deep_offset(self) -> int:
+        return max(0, self.tasks_per_user - 2 * PAGE_SIZE)
+
+
+Scenario = Callable[[httpx.AsyncClient, BenchContext, int], Awaitable[httpx.Response]]
+
+
+async def signup(client, ctx, i):
+    return await client.post("/auth/signup", json={
+        "name": "Bench User",
+        "email": f"new-{ctx.run_id}-{i}@example.com",
+        "password": PASSWORD
+    })
+
+
+async def login(client, ctx, i):
+    return await client.post("/auth/login", data={
+        "username": user_email(ctx.user(i)),
+        "password": PASSWORD
+    })
+
+
+async def list_shallow(client, ctx, i):
+    return await client.get("/tasks", params={"limit": PAGE_SIZE}, headers=ctx.headers[ctx.user(i)])
+
+
+async def list_deep_skip(client, ctx, i):
+    return await client.get(
+        "/tasks",
+        params={"limit": PAGE_SIZE, "skip": ctx.deep_offset()},
+        headers=ctx.headers[ctx.user(i)]
+    )
+
+
+async def list_deep_cursor(client, ctx, i):
+    u = ctx.user(i)
+    # Seeded tasks are created one second apart, so the cursor for the
+    # deep offset can be built without reading the previous page
+    last = ctx.deep_offset() - 1
+    cursor = encode_cursor(
+        {"_id": task_id(u, last), "created_at": BASE_TIME + timedelta(seconds=last)},
+        "created_at",
+        "asc"
+    )
+    return await client.get(
+        "/tasks",
+        params={"limit": PAGE_SIZE, "cursor": cursor},
+        headers=ctx.headers[u]
+    )
+
+
+async def create(client, ctx, i):
+    return await client.post(
+        "/tasks",
+        json={"title": f"Bench task {i}", "description": "Created by the benchmark"},
+        headers=ctx.headers[ctx.user(i)]
+    )
+
+
+async def update(client, ctx, i):
+    u = ctx.user(i)
+    t = (i // ctx.users) % ctx.tasks_per_user
+    return await client.put(
+        f"/tasks/{task_id(u, t)}",
+        json={"title": f"Updated task {t}"},
+        headers=ctx.headers[u]
+    )
+
+
+async def delete(client, ctx, i):
+    u = ctx.user(i)
+    # Delete from the end of each user's tasks so earlier scenarios'
+    # pages are unaffected
+    t = ctx.tasks_per_user - 1 - (i // ctx.users)
+    return await client.delete(f"/tasks/{task_id(u, t)}", headers=ctx.headers[u])
+
+
+async def unauthorized(client, ctx, i):
+    return await client.get("/tasks", params={"limit": PAGE_SIZE}, headers={"Authorization": "Bearer not-a-token"})
+
+
+async def not_found(client, ctx, i):
+    u = ctx.user(i)
+    # Valid ids past the seeded range, so every request is a 404
+    return await client.put(
+        f"/tasks/{task_id(u, ctx.tasks_per_user + i)}",
+        json={"title": "Missing"},
+        headers=ctx.headers[u]
+    )
+
+
+# Scenarios in run order, with the status code a successful request returns
+SCENARIOS: dict[str, tuple[Scenario, int]] = {
+    "signup": (signup, 201),
+    "login": (login, 200),
+    "list_shallow": (list_shallow, 200),
+    "list_deep_skip": (list_deep_skip, 200),
+    "list_deep_cursor": (list_deep_cursor, 200),
+    "create": (create, 201),
+    "update": (update, 200),
+    "delete": (delete, 200),
+    "unauthorized": (unauthorized, 401),
+    "not_found": (not_found, 404),
+}
+
+# Scenarios measured while another scenario loads the server from as many
+# workers again: name -> (measured scenario, background scenario).
+# list_during_logins shows whether bcrypt work stalls task listings.
+MIXED_SCENARIOS: dict[str, tuple[str, str]] = {
+    "list_during_logins": ("list_shallow", "login"),
+}
+
+# Client error storms, for measuring logging overhead
+ERROR_SCENARIOS = ("unauthorized", "not_found")
+
+# Scenarios dominated by bcrypt, which get their own request count
+AUTH_SCENARIOS = ("signup", "login")
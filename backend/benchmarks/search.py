@@ -0,0 +1,98 @@
+"""
+Search Benchmark
+
+Seeds one user with 10k and then 100k tasks and times GET /tasks/search
+for a term matching every task, a term matching one task and a short
+prefix expanding to many terms. The first query is reported on its own:
+with the in-memory engine it builds the user's index.
+
+Usage (from backend/):
+    python -m benchmarks.search
+    python -m benchmarks.search --store mongo --engine mongo --sizes 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import httpx
+from app import search
+from app.config import settings
+from app.database import Database
+from app.main import app
+from .run import percentile
+from .scenarios import BenchContext
+from .stores import STORES, prepare_store
+
+# name -> query; seeded descriptions read "Seeded benchmark task number <n>"
+QUERIES = {
+    "common": "task",
+    "rare": "4242",
+    "prefix": "12",
+}
+
+
+async def time_query(client, headers: dict, q: str, requests: int) -> dict:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/tasks/search", params={"q": q, "limit": 20}, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200 or not response.json():
+            raise RuntimeError(f"Unexpected search response: {response.status_code}")
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+async def run_size(args, tasks: int) -> dict:
+    settings.rate_limit_enabled = False
+    await prepare_store(args.store, args.mongo_url, 1, tasks)
+    settings.search_engine = args.engine
+    search._engine = None
+    headers = BenchContext(users=1, tasks_per_user=tasks).headers[0]
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            (await client.get("/tasks/search", params={"q": "task"}, headers=headers)).raise_for_status()
+            results["first_query_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            for name, q in QUERIES.items():
+                results[name] = await time_query(client, headers, q, args.requests)
+    finally:
+        await Database.close_database_connection()
+    return results
+
+
+async def run(args) -> dict:
+    if args.store == "memory" and args.engine != "memory":
+        raise SystemExit("The memory store needs --engine memory")
+    report = {"store": args.store, "engine": args.engine, "results": {}}
+    for tasks in args.sizes:
+        results = report["results"][str(tasks)] = await run_size(args, tasks)
+        print(f"{tasks:>8} tasks: {json.dumps(results)}", flush=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task search latency")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--engine", choices=list(search.SEARCH_ENGINES), default="memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Tasks seeded for the user")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per query")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Seed Data Module
+
+This module creates deterministic benchmark users and tasks, so the
+benchmark client can derive ids and tokens without reading them back
+from the server.
+"""
+
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.auth import get_password_hash
+
+PASSWORD = "Bench1234"
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def user_id(index: int) -> str:
+    """Id of the index-th benchmark user."""
+    return str(ObjectId(f"aa{index:022x}"))
+
+
+def user_email(index: int) -> str:
+    """Email of the index-th benchmark user."""
+    return f"bench{index}@example.com"
+
+
+def task_id(user_index: int, task_index: int) -> ObjectId:
+    """Id of a user's task_index-th seeded task."""
+    return ObjectId(f"bb{user_index:010x}{task_index:012x}")
+
+
+def description(task_index: int, length: int) -> str:
+    """Description of a seeded task, padded to at least length characters."""
+    text = f"Seeded benchmark task number {task_index}"
+    if len(text) >= length:
+        return text
+    filler = " Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor."
+    return (text + filler * (length // len(filler) + 1))[:length]
+
+
+async def seed(db, users: int, tasks_per_user: int, batch_size: int = 5000, description_length: int = 0):
+    """
+    Insert benchmark users and their tasks.
+
+    Args:
+        db: The database to seed
+        users: Number of users
+        tasks_per_user: Number of tasks per user
+        batch_size: Tasks inserted per insert_many call
+        description_length: Minimum task description length
+    """
+    hashed = get_password_hash(PASSWORD)
+    await db.users.insert_many([
+        {
+            "_id": user_id(u),
+            "name": "Bench User",
+            "email": user_email(u),
+            "password": hashed,
+            "created_at": BASE_TIME,
+            "tasks_version": 0,
+            "task_counts": {"total": tasks_per_user, "completed": tasks_per_user // 2}
+        }
+        for u in range(users)
+    ])
+
+    batch = []
+    for u in range(users):
+        owner = ObjectId(user_id(u))
+        for t in range(tasks_per_user):
+            batch.append({
+                "_id": task_id(u, t),
+                "user_id": owner,
+                "title": f"Task {t}",
+                "description": description(t, description_length),
+                "due_date": BASE_TIME + timedelta(days=t % 365) if t % 3 else None,
+                "created_at": BASE_TIME + timedelta(seconds=t),
+                "completed": t % 2 == 1
+            })
+            if len(batch) >= batch_size:
+                await db.tasks.insert_many(batch)
+                batch = []
+    if batch:
+        await db.tasks.insert_many(batch)
@@ -0,0 +1,105 @@
+"""
+Task List Serialization Microbenchmark
+
+Times encoding a page of task documents into the response body, through
+FastAPI's response_model path (validation against list[Task],
+jsonable_encoder, then JSON encoding) and through TaskListResponse, the
+fast path enabled by FAST_TASK_SERIALIZATION. Both bodies are checked to
+be byte-identical before timing.
+
+Usage (from backend/):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 10 100 1000 --repeats 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.repository import serialize_task
+from app.responses import TaskListResponse
+from app.schemas import Task
+from .run import percentile
+from .seed import BASE_TIME, description
+
+RESPONSE_FIELD = create_response_field(name="Response_get_tasks", type_=list[Task])
+
+
+def make_tasks(count: int) -> list[dict]:
+    """Serialized task documents, as the repository returns them for a page."""
+    owner = ObjectId()
+    return [
+        serialize_task({
+            "_id": ObjectId(),
+            "user_id": owner,
+            "title": f"Task {i}",
+            "description": description(i, 120),
+            "due_date": BASE_TIME + timedelta(days=i) if i % 3 else None,
+            "created_at": BASE_TIME + timedelta(seconds=i),
+            "updated_at": datetime(2024, 6, 1, 12, 30) if i % 2 else None,
+            "completed": i % 2 == 1,
+        })
+        for i in range(count)
+    ]
+
+
+async def response_model_body(tasks: list[dict]) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=tasks)
+    return JSONResponse(content).body
+
+
+async def fast_body(tasks: list[dict]) -> bytes:
+    return TaskListResponse(tasks).body
+
+
+async def time_encoder(encode, tasks: list[dict], repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await encode(tasks)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_us": round(percentile(timings, 0.50) * 1e6, 1),
+        "p95_us": round(percentile(timings, 0.95) * 1e6, 1),
+    }
+
+
+async def run(args) -> dict:
+    report = {}
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        expected = await response_model_body(tasks)
+        if await fast_body(tasks) != expected:
+            raise SystemExit(f"Fast path output differs from response_model output at {size} items")
+        current = await time_encoder(response_model_body, tasks, args.repeats)
+        fast = await time_encoder(fast_body, tasks, args.repeats)
+        report[size] = {
+            "response_model": current,
+            "fast": fast,
+            "speedup": round(current["p50_us"] / fast["p50_us"], 2) if fast["p50_us"] else None,
+        }
+        print(f"{size:>6} items: {json.dumps(report[size])}", flush=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare task list serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000], help="Page sizes")
+    parser.add_argument("--repeats", type=int, default=200, help="Encodings timed per size and path")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
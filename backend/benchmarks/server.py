@@ -0,0 +1,48 @@
+"""
+Benchmark Server Module
+
+Runs the API under uvicorn in its own process, against a freshly seeded
+benchmark store. Started by benchmarks.run for the uvicorn transport.
+"""
+
+import argparse
+import asyncio
+import uvicorn
+from app.config import settings
+from app.hashing import PasswordHasher
+from app.main import app
+from app.pubsub import get_broker
+from app.serve import DrainingServer
+from .stores import STORES, prepare_store
+
+
+async def serve(args):
+    await prepare_store(args.store, args.mongo_url, args.users, args.tasks)
+    PasswordHasher.start()
+    await get_broker().start()
+    # Drains open event streams on SIGTERM, as the production server does
+    server = DrainingServer(uvicorn.Config(
+        app, host="127.0.0.1", port=args.port, lifespan="off", log_level="warning"
+    ))
+    try:
+        await server.serve()
+    finally:
+        await get_broker().stop()
+        PasswordHasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API for benchmarking")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000)
+    args = parser.parse_args()
+
+    settings.rate_limit_enabled = False
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Startup Benchmark
+
+Measures worker cold start in fresh processes: importing app.main,
+running the startup handlers, and serving the first request. Compare
+the default boot (indexes verified in the background) with the old
+behaviour of creating indexes before serving:
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --store mongo --index-mode create --output startup.json
+
+Only the standard library is imported at module level, so the child
+process's import timing covers the whole application.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+
+
+def _child(store: str, mongo_url: str):
+    import asyncio
+    started = time.perf_counter()
+
+    os.environ["STORAGE_BACKEND"] = store
+    if store == "mongo":
+        os.environ["MONGODB_URL"] = mongo_url
+    from app.main import app
+    imported = time.perf_counter()
+
+    async def boot():
+        import httpx
+        await app.router.startup()
+        booted = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+        served = time.perf_counter()
+        await app.router.shutdown()
+        return booted, served
+
+    booted, served = asyncio.run(boot())
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (booted - imported) * 1000,
+        "first_request_ms": (served - booted) * 1000,
+        "total_ms": (served - started) * 1000,
+    }))
+
+
+def run_once(args) -> dict:
+    env = dict(os.environ)
+    env["AUTO_CREATE_INDEXES"] = "true" if args.index_mode == "create" else "false"
+    env["STATS_RECONCILE_INTERVAL_SECONDS"] = "0"
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--store", args.store, "--mongo-url", args.mongo_url],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker cold start")
+    parser.add_argument("--store", choices=("memory", "mongo"), default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--index-mode", choices=("verify", "create"), default="verify")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.store, args.mongo_url)
+        return
+
+    runs = [run_once(args) for _ in range(args.runs)]
+    summary = {
+        phase: {
+            "median": round(statistics.median(run[phase] for run in runs), 2),
+            "max": round(max(run[phase] for run in runs), 2),
+        }
+        for phase in PHASES
+    }
+    for phase, values in summary.items():
+        print(f"{phase:>18}: median {values['median']}ms, max {values['max']}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"store": args.store, "index_mode": args.index_mode, "runs": args.runs},
+                "results": summary,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
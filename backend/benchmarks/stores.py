@@ -0,0 +1,44 @@
+"""
+Benchmark Stores Module
+
+This module points the Database class at the store a benchmark runs
+against: a local mongod, or the in-memory storage backend, which needs
+no server. Comparing the two separates the app's own per-request
+overhead from database latency.
+"""
+
+from app.config import settings
+from app.database import Database
+from .seed import seed
+
+STORES = ("memory", "mongo")
+
+
+async def prepare_store(
+    store: str, mongo_url: str, users: int, tasks_per_user: int, description_length: int = 0
+):
+    """
+    Connect Database to the benchmark store and seed it from scratch.
+
+    Args:
+        store: "memory" or "mongo"
+        mongo_url: MongoDB URL, used by the mongo store
+        users: Number of users to seed
+        tasks_per_user: Number of tasks to seed per user
+        description_length: Minimum task description length
+
+    """
+    settings.database_name = "todolist_bench"
+    settings.storage_backend = store
+    if store == "memory":
+        # A fresh in-memory store, with its indexes created on connect
+        settings.search_engine = "memory"
+        await Database.connect_to_database(check_indexes=False)
+    else:
+        settings.mongodb_url = mongo_url
+        await Database.connect_to_database(check_indexes=False)
+        for name in await Database.db.list_collection_names():
+            await Database.db[name].delete_many({})
+        await Database.create_indexes()
+
+    await seed(Database.db, users, tasks_per_user, description_length=description_length)
@@ -0,0 +1,167 @@
+"""
+Stream Connection Benchmark
+
+Opens many idle /tasks/stream (SSE) connections against a uvicorn server
+process and reports the server's resident memory per connection, whether
+every connection received a batched heartbeat, and /health latency while
+the connections are open. Memory is read from /proc, so this runs on
+Linux only.
+
+Exits non-zero when memory per connection exceeds --max-kb-per-connection
+or any connection misses its heartbeat.
+
+The client and the server each hold one socket per connection; raise
+`ulimit -n` above --connections if the default is lower.
+
+Usage (from backend/):
+    python -m benchmarks.streams
+    python -m benchmarks.streams --connections 10000 --heartbeat 5 --output streams.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+import httpx
+from .run import percentile, wait_for_server
+from .scenarios import BenchContext
+
+
+def rss_kb(pid: int) -> int:
+    """Resident set size of a process in KiB."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+async def open_stream(port: int, token: str):
+    """Open an SSE connection and wait for its first frame."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /tasks/stream?token={token} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"retry: 3000\n\n")
+    if not head.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(f"Stream refused: {head.splitlines()[0]!r}")
+    return reader, writer
+
+
+async def wait_heartbeat(reader: asyncio.StreamReader, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(reader.readuntil(b"event: heartbeat\n"), timeout)
+        return True
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return False
+
+
+async def health_latency(base_url: str, requests: int) -> dict:
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+async def run(args) -> dict:
+    ctx = BenchContext(users=args.users, tasks_per_user=1)
+    tokens = [h["Authorization"].split(" ", 1)[1] for h in ctx.headers]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.server", "--port", str(args.port), "--users", str(args.users), "--tasks", "1"],
+        env={**os.environ, "STREAM_HEARTBEAT_SECONDS": str(args.heartbeat)},
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    streams = []
+    try:
+        await wait_for_server(base_url, process)
+        await health_latency(base_url, 20)
+        idle = await health_latency(base_url, args.requests)
+        before = rss_kb(process.pid)
+
+        start = time.perf_counter()
+        for batch in range(0, args.connections, args.batch):
+            size = min(args.batch, args.connections - batch)
+            streams += await asyncio.gather(*(
+                open_stream(args.port, tokens[(batch + i) % len(tokens)]) for i in range(size)
+            ))
+        connect_s = time.perf_counter() - start
+        await asyncio.sleep(1)
+        after = rss_kb(process.pid)
+        loaded = await health_latency(base_url, args.requests)
+
+        received = await asyncio.gather(*(
+            wait_heartbeat(reader, args.heartbeat * 2 + 5) for reader, _ in streams
+        ))
+        per_connection = (after - before) / args.connections
+        print(f"connections: {args.connections} in {connect_s:.1f}s", flush=True)
+        print(f"server rss: {before} KiB -> {after} KiB ({per_connection:.1f} KiB per connection)", flush=True)
+        print(f"heartbeats: {sum(received)}/{args.connections}", flush=True)
+        print(f"/health idle: {json.dumps(idle)}, with connections open: {json.dumps(loaded)}", flush=True)
+    finally:
+        for _, writer in streams:
+            writer.close()
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "connections": args.connections,
+            "users": args.users,
+            "heartbeat_seconds": args.heartbeat,
+        },
+        "results": {
+            "connect_seconds": round(connect_s, 2),
+            "rss_before_kb": before,
+            "rss_after_kb": after,
+            "kb_per_connection": round(per_connection, 2),
+            "heartbeats_received": sum(received),
+            "health_idle": idle,
+            "health_with_connections": loaded,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark idle SSE connections")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100, help="Connections are spread over this many users")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--batch", type=int, default=500, help="Connections opened concurrently")
+    parser.add_argument("--heartbeat", type=int, default=5, help="Server heartbeat interval in seconds")
+    parser.add_argument("--requests", type=int, default=200, help="/health requests per latency sample")
+    parser.add_argument("--max-kb-per-connection", type=float, default=64)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    results = report["results"]
+    failures = []
+    if results["kb_per_connection"] > args.max_kb_per_connection:
+        failures.append(f"{results['kb_per_connection']} KiB per connection exceeds {args.max_kb_per_connection}")
+    if results["heartbeats_received"] < args.connections:
+        failures.append(f"only {results['heartbeats_received']}/{args.connections} connections got a heartbeat")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Toggle Storm Benchmark
+
+Fires concurrent PUT /tasks/{id} checkbox toggles at a few hot tasks
+per user, with write coalescing off and on, and reports request
+throughput and latency alongside MongoDB operations per second.
+
+MongoDB operations are counted client-side, so the count works for
+both the in-memory store and a real mongod.
+
+Usage (from backend/):
+    python -m benchmarks.toggle_storm --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import httpx
+from app.config import settings
+from app.database import Database
+from app.hashing import PasswordHasher
+from app.main import app
+from app.coalesce import WriteCoalescer
+from .run import percentile
+from .scenarios import BenchContext
+from .seed import task_id
+from .stores import STORES, prepare_store
+
+# Collection methods that send a command to the server
+MONGO_OPERATIONS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "insert_one", "insert_many",
+    "update_one", "update_many", "delete_one", "delete_many", "bulk_write", "count_documents", "aggregate",
+}
+
+
+class CountingCollection:
+    def __init__(self, collection, counter: dict):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in MONGO_OPERATIONS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self._counter[name] = self._counter.get(name, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class CountingDatabase:
+    """Database wrapper counting the operations sent through its collections."""
+
+    def __init__(self, db):
+        self._db = db
+        self.counter: dict[str, int] = {}
+
+    def __getitem__(self, name):
+        return CountingCollection(self._db[name], self.counter)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return CountingCollection(getattr(self._db, name), self.counter)
+
+
+async def storm(args, coalescing: bool) -> dict:
+    await prepare_store(args.store, args.mongo_url, args.users, args.hot_tasks)
+    settings.write_coalescing_enabled = coalescing
+    db = Database.db = CountingDatabase(Database.db)
+    ctx = BenchContext(users=args.users, tasks_per_user=args.hot_tasks)
+
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors, next_index
+            while next_index < args.requests:
+                i = next_index
+                next_index += 1
+                u = ctx.user(i)
+                t = (i // args.users) % args.hot_tasks
+                start = time.perf_counter()
+                response = await client.put(
+                    f"/tasks/{task_id(u, t)}",
+                    json={"title": f"Task {t}", "completed": i % 2 == 0},
+                    headers=ctx.headers[u]
+                )
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    await WriteCoalescer.stop()
+
+    latencies.sort()
+    operations = sum(db.counter.values())
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "throughput_rps": round(args.requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mongo_ops": operations,
+        "mongo_ops_per_second": round(operations / elapsed, 2),
+        "mongo_ops_per_request": round(operations / args.requests, 3),
+        "mongo_ops_by_type": db.counter,
+    }
+
+
+async def run(args) -> dict:
+    settings.rate_limit_enabled = False
+    PasswordHasher.start()
+    report = {}
+    for label, coalescing in (("off", False), ("on", True)):
+        report[label] = await storm(args, coalescing)
+        summary = {k: v for k, v in report[label].items() if k != "mongo_ops_by_type"}
+        print(f"coalescing {label:>3}: {json.dumps(summary)}", flush=True)
+    PasswordHasher.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark write coalescing under a toggle storm")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--hot-tasks", type=int, default=3, help="Tasks per user receiving the toggles")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=settings.write_coalescing_window_ms)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    settings.write_coalescing_window_ms = args.window_ms
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
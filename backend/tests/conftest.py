@@ -0,0 +1,88 @@
+"""
+Test Fixtures
+
+Tests drive the app in process through an ASGI transport, against a fresh
+in-memory storage backend per test, so they need no MongoDB server.
+
+Usage (from backend/):
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+
+from datetime import datetime
+import httpx
+import pytest
+from bson import ObjectId
+from app.auth import create_access_token, user_claims
+from app.config import settings
+from app.database import Database
+from app.main import app
+from app.metrics import mongo_commands
+from app.users import UserRepository
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """A fresh in-memory database with the declared indexes."""
+    monkeypatch.setattr(settings, "storage_backend", "memory")
+    monkeypatch.setattr(settings, "search_engine", "memory")
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    await Database.connect_to_database()
+    yield Database.get_db()
+    await Database.close_database_connection()
+
+
+async def create_user(name: str = "Test User") -> dict:
+    """Store a user like signup does, without hashing a password."""
+    user = {
+        "_id": str(ObjectId()),
+        "name": name,
+        "email": f"user-{ObjectId()}@example.com",
+        "password": "not-a-bcrypt-hash",
+        "created_at": datetime.utcnow(),
+        "tasks_version": 0,
+        "task_counts": {"total": 0, "completed": 0}
+    }
+    await UserRepository.create(dict(user))
+    return user
+
+
+def auth_headers(user: dict) -> dict:
+    return {"Authorization": "Bearer " + create_access_token(user_claims(user))}
+
+
+@pytest.fixture
+async def user(db) -> dict:
+    return await create_user()
+
+
+@pytest.fixture
+async def client(user):
+    """API client authenticated as user."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=auth_headers(user)) as c:
+        yield c
+
+
+class CommandCounter:
+    """Counts the MongoDB commands sent between two points of a test."""
+
+    def __init__(self):
+        self.start = mongo_commands.totals()
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        """Commands sent since creation, by (command, collection)."""
+        counts: dict[tuple[str, str], int] = {}
+        for (command, collection, _), value in mongo_commands.totals().items():
+            sent = value - self.start.get((command, collection, _), 0)
+            if sent:
+                counts[(command, collection)] = counts.get((command, collection), 0) + int(sent)
+        return counts
+
+    def total(self) -> int:
+        return sum(self.counts().values())
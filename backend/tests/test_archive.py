@@ -0,0 +1,124 @@
+import json
+import pytest
+from app.archive import TaskArchiver
+from app.config import settings
+from .conftest import auth_headers, create_user
+from .test_bulk import create_tasks
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def archival(monkeypatch):
+    monkeypatch.setattr(settings, "archive_after_days", 0)
+    monkeypatch.setattr(TaskArchiver, "lease", None)
+
+
+async def archived_task(client, title: str = "Done") -> str:
+    """Create a task, complete it and archive it."""
+    task_id, = await create_tasks(client, title)
+    await client.put(f"/tasks/{task_id}", json={"title": title, "completed": True})
+    assert await TaskArchiver.run_once() == 1
+    return task_id
+
+
+async def ids(client, path: str) -> list[str]:
+    return [task["_id"] for task in (await client.get(path)).json()]
+
+
+async def test_archival_is_synced_as_archive_not_delete(client):
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+    task_id = await archived_task(client)
+
+    changes = (await client.get("/tasks/changes", params={"since": token})).json()
+    assert changes["archived"] == [task_id]
+    assert changes["deletes"] == []
+
+
+@pytest.mark.parametrize("coalescing", [False, True])
+async def test_updating_an_archived_task_restores_it(client, monkeypatch, coalescing):
+    task_id = await archived_task(client)
+    monkeypatch.setattr(settings, "write_coalescing_enabled", coalescing)
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+
+    response = await client.put(f"/tasks/{task_id}", json={"title": "Not done", "completed": False})
+    assert response.status_code == 200
+    assert response.json()["completed"] is False
+
+    assert await ids(client, "/tasks") == [task_id]
+    assert await ids(client, "/tasks/archive") == []
+    assert (await client.get("/tasks/stats")).json()["total"] == 1
+    changes = (await client.get("/tasks/changes", params={"since": token})).json()
+    assert [task["_id"] for task in changes["upserts"]] == [task_id]
+
+
+async def test_deleting_an_archived_task_removes_it(client):
+    task_id = await archived_task(client)
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+
+    assert (await client.delete(f"/tasks/{task_id}")).status_code == 200
+    assert await ids(client, "/tasks/archive") == []
+    assert (await client.get("/tasks/stats")).json()["total"] == 0
+    assert (await client.get("/tasks/changes", params={"since": token})).json()["deletes"] == [task_id]
+    assert (await client.delete(f"/tasks/{task_id}")).status_code == 404
+
+
+async def test_bulk_updates_restore_archived_tasks(client):
+    task_id = await archived_task(client)
+    missing = "507f1f77bcf86cd799439011"
+
+    response = await client.patch("/tasks/bulk", json={"updates": [
+        {"id": task_id, "completed": False},
+        {"id": missing, "title": "x"},
+    ]})
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "not_found"]
+
+    assert await ids(client, "/tasks") == [task_id]
+    assert await ids(client, "/tasks/archive") == []
+    stats = (await client.get("/tasks/stats")).json()
+    assert (stats["total"], stats["completed"]) == (1, 0)
+
+
+async def test_bulk_deletes_remove_archived_tasks(client):
+    archived = await archived_task(client)
+    active, = await create_tasks(client, "Active")
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [archived, active, archived]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "deleted", "not_found"]
+
+    assert await ids(client, "/tasks?include_archived=true") == []
+    assert (await client.get("/tasks/stats")).json()["total"] == 0
+    changes = (await client.get("/tasks/changes", params={"since": token})).json()
+    assert sorted(changes["deletes"]) == sorted([archived, active])
+
+
+async def test_bulk_requests_leave_other_users_archived_tasks_alone(client):
+    task_id = await archived_task(client)
+    other = auth_headers(await create_user("Other"))
+
+    response = await client.patch("/tasks/bulk", json={"updates": [{"id": task_id, "title": "x"}]}, headers=other)
+    assert [r["status"] for r in response.json()["results"]] == ["not_found"]
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [task_id]}, headers=other)
+    assert [r["status"] for r in response.json()["results"]] == ["not_found"]
+    assert await ids(client, "/tasks/archive") == [task_id]
+
+
+async def test_other_users_archived_tasks_stay_forbidden(client):
+    task_id = await archived_task(client)
+    other = auth_headers(await create_user("Other"))
+
+    assert (await client.put(f"/tasks/{task_id}", json={"title": "x"}, headers=other)).status_code == 403
+    assert (await client.delete(f"/tasks/{task_id}", headers=other)).status_code == 403
+    assert await ids(client, "/tasks/archive") == [task_id]
+
+
+async def test_export_includes_archived_tasks_in_id_order(client):
+    first = await archived_task(client, "First")
+    second, = await create_tasks(client, "Second")
+
+    response = await client.get("/tasks/export")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["_id"] for row in rows] == [first, second]
+    assert rows[0]["archived_at"] is not None
+    assert rows[1]["archived_at"] is None
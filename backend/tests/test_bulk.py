@@ -0,0 +1,63 @@
+import pytest
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_tasks(client, *titles: str) -> list[str]:
+    response = await client.post("/tasks/bulk", json={"tasks": [{"title": title} for title in titles]})
+    assert response.status_code == 200
+    return [result["id"] for result in response.json()["results"]]
+
+
+async def test_bulk_create_update_and_delete_report_each_item(client):
+    first, second = await create_tasks(client, "a", "b")
+
+    response = await client.patch("/tasks/bulk", json={"updates": [
+        {"id": first, "completed": True},
+        {"id": "not-an-id", "title": "x"},
+        {"id": "507f1f77bcf86cd799439011", "title": "x"},
+    ]})
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "invalid", "not_found"]
+
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [second]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted"]
+
+    tasks = (await client.get("/tasks")).json()
+    assert [(task["title"], task["completed"]) for task in tasks] == [("a", True)]
+
+
+@pytest.mark.parametrize("field", ["title", "completed"])
+async def test_bulk_update_rejects_null(client, field):
+    task_id, = await create_tasks(client, "a")
+
+    response = await client.patch("/tasks/bulk", json={"updates": [{"id": task_id, field: None}]})
+
+    assert response.status_code == 422
+    response = await client.get("/tasks")
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "a"
+    assert response.json()[0]["completed"] is False
+
+
+async def test_bulk_size_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_max_items", 2)
+
+    response = await client.post("/tasks/bulk", json={"tasks": [{"title": "t"}] * 3})
+
+    assert response.status_code == 413
+
+
+async def test_bulk_update_and_delete_report_repeated_ids_as_not_found(client):
+    first, second = await create_tasks(client, "a", "b")
+
+    response = await client.patch("/tasks/bulk", json={"updates": [
+        {"id": first, "title": "x"},
+        {"id": first, "title": "y"},
+    ]})
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "not_found"]
+
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [second, second, first]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "not_found", "deleted"]
+    assert (await client.get("/tasks")).json() == []
+
@@ -0,0 +1,47 @@
+import pytest
+from app.config import settings
+from .test_bulk import create_tasks
+
+pytestmark = pytest.mark.anyio
+
+
+async def sync(client, token: str) -> list[dict]:
+    """Follow has_more from a token, returning every page."""
+    pages = []
+    while True:
+        page = (await client.get("/tasks/changes", params={"since": token})).json()
+        pages.append(page)
+        token = page["next_token"]
+        if not page["has_more"]:
+            return pages
+
+
+async def test_writes_larger_than_a_page_are_paged_not_dropped(client, monkeypatch):
+    monkeypatch.setattr(settings, "change_sync_max_entries", 2)
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+    first = await create_tasks(client, "a", "b", "c", "d", "e")
+    second = await create_tasks(client, "f")
+
+    pages = await sync(client, token)
+    # The rest of the first write and the next write share the last page
+    assert [len(page["upserts"]) for page in pages] == [2, 2, 2]
+    synced = [task["_id"] for page in pages for task in page["upserts"]]
+    assert sorted(synced) == sorted(first + second)
+    assert pages[-1]["next_token"] == str(int(token) + 2)
+
+
+async def test_small_writes_are_never_split(client, monkeypatch):
+    monkeypatch.setattr(settings, "change_sync_max_entries", 3)
+    token = (await client.get("/tasks/changes")).json()["next_token"]
+    await create_tasks(client, "a", "b")
+    await create_tasks(client, "c", "d")
+
+    pages = await sync(client, token)
+    assert [len(page["upserts"]) for page in pages] == [2, 2]
+    assert [page["next_token"] for page in pages] == [str(int(token) + 1), str(int(token) + 2)]
+
+
+@pytest.mark.parametrize("token", ["x", "-1", "1-x"])
+async def test_malformed_tokens_are_rejected(client, token):
+    response = await client.get("/tasks/changes", params={"since": token})
+    assert response.status_code == 400
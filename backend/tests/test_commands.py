@@ -0,0 +1,81 @@
+"""
+MongoDB commands sent per task endpoint, counted by the command listener
+behind /metrics. Stateless auth keeps the user lookup out of the counts.
+"""
+
+import pytest
+from app.config import settings
+from .conftest import CommandCounter, auth_headers, create_user
+
+pytestmark = pytest.mark.anyio
+
+# Version and counter bump on the user, and the change log entry
+BOOKKEEPING = {("findAndModify", "users"): 1, ("insert", "task_changes"): 1}
+
+
+@pytest.fixture(autouse=True)
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "stateless_auth", True)
+
+
+async def create_task(client, title: str = "a") -> str:
+    response = await client.post("/tasks", json={"title": title})
+    assert response.status_code == 201
+    return response.json()["_id"]
+
+
+async def test_create_is_one_insert(client):
+    counter = CommandCounter()
+    response = await client.post("/tasks", json={"title": "a"})
+    assert response.status_code == 201
+    assert counter.counts() == {("insert", "tasks"): 1, **BOOKKEEPING}
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+async def test_update_and_delete_are_one_find_and_modify(client, method):
+    task_id = await create_task(client)
+    counter = CommandCounter()
+    if method == "put":
+        response = await client.put(f"/tasks/{task_id}", json={"title": "b", "completed": True})
+    else:
+        response = await client.delete(f"/tasks/{task_id}")
+    assert response.status_code == 200
+    assert counter.counts() == {("findAndModify", "tasks"): 1, **BOOKKEEPING}
+
+
+async def test_missing_and_foreign_tasks_cost_only_existence_reads(client, db):
+    other = await create_user("Other User")
+    response = await client.post("/tasks", json={"title": "theirs"}, headers=auth_headers(other))
+    foreign = response.json()["_id"]
+    missing = "507f1f77bcf86cd799439011"
+
+    # A task missing from tasks may still be archived
+    expected = {
+        missing: (404, {("findAndModify", "tasks"): 1, ("find", "tasks"): 1, ("find", "tasks_archive"): 1}),
+        foreign: (403, {("findAndModify", "tasks"): 1, ("find", "tasks"): 1}),
+    }
+    for task_id, (status, commands) in expected.items():
+        counter = CommandCounter()
+        response = await client.put(f"/tasks/{task_id}", json={"title": "b"})
+        assert response.status_code == status
+        assert counter.counts() == commands
+
+
+async def test_bulk_writes_are_one_command_per_request(client):
+    counter = CommandCounter()
+    response = await client.post("/tasks/bulk", json={"tasks": [{"title": "t"}] * 5})
+    assert counter.counts() == {("insert", "tasks"): 1, **BOOKKEEPING}
+    task_ids = [result["id"] for result in response.json()["results"]]
+
+    counter = CommandCounter()
+    await client.patch("/tasks/bulk", json={"updates": [{"id": task_id, "title": "u"} for task_id in task_ids]})
+    assert counter.counts() == {("update", "tasks"): 1, **BOOKKEEPING}
+
+    # Setting completed reads the previous state for the completed counter
+    counter = CommandCounter()
+    await client.patch("/tasks/bulk", json={"updates": [{"id": task_id, "completed": True} for task_id in task_ids]})
+    assert counter.counts() == {("find", "tasks"): 1, ("update", "tasks"): 1, **BOOKKEEPING}
+
+    counter = CommandCounter()
+    await client.request("DELETE", "/tasks/bulk", json={"ids": task_ids})
+    assert counter.counts() == {("find", "tasks"): 1, ("delete", "tasks"): 1, **BOOKKEEPING}
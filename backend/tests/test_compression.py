@@ -0,0 +1,37 @@
+import gzip
+import pytest
+from app.compression import ENCODERS, GzipEncoder, _Encoder, available_encoders
+
+BODY = b'{"title": "Buy milk", "completed": false}' * 200
+
+
+def decompress(name: str, data: bytes) -> bytes:
+    if name == "gzip":
+        return gzip.decompress(data)
+    if name == "br":
+        import brotli
+        return brotli.decompress(data)
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def test_encoders_must_implement_compress_and_stream():
+    class OneShot(_Encoder):
+        def compress(self, data: bytes) -> bytes:
+            return data
+
+    with pytest.raises(TypeError):
+        OneShot(1)
+    assert GzipEncoder(6).compress(b"")
+
+
+@pytest.mark.parametrize("name", list(ENCODERS))
+def test_one_shot_and_streamed_bodies_round_trip(name):
+    encoder = available_encoders().get(name)
+    if encoder is None:
+        pytest.skip(f"{name} is not available")
+
+    assert decompress(name, encoder.compress(BODY)) == BODY
+    stream = encoder.stream()
+    chunks = [stream.process(BODY[i:i + 1000]) for i in range(0, len(BODY), 1000)]
+    assert decompress(name, b"".join(chunks) + stream.finish()) == BODY
@@ -0,0 +1,127 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tracemalloc
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.export import EXPORT_CHUNK_BYTES, SERIALIZERS
+from app.main import app
+from .conftest import auth_headers
+
+pytestmark = pytest.mark.anyio
+
+# Set EXPORT_TEST_TASKS=1000000 for a full-size run
+LARGE_EXPORT = int(os.environ.get("EXPORT_TEST_TASKS", 10000))
+SMALL_EXPORT = max(1, LARGE_EXPORT // 10)
+
+
+async def seed_tasks(db, user: dict, count: int):
+    owner = ObjectId(user["_id"])
+    batch = []
+    for i in range(count):
+        batch.append({
+            "user_id": owner,
+            "title": f"Task {i}",
+            "description": "Exported task " + "x" * 200,
+            "due_date": None,
+            "created_at": datetime(2024, 1, 1),
+            "completed": i % 2 == 0,
+        })
+        if len(batch) == 5000:
+            await db.tasks.insert_many(batch)
+            batch = []
+    if batch:
+        await db.tasks.insert_many(batch)
+
+
+async def stream_export(user: dict, export_format: str = "ndjson") -> tuple[int, int]:
+    """
+    Run GET /tasks/export straight through the ASGI app, discarding the
+    body as it is sent; the test client would buffer all of it.
+
+    Returns:
+        tuple: The status code and the number of body bytes sent
+    """
+    headers = [(key.lower().encode(), value.encode()) for key, value in auth_headers(user).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/tasks/export", "raw_path": b"/tasks/export",
+        "query_string": f"format={export_format}".encode(), "root_path": "",
+        "headers": headers + [(b"host", b"test")], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    requested = False
+    status = 0
+    sent = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, sent
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, sent
+
+
+async def peak_export_memory(user: dict) -> tuple[int, int]:
+    """Peak Python heap growth while exporting, and the bytes exported."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        status, sent = await stream_export(user)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert status == 200
+    return peak - baseline, sent
+
+
+async def test_export_formats(client, db, user):
+    await seed_tasks(db, user, 3)
+
+    response = await client.get("/tasks/export", params={"format": "ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Task 0", "Task 1", "Task 2"]
+    assert rows[0]["user_id"] == user["_id"]
+
+    response = await client.get("/tasks/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["completed"] for row in rows] == ["True", "False", "True"]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+async def test_export_rows_are_sent_in_chunks(export_format):
+    async def tasks():
+        for i in range(2000):
+            yield {"_id": ObjectId(), "user_id": ObjectId(), "title": f"Task {i}", "description": "x" * 100}
+
+    chunks = [chunk async for chunk in SERIALIZERS[export_format](tasks())]
+    # Each chunk costs the compression middleware one flush
+    assert len(chunks) <= len("".join(chunks)) // EXPORT_CHUNK_BYTES + 1
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    assert sum(chunk.count("\n") for chunk in chunks) == 2000 + (export_format == "csv")
+
+
+async def test_export_memory_does_not_grow_with_task_count(db, user):
+    # Heap growth stands in for RSS: it is what the export itself
+    # allocates, without the noise of the allocator and the seeded data
+    await seed_tasks(db, user, SMALL_EXPORT)
+    small_peak, _ = await peak_export_memory(user)
+    await seed_tasks(db, user, LARGE_EXPORT - SMALL_EXPORT)
+    large_peak, exported = await peak_export_memory(user)
+
+    assert large_peak < small_peak + 512 * 1024
+    assert large_peak < exported / 4
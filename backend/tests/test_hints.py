@@ -0,0 +1,47 @@
+import pytest
+from app.database import Database
+from app.memory_store import MemoryCursor
+from .test_bulk import create_tasks
+
+pytestmark = pytest.mark.anyio
+
+LISTING_INDEX = "user_id_1_created_at_1__id_1"
+
+
+@pytest.fixture
+def hints(monkeypatch) -> list:
+    """Records the hints listings pass to cursors."""
+    hinted = []
+    hint = MemoryCursor.hint
+
+    def record(cursor, index):
+        hinted.append(index)
+        return hint(cursor, index)
+
+    monkeypatch.setattr(MemoryCursor, "hint", record)
+    return hinted
+
+
+async def test_listings_hint_indexes_found_at_startup(client, hints):
+    await create_tasks(client, "a", "b")
+    response = await client.get("/tasks")
+    assert [task["title"] for task in response.json()] == ["a", "b"]
+    assert hints == [[("user_id", 1), ("created_at", 1), ("_id", 1)]]
+
+
+async def test_missing_indexes_are_not_hinted(client, db, hints):
+    await create_tasks(client, "a", "b")
+    await db.tasks.drop_index(LISTING_INDEX)
+    await Database.load_index_keys()
+
+    response = await client.get("/tasks")
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["a", "b"]
+    assert hints == []
+
+
+async def test_nothing_is_hinted_before_indexes_are_read(client, monkeypatch, hints):
+    monkeypatch.setattr(Database, "index_keys", {})
+    await create_tasks(client, "a")
+    assert (await client.get("/tasks")).status_code == 200
+    assert hints == []
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import pytest
+from app.idempotency import Idempotency
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch, db):
+    monkeypatch.setattr(Idempotency, "cache", type(Idempotency.cache)())
+    monkeypatch.setattr(Idempotency, "in_flight", {})
+
+
+def handler(calls: list, name: str, gate: asyncio.Event = None):
+    async def run():
+        calls.append(name)
+        if gate is not None:
+            await gate.wait()
+        return {"ran": name}
+    return run
+
+
+async def test_concurrent_duplicates_wait_for_the_first_request(db):
+    calls, gate = [], asyncio.Event()
+    first = asyncio.create_task(Idempotency.run("u", "k", "fp", handler(calls, "first", gate)))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(Idempotency.run("u", "k", "fp", handler(calls, "second")))
+    await asyncio.sleep(0.01)
+    gate.set()
+
+    responses = await asyncio.gather(first, second)
+    assert calls == ["first"]
+    assert [json.loads(r.body) for r in responses] == [{"ran": "first"}] * 2
+    assert responses[1].headers["Idempotent-Replayed"] == "true"
+
+
+async def test_a_waiter_runs_the_request_when_the_first_is_cancelled(db):
+    calls = []
+    first = asyncio.create_task(Idempotency.run("u", "k", "fp", handler(calls, "first", asyncio.Event())))
+    await asyncio.sleep(0.01)
+    waiters = [
+        asyncio.create_task(Idempotency.run("u", "k", "fp", handler(calls, f"waiter-{i}")))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    responses = await asyncio.gather(*waiters)
+    assert first.cancelled()
+    assert calls == ["first", "waiter-0"]
+    assert [r.status_code for r in responses] == [200] * 3
+    assert {json.loads(r.body)["ran"] for r in responses} == {"waiter-0"}
+    assert Idempotency.in_flight == {}
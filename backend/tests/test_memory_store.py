@@ -0,0 +1,314 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app.memory_store import MemoryClient, matches
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def database():
+    return MemoryClient()["test"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"a": 1}, True),
+    ({"a": 1.0}, True),
+    ({"a": "1"}, False),
+    ({"tags": "x"}, True),
+    ({"tags": ["x", "y"]}, True),
+    ({"tags": ["y", "x"]}, False),
+    ({"missing": None}, True),
+    ({"none": None}, True),
+    ({"a": None}, False),
+    ({"missing": {"$exists": False}}, True),
+    ({"none": {"$exists": True}}, True),
+    ({"a": {"$in": [2, 1]}}, True),
+    ({"missing": {"$in": [None]}}, True),
+    ({"tags": {"$in": ["z", "y"]}}, True),
+    ({"a": {"$nin": [1]}}, False),
+    ({"a": {"$ne": None}}, True),
+    ({"missing": {"$ne": None}}, False),
+    ({"a": {"$gt": 0, "$lte": 1}}, True),
+    ({"a": {"$lt": 1}}, False),
+    # Comparisons only match values of the same type
+    ({"a": {"$gt": "0"}}, False),
+    ({"name": {"$gt": 5}}, False),
+    ({"missing": {"$gt": 0}}, False),
+    ({"none": {"$lt": 0}}, False),
+    ({"due": {"$gte": NOW}}, True),
+    ({"due": {"$gt": 0}}, False),
+    ({"a": {"$not": {"$gt": 5}}}, True),
+    ({"name": {"$regex": "^ta", "$options": "i"}}, True),
+    ({"nested.b": 2}, True),
+    ({"nested.c": None}, True),
+    ({"$or": [{"a": 2}, {"name": "Task"}]}, True),
+    ({"$and": [{"a": 1}, {"name": "other"}]}, False),
+    ({"$nor": [{"a": 2}]}, True),
+    ({}, True),
+])
+def test_operators_match_like_mongodb(query, expected):
+    doc = {"_id": 1, "a": 1, "name": "Task", "tags": ["x", "y"], "none": None, "nested": {"b": 2}, "due": NOW}
+    assert matches(doc, query) is expected
+
+
+def test_unsupported_operators_fail():
+    with pytest.raises(OperationFailure):
+        matches({"a": 1}, {"a": {"$elemMatch": {"b": 1}}})
+    with pytest.raises(OperationFailure):
+        matches({"a": 1}, {"$where": "true"})
+
+
+async def test_find_projects_and_sorts_mixed_types(database):
+    await database.items.insert_many([
+        {"_id": 1, "v": "b", "x": 1},
+        {"_id": 2, "v": 3, "x": 2},
+        {"_id": 3, "x": 3},
+        {"_id": 4, "v": True, "x": 4},
+        {"_id": 5, "v": 1.5, "x": 5},
+    ])
+    docs = await database.items.find({}, {"x": 0}).sort("v", 1).to_list(None)
+    # null < numbers < strings < booleans
+    assert docs == [{"_id": 3}, {"_id": 5, "v": 1.5}, {"_id": 2, "v": 3}, {"_id": 1, "v": "b"}, {"_id": 4, "v": True}]
+    docs = await database.items.find({"x": {"$gte": 2}}, {"x": 1, "_id": 0}).sort("v", -1).limit(2).to_list(None)
+    assert docs == [{"x": 4}, {"x": 2}]
+
+
+async def test_unique_index_rejects_conflicting_writes(database):
+    await database.users.create_index("email", unique=True)
+    await database.users.insert_one({"_id": 1, "email": "a@example.com"})
+    await database.users.insert_one({"_id": 2, "email": "b@example.com"})
+
+    with pytest.raises(DuplicateKeyError):
+        await database.users.insert_one({"_id": 3, "email": "a@example.com"})
+    with pytest.raises(DuplicateKeyError):
+        await database.users.update_one({"_id": 2}, {"$set": {"email": "a@example.com"}})
+    with pytest.raises(DuplicateKeyError):
+        await database.users.insert_one({"_id": 1, "email": "c@example.com"})
+    assert await database.users.find_one({"_id": 2}) == {"_id": 2, "email": "b@example.com"}
+    assert await database.users.count_documents({}) == 2
+
+    # Rewriting a document's own key is not a conflict, and freed keys are reusable
+    await database.users.update_one({"_id": 1}, {"$set": {"email": "a@example.com", "name": "A"}})
+    await database.users.update_one({"_id": 1}, {"$set": {"email": "z@example.com"}})
+    await database.users.insert_one({"_id": 3, "email": "a@example.com"})
+    await database.users.delete_one({"_id": 3})
+    await database.users.update_one({"_id": 2}, {"$set": {"email": "a@example.com"}})
+
+
+async def test_creating_a_unique_index_over_duplicates_fails(database):
+    await database.users.insert_many([{"email": "a"}, {"email": "a"}])
+    with pytest.raises(DuplicateKeyError):
+        await database.users.create_index("email", unique=True)
+    assert "email_1" not in await database.users.index_information()
+
+
+async def test_sparse_and_partial_unique_indexes_skip_uncovered_documents(database):
+    await database.users.create_index("handle", unique=True, sparse=True)
+    await database.users.create_index(
+        "slug", unique=True, partialFilterExpression={"active": True}, name="slug_active"
+    )
+    await database.users.insert_many([{"slug": "a"}, {"slug": "a"}, {"slug": "a", "active": True}])
+    with pytest.raises(DuplicateKeyError):
+        await database.users.insert_one({"slug": "a", "active": True})
+    await database.users.insert_one({"handle": "h"})
+    with pytest.raises(DuplicateKeyError):
+        await database.users.insert_one({"handle": "h"})
+
+
+@pytest.mark.parametrize("ordered, remaining", [(True, [1]), (False, [3])])
+async def test_bulk_writes_report_conflicts(database, ordered, remaining):
+    await database.users.create_index("email", unique=True)
+    requests = [
+        InsertOne({"_id": 1, "email": "a"}),
+        InsertOne({"_id": 2, "email": "a"}),
+        InsertOne({"_id": 3, "email": "b"}),
+        UpdateOne({"_id": 3}, {"$set": {"email": "a"}}),
+        DeleteOne({"_id": 1}),
+    ]
+    with pytest.raises(BulkWriteError) as error:
+        await database.users.bulk_write(requests, ordered=ordered)
+
+    details = error.value.details
+    assert [doc["_id"] for doc in await database.users.find({}).sort("_id", 1).to_list(None)] == remaining
+    if ordered:
+        # An ordered write stops at the first error
+        assert [e["index"] for e in details["writeErrors"]] == [1]
+        assert (details["nInserted"], details["nRemoved"]) == (1, 0)
+    else:
+        # Unordered writes run every operation, grouped by kind, and report
+        # each error at its position in the request list
+        assert [e["index"] for e in details["writeErrors"]] == [1, 3]
+        assert all(e["code"] == 11000 for e in details["writeErrors"])
+        assert (details["nInserted"], details["nMatched"], details["nRemoved"]) == (2, 0, 1)
+
+
+async def test_upserts_seed_equality_fields_from_the_filter(database):
+    result = await database.stats.update_one(
+        {
+            "user_id": "u1",
+            "day": {"$eq": "2026-01-01"},
+            "count": {"$gt": 5},
+            "kind": {"$in": ["a", "b"]},
+            "meta.source": "api",
+            "$and": [{"region": "eu"}, {"size": {"$lt": 3}}],
+            "$or": [{"tier": "free"}],
+        },
+        {"$inc": {"total": 2}, "$setOnInsert": {"created": NOW}, "$set": {"user_id": "u1"}},
+        upsert=True,
+    )
+    doc = await database.stats.find_one({"_id": result.upserted_id})
+    assert doc == {
+        "_id": result.upserted_id,
+        "user_id": "u1",
+        "day": "2026-01-01",
+        "meta": {"source": "api"},
+        "region": "eu",
+        "total": 2,
+        "created": NOW,
+    }
+
+    # A matched upsert updates in place and skips $setOnInsert
+    result = await database.stats.update_one(
+        {"user_id": "u1", "day": "2026-01-01"},
+        {"$inc": {"total": 1}, "$setOnInsert": {"created": NOW + timedelta(days=1)}},
+        upsert=True,
+    )
+    assert (result.matched_count, result.upserted_id) == (1, None)
+    doc = await database.stats.find_one({"user_id": "u1"})
+    assert (doc["total"], doc["created"]) == (3, NOW)
+
+
+async def test_replace_upserts_seed_the_filter_and_keep_ids(database):
+    result = await database.items.replace_one({"_id": "k", "kind": "x"}, {"value": 1}, upsert=True)
+    assert result.upserted_id == "k"
+    assert await database.items.find_one({}) == {"_id": "k", "kind": "x", "value": 1}
+    await database.items.replace_one({"_id": "k"}, {"value": 2})
+    assert await database.items.find_one({}) == {"_id": "k", "value": 2}
+
+
+async def test_upserts_respect_unique_indexes(database):
+    await database.users.create_index("email", unique=True)
+    await database.users.insert_one({"email": "a", "name": "A"})
+    with pytest.raises(DuplicateKeyError):
+        await database.users.update_one({"name": "B"}, {"$set": {"email": "a"}}, upsert=True)
+    assert await database.users.count_documents({}) == 1
+
+
+def reference(docs: dict, user_id: str, field: str, direction: int) -> list:
+    """Ids of a user's documents sorted by (field, _id) without an index."""
+    owned = [doc for doc in docs.values() if doc["user_id"] == user_id]
+    owned.sort(key=lambda doc: (doc[field], doc["_id"].binary), reverse=direction == -1)
+    return [doc["_id"] for doc in owned]
+
+
+async def test_ordered_indexes_stay_sorted_through_writes(database):
+    tasks = database.tasks
+    await tasks.create_index([("user_id", 1), ("created_at", 1), ("_id", 1)])
+    await tasks.create_index([("user_id", 1), ("completed", 1), ("due_date", -1), ("_id", 1)])
+    rng = random.Random(7)
+    docs = {}
+
+    def fresh(user_id: str) -> dict:
+        return {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "created_at": NOW + timedelta(minutes=rng.randrange(50)),
+            "due_date": NOW + timedelta(days=rng.randrange(10)),
+            "completed": rng.random() < 0.5,
+        }
+
+    for _ in range(200):
+        doc = fresh(rng.choice(["u1", "u2"]))
+        docs[doc["_id"]] = doc
+    await tasks.insert_many([dict(doc) for doc in docs.values()])
+
+    for step in range(300):
+        target = rng.choice(list(docs))
+        action = rng.random()
+        if action < 0.4:
+            # Sort key changes move the document within its index
+            changes = {"created_at": NOW + timedelta(minutes=rng.randrange(50)), "completed": rng.random() < 0.5}
+            await tasks.update_one({"_id": target}, {"$set": changes})
+            docs[target].update(changes)
+        elif action < 0.5:
+            # Moving between users moves the document between partitions
+            owner = "u2" if docs[target]["user_id"] == "u1" else "u1"
+            await tasks.update_one({"_id": target}, {"$set": {"user_id": owner}})
+            docs[target]["user_id"] = owner
+        elif action < 0.7:
+            await tasks.delete_one({"_id": target})
+            del docs[target]
+        else:
+            doc = fresh(rng.choice(["u1", "u2"]))
+            docs[doc["_id"]] = doc
+            await tasks.insert_one(dict(doc))
+
+        if step % 25:
+            continue
+        for user_id in ("u1", "u2"):
+            for direction in (1, -1):
+                spec = [("created_at", direction), ("_id", direction)]
+                expected = reference(docs, user_id, "created_at", direction)
+                found = await tasks.find({"user_id": user_id}, {"_id": 1}).sort(spec).to_list(None)
+                assert [doc["_id"] for doc in found] == expected
+                page = await tasks.find({"user_id": user_id}, {"_id": 1}).sort(spec).skip(5).limit(10).to_list(None)
+                assert [doc["_id"] for doc in page] == expected[5:15]
+
+            # Ranges on the sort field bound the walk
+            since = NOW + timedelta(minutes=20)
+            found = await tasks.find({"user_id": user_id, "created_at": {"$gt": since}}).sort(
+                [("created_at", -1), ("_id", -1)]
+            ).to_list(None)
+            expected = [i for i in reference(docs, user_id, "created_at", -1) if docs[i]["created_at"] > since]
+            assert [doc["_id"] for doc in found] == expected
+
+            # Pinned prefixes: (user_id, completed) sorted by due_date, in
+            # one direction and in mixed directions
+            pending = [doc for doc in docs.values() if doc["user_id"] == user_id and not doc["completed"]]
+            found = await tasks.find({"user_id": user_id, "completed": False}).sort(
+                [("due_date", -1), ("_id", -1)]
+            ).to_list(None)
+            pending.sort(key=lambda doc: (doc["due_date"], doc["_id"].binary), reverse=True)
+            assert [doc["_id"] for doc in found] == [doc["_id"] for doc in pending]
+            found = await tasks.find({"user_id": user_id, "completed": False}).sort(
+                [("due_date", 1), ("_id", -1)]
+            ).to_list(None)
+            pending.sort(key=lambda doc: (doc["due_date"], [-b for b in doc["_id"].binary]))
+            assert [doc["_id"] for doc in found] == [doc["_id"] for doc in pending]
+
+    assert await tasks.count_documents({}) == len(docs)
+
+
+async def test_open_cursors_survive_writes_to_the_walked_index(database):
+    tasks = database.tasks
+    await tasks.create_index([("user_id", 1), ("created_at", 1), ("_id", 1)])
+    await tasks.insert_many([
+        {"_id": i, "user_id": "u1", "created_at": NOW + timedelta(minutes=i)} for i in range(10)
+    ])
+    cursor = tasks.find({"user_id": "u1"}).sort([("created_at", 1), ("_id", 1)])
+    seen = [(await cursor.__anext__())["_id"] for _ in range(3)]
+    # Deleting the next document and moving a seen one to the end neither
+    # repeats nor skips the others
+    await tasks.delete_one({"_id": 3})
+    await tasks.update_one({"_id": 0}, {"$set": {"created_at": NOW - timedelta(days=1)}})
+    await tasks.update_one({"_id": 1}, {"$set": {"created_at": NOW + timedelta(days=1)}})
+    seen += [doc["_id"] async for doc in cursor]
+    assert seen == [0, 1, 2, 4, 5, 6, 7, 8, 9, 1]
+
+
+async def test_dropped_indexes_stop_serving_queries(database):
+    tasks = database.tasks
+    name = await tasks.create_index([("user_id", 1), ("created_at", 1), ("_id", 1)])
+    await tasks.insert_many([{"_id": i, "user_id": "u1", "created_at": NOW - timedelta(minutes=i)} for i in range(5)])
+    await tasks.drop_index(name)
+    await tasks.insert_one({"_id": 5, "user_id": "u1", "created_at": NOW})
+    found = await tasks.find({"user_id": "u1"}).sort([("created_at", 1), ("_id", 1)]).to_list(None)
+    assert [doc["_id"] for doc in found] == [4, 3, 2, 1, 0, 5]
+    with pytest.raises(OperationFailure):
+        await tasks.find({"user_id": "u1"}).hint(name).to_list(None)
@@ -0,0 +1,35 @@
+import threading
+import pytest
+from app.metrics import Counter, Histogram, Metric
+
+
+def test_metric_subclasses_must_render():
+    class Unrendered(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Unrendered("x", "x")
+
+
+def test_counter_merges_thread_shards():
+    counter = Counter("requests_total", "Requests", labels=("route",))
+    counter.inc("/tasks")
+    worker = threading.Thread(target=counter.inc, args=("/tasks",), kwargs={"amount": 2})
+    worker.start()
+    worker.join()
+
+    assert counter.render()[2:] == ['requests_total{route="/tasks"} 3.0']
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
@@ -0,0 +1,21 @@
+import pytest
+from app import migrate
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_migrations_drop_obsolete_indexes(db):
+    await db.tasks.create_index("user_id")
+    await db.tasks.create_index([("user_id", 1), ("completed", 1), ("due_date", 1)])
+    assert await migrate.verify_indexes() == [
+        "tasks.user_id_1 is obsolete",
+        "tasks.user_id_1_completed_1_due_date_1 is obsolete",
+    ]
+    assert [m.version for m in await migrate.pending_migrations()] == [m.version for m in migrate.MIGRATIONS]
+
+    await migrate.migrate()
+
+    assert await migrate.verify_indexes() == []
+    assert await migrate.pending_migrations() == []
+    # Re-running is safe
+    await migrate._drop_obsolete_indexes()
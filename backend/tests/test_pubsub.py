@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.pubsub import CLOSE, InProcessBroker
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    monkeypatch.setattr(settings, "stream_queue_size", 2)
+    return InProcessBroker()
+
+
+async def test_publish_reaches_only_that_users_subscriptions(broker):
+    first, second = broker.subscribe("a"), broker.subscribe("a")
+    other = broker.subscribe("b")
+
+    await broker.publish("a", {"type": "change", "seq": 1})
+
+    assert await first.get() == await second.get() == {"type": "change", "seq": 1}
+    assert other.queue.empty()
+    assert broker.connection_count() == 3
+
+
+async def test_slow_consumer_is_disconnected(broker, monkeypatch):
+    monkeypatch.setattr(settings, "stream_slow_consumer_policy", "disconnect")
+    subscription = broker.subscribe("a")
+
+    for seq in range(3):
+        await broker.publish("a", {"type": "change", "seq": seq})
+
+    assert await subscription.get() is CLOSE
+    assert broker.connection_count() == 0
+
+
+async def test_slow_consumer_drops_events(broker, monkeypatch):
+    monkeypatch.setattr(settings, "stream_slow_consumer_policy", "drop")
+    subscription = broker.subscribe("a")
+
+    for seq in range(5):
+        await broker.publish("a", {"type": "change", "seq": seq})
+
+    assert subscription.dropped == 3
+    assert [(await subscription.get())["seq"] for _ in range(2)] == [0, 1]
+    assert broker.connection_count() == 1
+
+
+async def test_heartbeats_go_to_every_subscription_from_one_task(broker, monkeypatch):
+    monkeypatch.setattr(settings, "stream_heartbeat_seconds", 0.01)
+    subscriptions = [broker.subscribe(f"user-{i % 3}") for i in range(10)]
+    tasks_before = len(asyncio.all_tasks())
+
+    await broker.start()
+    try:
+        assert len(asyncio.all_tasks()) == tasks_before + 1
+        beats = [await asyncio.wait_for(s.get(), 1) for s in subscriptions]
+    finally:
+        await broker.stop()
+
+    assert beats == [{"type": "heartbeat"}] * 10
+    assert all(s.closed for s in subscriptions)
+    assert broker.connection_count() == 0
@@ -0,0 +1,62 @@
+import httpx
+import pytest
+from app.config import RateLimit, settings
+from app.main import app
+from app.ratelimit import InMemoryBucketStore
+from app.serve import build_config
+
+
+@pytest.fixture
+async def anonymous(db, monkeypatch):
+    """Unauthenticated client, with rate limiting on."""
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+async def login(client, username: str):
+    return await client.post("/auth/login", data={"username": username, "password": "wrong-password"})
+
+
+@pytest.mark.anyio
+async def test_auth_limit_is_per_account_not_per_ip(anonymous):
+    burst = settings.rate_limits["auth"].per_ip_account.burst
+    statuses = [(await login(anonymous, "a@example.com")).status_code for _ in range(burst + 1)]
+    assert statuses[:burst] == [401] * burst
+    assert statuses[burst] == 429
+
+    # Same IP, another account
+    assert (await login(anonymous, "B@example.com")).status_code == 401
+    # Account names are case-insensitive
+    assert (await login(anonymous, "A@Example.com ")).status_code == 429
+
+
+@pytest.mark.anyio
+async def test_signup_body_is_replayed_after_reading_the_account(anonymous):
+    response = await anonymous.post("/auth/signup", json={"name": "x", "email": "not-an-email", "password": "secret1"})
+    assert response.status_code == 422
+    # Validated the body that was sent, not an empty one
+    assert response.json()["detail"][0]["input"] == "x"
+
+
+def test_serve_trusts_configured_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "forwarded_allow_ips", "10.0.0.1,10.0.0.2")
+    config = build_config("127.0.0.1", 8000, 1)
+    assert config.proxy_headers
+    assert config.forwarded_allow_ips == "10.0.0.1,10.0.0.2"
+
+
+@pytest.mark.anyio
+async def test_bucket_store_evicts_least_recently_used_keys():
+    store = InMemoryBucketStore(max_keys=3)
+    limit = RateLimit(rate=0.001, burst=1)
+    for key in ("a", "b", "c"):
+        assert await store.take(key, limit) == 0
+    # "a" is used again, so "b" is the least recently used
+    assert await store.take("a", limit) > 0
+    assert await store.take("d", limit) == 0
+
+    assert list(store.buckets) == ["c", "a", "d"]
+    assert await store.take("a", limit) > 0
+    assert await store.take("b", limit) == 0
+    assert len(store.buckets) == 3
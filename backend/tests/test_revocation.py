@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+import pytest
+from app.config import settings
+from app.revocation import RevocationList
+from .conftest import CommandCounter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def empty_revocation_list(monkeypatch):
+    monkeypatch.setattr(RevocationList, "revoked", set())
+
+
+async def test_sync_keeps_tokens_revoked_while_it_runs(db, monkeypatch):
+    expires = datetime.utcnow() + timedelta(hours=1)
+    await RevocationList.revoke("early", expires)
+    collection = db.revoked_tokens
+    find = collection.find
+
+    async def read_then_revoke(*args, **kwargs):
+        records = await find(*args, **kwargs).to_list()
+        # Revoked after the snapshot was read
+        await RevocationList.revoke("late", expires)
+        for record in records:
+            yield record
+
+    monkeypatch.setattr(collection, "find", read_then_revoke)
+    await RevocationList.sync()
+
+    assert RevocationList.is_revoked("early")
+    assert RevocationList.is_revoked("late")
+    assert RevocationList.revoked_during_sync is None
+
+
+async def test_sync_drops_expired_tokens(db):
+    await RevocationList.revoke("expired", datetime.utcnow() - timedelta(seconds=1))
+    await RevocationList.revoke("current", datetime.utcnow() + timedelta(hours=1))
+
+    await RevocationList.sync()
+
+    assert RevocationList.revoked == {"current"}
+
+
+@pytest.mark.parametrize("stateless, user_lookups", [(False, 1), (True, 0)])
+async def test_stateless_auth_skips_the_user_lookup(client, monkeypatch, stateless, user_lookups):
+    monkeypatch.setattr(settings, "stateless_auth", stateless)
+    counter = CommandCounter()
+
+    response = await client.post("/tasks", json={"title": "Write tests"})
+
+    assert response.status_code == 201
+    assert counter.counts().get(("find", "users"), 0) == user_lookups
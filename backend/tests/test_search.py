@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app import search
+from app.search import InMemorySearchEngine
+from .test_bulk import create_tasks
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def engine(monkeypatch, db):
+    engine = InMemorySearchEngine()
+    monkeypatch.setattr(search, "_engine", engine)
+    return engine
+
+
+async def titles(client, q: str) -> list[str]:
+    response = await client.get("/tasks/search", params={"q": q})
+    assert response.status_code == 200
+    return [task["title"] for task in response.json()]
+
+
+async def test_search_ranks_title_matches_and_expands_prefixes(client, engine):
+    await create_tasks(client, "Buy milk", "Call plumber")
+    await client.post("/tasks", json={"title": "Groceries", "description": "milk, eggs"})
+
+    assert await titles(client, "milk") == ["Buy milk", "Groceries"]
+    assert await titles(client, "plum") == ["Call plumber"]
+
+    await client.post("/tasks", json={"title": "Plumbing invoice"})
+    assert set(await titles(client, "plum")) == {"Call plumber", "Plumbing invoice"}
+
+
+async def test_writes_during_index_load_are_not_lost(client, engine, db, monkeypatch):
+    renamed, deleted = await create_tasks(client, "alpha", "bravo")
+    reached, release = asyncio.Event(), asyncio.Event()
+    find = db.tasks.find
+
+    def paused_find(*args, **kwargs):
+        cursor = find(*args, **kwargs)
+
+        async def documents():
+            async for doc in cursor:
+                yield doc
+                if not reached.is_set():
+                    reached.set()
+                    await release.wait()
+        return documents()
+
+    monkeypatch.setattr(db.tasks, "find", paused_find)
+    loading = asyncio.create_task(titles(client, "alpha"))
+    await reached.wait()
+    # The cursor has already read "alpha" and not yet "bravo"
+    await client.put(f"/tasks/{renamed}", json={"title": "zulu"})
+    await client.delete(f"/tasks/{deleted}")
+    await client.post("/tasks", json={"title": "charlie"})
+    release.set()
+
+    assert await loading == []
+    assert await titles(client, "zulu") == ["zulu"]
+    assert await titles(client, "bravo") == []
+    assert await titles(client, "charlie") == ["charlie"]
+    assert engine.pending == {}
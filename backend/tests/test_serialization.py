@@ -0,0 +1,21 @@
+import pytest
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fast_path_matches_response_model_output(client, monkeypatch):
+    await client.post("/tasks/bulk", json={"tasks": [
+        {"title": "Plain"},
+        {"title": "Dated ñ \"quoted\"", "description": "Due soon", "due_date": "2025-01-01T00:00:00.123"},
+    ]})
+    first = (await client.get("/tasks")).json()[0]["_id"]
+    await client.put(f"/tasks/{first}", json={"title": "Plain", "completed": True})
+
+    monkeypatch.setattr(settings, "fast_task_serialization", False)
+    slow = await client.get("/tasks")
+    monkeypatch.setattr(settings, "fast_task_serialization", True)
+    fast = await client.get("/tasks")
+
+    assert slow.status_code == fast.status_code == 200
+    assert fast.content == slow.content
@@ -0,0 +1,53 @@
+import sys
+import pytest
+from app import migrate, serve
+from app.config import settings
+
+
+@pytest.fixture
+def mongo_settings(monkeypatch):
+    monkeypatch.setattr(settings, "storage_backend", "mongo")
+    monkeypatch.setattr(settings, "search_engine", "mongo")
+    monkeypatch.setattr(settings, "pubsub_backend", "memory")
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+
+
+@pytest.mark.parametrize("setting", ["storage_backend", "search_engine"])
+def test_multiple_workers_are_refused_with_process_local_data(mongo_settings, monkeypatch, setting):
+    monkeypatch.setattr(settings, setting, "memory")
+    monkeypatch.setattr(sys, "argv", ["serve", "--workers", "2"])
+    monkeypatch.setattr(serve, "Multiprocess", None)
+
+    with pytest.raises(SystemExit) as exit_info:
+        serve.main()
+    assert exit_info.value.code == 2
+
+
+def test_per_worker_components_only_warn(mongo_settings, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    errors, warnings = serve.process_local_issues()
+    assert errors == []
+    assert [w.split()[0] for w in warnings] == ["PUBSUB_BACKEND=memory", "Rate"]
+
+
+def test_migrate_flag_applies_migrations_before_serving(mongo_settings, monkeypatch):
+    calls = []
+
+    class Server:
+        started = True
+
+        def __init__(self, config):
+            pass
+
+        def run(self):
+            calls.append("serve")
+
+    monkeypatch.setattr(serve, "DrainingServer", Server)
+    monkeypatch.setattr(migrate, "run", lambda command="apply": calls.append(command) or 0)
+    monkeypatch.setattr(sys, "argv", ["serve", "--migrate"])
+    # main() exports the worker count for spawned workers
+    monkeypatch.setenv("WEB_WORKERS", "1")
+    monkeypatch.setattr(settings, "web_workers", 1)
+
+    serve.main()
+    assert calls == ["apply", "serve"]
@@ -0,0 +1,92 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.leases import Lease
+from app.repository import TaskRepository
+from app.stats import TaskStats
+from app.versions import TaskVersion
+from .test_bulk import create_tasks
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(TaskStats, "suspects", {})
+    monkeypatch.setattr(TaskStats, "lease", None)
+
+
+async def counts(db, user: dict) -> dict:
+    return (await db.users.find_one({"_id": user["_id"]}))["task_counts"]
+
+
+async def insert_task(db, user: dict, completed: bool = False):
+    await db.tasks.insert_one({
+        "user_id": ObjectId(user["_id"]), "title": "t", "completed": completed, "created_at": datetime.utcnow()
+    })
+
+
+async def test_drift_is_fixed_once_seen_by_two_passes(db, user):
+    await insert_task(db, user)
+    await insert_task(db, user, completed=True)
+
+    assert await TaskStats.reconcile() == 0
+    assert await counts(db, user) == {"total": 0, "completed": 0}
+    assert await TaskStats.reconcile() == 1
+    assert await counts(db, user) == {"total": 2, "completed": 1}
+    assert await TaskStats.reconcile() == 0
+
+
+async def test_in_flight_write_is_not_counted_twice(db, user):
+    # The task is stored but its counter bump has not landed yet
+    await insert_task(db, user)
+    assert await TaskStats.reconcile() == 0
+
+    await TaskVersion.bump(user["_id"], {"total": 1})
+    assert await TaskStats.reconcile() == 0
+    assert await TaskStats.reconcile() == 0
+    assert await counts(db, user) == {"total": 1, "completed": 0}
+
+
+async def test_unconfirmed_reconcile_fixes_on_first_pass(db, user):
+    await insert_task(db, user)
+    assert await TaskStats.reconcile(confirm=False) == 1
+    assert await counts(db, user) == {"total": 1, "completed": 0}
+
+
+async def test_reconcile_skips_while_another_worker_holds_the_lease(db, user):
+    await insert_task(db, user)
+    other = Lease("task_stats_reconcile", 60)
+    assert await other.acquire()
+
+    assert await TaskStats.reconcile(confirm=False) == 0
+    await other.release()
+    assert await TaskStats.reconcile(confirm=False) == 1
+
+
+async def test_bulk_delete_of_repeated_ids_counts_each_task_once(client, db, user):
+    first, second = await create_tasks(client, "a", "b")
+
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [first, first]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "not_found"]
+    assert await counts(db, user) == {"total": 1, "completed": 0}
+
+    response = await client.put(f"/tasks/{second}", json={"title": "b", "completed": True})
+    assert response.status_code == 200
+    stats = (await client.get("/tasks/stats")).json()
+    assert (stats["total"], stats["completed"], stats["pending"]) == (1, 1, 0)
+
+
+async def test_bulk_delete_racing_a_single_delete_counts_each_task_once(client, db, user, monkeypatch):
+    first, second = await create_tasks(client, "a", "b")
+    bulk_write = TaskRepository._bulk_write
+
+    async def racing(operations):
+        # The single delete lands between the bulk's read and its write
+        await client.delete(f"/tasks/{first}")
+        return await bulk_write(operations)
+
+    monkeypatch.setattr(TaskRepository, "_bulk_write", racing)
+    response = await client.request("DELETE", "/tasks/bulk", json={"ids": [first, second]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "deleted"]
+    assert await counts(db, user) == {"total": 0, "completed": 0}
@@ -8,11 +8,22 @@ export const api = axios.create({
   },
 });
 
+const IDEMPOTENT_METHODS = ['post', 'put', 'patch', 'delete'];
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token');
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  // Retries reuse the same config, so they carry the same key and the
+  // server replays the first response instead of repeating the write
+  if (
+    IDEMPOTENT_METHODS.includes(config.method ?? '') &&
+    config.url?.startsWith('/tasks') &&
+    !config.headers['Idempotency-Key']
+  ) {
+    config.headers['Idempotency-Key'] = crypto.randomUUID();
+  }
   return config;
 });
 